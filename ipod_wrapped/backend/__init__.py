@@ -1,6 +1,6 @@
 """Backend module for iPod Wrapped - handles data processing and analysis"""
 
-from .log_analysis import LogAnalyser
+from .log_analysis import LogAnalyser, normalize_genres
 from .wrapped_helpers import (
     grab_all_metadata,
     find_rockbox_device,
@@ -20,14 +20,28 @@ from .wrapped_helpers import (
     load_stats_from_db,
     get_total_listening_time,
     list_dir_song_paths,
-    extract_metadata_from_path
+    extract_metadata_from_path,
+    get_listening_patterns
 )
 from .album_art_fixer import process_images, organize_music_files, clear_temp_directory
 from .constants import *
 from .creds_manager import save_credentials, get_credentials, has_credentials, delete_credentials
+from .art_store import ArtPack, LooseArtStore, get_art_pack, read_art_bytes, art_exists, is_art_pack_ref
+from .device_locator import DeviceLocator, MountWatcher, get_device_locator
+from .fs_scanner import MusicScanner, scan_music_dir
+from .tag_reader import TagCache, read_tags, get_tags, get_tags_bulk
+from .tagcache import TagcacheReader, load_tagcache
+from .track_index import TrackIndex, build_track_index, normalize_track_path
+from .prefix_index import PrefixIndex
+from .stats_engine import StatsEngine, StatsSnapshot, get_stats_engine
+from .stats_queries import query_top_n
+from .song_queries import grab_songs_page
+from .analytics import PlaysAnalytics, analytics_available
+from .plays_snapshot import PlaysSnapshot, update_plays_snapshot, get_plays_analytics
 
 __all__ = [
     'LogAnalyser',
+    'normalize_genres',
     'grab_all_metadata',
     'find_rockbox_device',
     'find_music_directory',
@@ -48,10 +62,42 @@ __all__ = [
     'find_top_songs',
     'load_stats_from_db',
     'get_total_listening_time',
+    'get_listening_patterns',
     'save_credentials',
     'get_credentials',
     'has_credentials',
     'delete_credentials',
     'list_dir_song_paths',
-    'extract_metadata_from_path'
+    'extract_metadata_from_path',
+    'ArtPack',
+    'LooseArtStore',
+    'get_art_pack',
+    'read_art_bytes',
+    'art_exists',
+    'is_art_pack_ref',
+    'DeviceLocator',
+    'MountWatcher',
+    'get_device_locator',
+    'MusicScanner',
+    'scan_music_dir',
+    'TagCache',
+    'read_tags',
+    'get_tags',
+    'get_tags_bulk',
+    'TagcacheReader',
+    'load_tagcache',
+    'TrackIndex',
+    'build_track_index',
+    'normalize_track_path',
+    'PrefixIndex',
+    'StatsEngine',
+    'StatsSnapshot',
+    'get_stats_engine',
+    'query_top_n',
+    'grab_songs_page',
+    'PlaysAnalytics',
+    'analytics_available',
+    'PlaysSnapshot',
+    'update_plays_snapshot',
+    'get_plays_analytics'
 ]
@@ -1,15 +1,14 @@
 #--------------------------------------------------------------------------------------
 # SOURCE: https://github.com/Xpl0itU/rockbox_scripts/blob/master/album_art_fix.py
 # I've done nothing to this code except remove unused imports. Full credit to XploitU!
+# (tag reading now goes through tag_reader so each file is only opened once)
 #--------------------------------------------------------------------------------------
 import os
 import shutil
 import tempfile
-import base64
 from PIL import Image, UnidentifiedImageError
-from mutagen import File
-from mutagen.flac import Picture as FLACPicture, error as FLACError # Renamed Picture
-from mutagen.mp4 import MP4, MP4Cover
+
+from .tag_reader import get_tags, get_tags_bulk
 
 SUPPORTED_EXTENSIONS = (".mp3", ".flac", ".opus", ".ogg", ".m4a")
 IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
@@ -20,69 +19,18 @@ TEMP_FOLDER_NAME = "cover_extraction_temp" # Used by clear_temp_directory and ne
 
 def extract_art_mutagen(file_path: str) -> str | None:
     try:
-        # Use easy=False for detailed object, or easy=True if simpler access is preferred and sufficient
-        file_obj = File(file_path, easy=False)
-        if file_obj is None:
+        # one cached read gives us the embedded art (see tag_reader)
+        tags = get_tags(file_path, want_art=True)
+        if tags is None:
             print(f"Could not load file with mutagen: {file_path}")
             return None
 
-        pictures_data = [] # List to hold {'data': bytes, 'mime': str}
-        file_ext = os.path.splitext(file_path)[1].lower()
-
-        if file_ext == ".mp3":
-            if hasattr(file_obj, 'tags') and file_obj.tags:
-                for key in file_obj.tags.keys():
-                    if key.startswith("APIC:"):
-                        apic_frame = file_obj.tags[key]
-                        pictures_data.append({'data': apic_frame.data, 'mime': apic_frame.mime})
-                        break # Take the first APIC frame
-        elif file_ext == ".flac":
-            if hasattr(file_obj, 'pictures') and file_obj.pictures:
-                for pic in file_obj.pictures:
-                    pictures_data.append({'data': pic.data, 'mime': pic.mime})
-                    break # Take the first picture
-        elif file_ext in (".opus", ".ogg"):
-            # Opus stores pictures in METADATA_BLOCK_PICTURE Vorbis comments, often base64 encoded FLAC Picture blocks
-            if hasattr(file_obj, 'tags') and file_obj.tags:
-                # Look for list-type tags first
-                b64_picture_tags = []
-                if isinstance(file_obj.tags.get('METADATA_BLOCK_PICTURE'), list):
-                    b64_picture_tags.extend(file_obj.tags.get('METADATA_BLOCK_PICTURE'))
-                elif isinstance(file_obj.tags.get('METADATA_BLOCK_PICTURE'), str):
-                    b64_picture_tags.append(file_obj.tags.get('METADATA_BLOCK_PICTURE'))
-
-                for b64_data in b64_picture_tags:
-                    try:
-                        pic_data_bytes = base64.b64decode(b64_data)
-                        # Attempt to parse as a FLAC Picture block to get mime type and actual data
-                        flac_pic = FLACPicture(pic_data_bytes)
-                        pictures_data.append({'data': flac_pic.data, 'mime': flac_pic.mime})
-                        break # Found and parsed one
-                    except (TypeError, ValueError, base64.binascii.Error, FLACError) as e:
-                        # print(f"Could not parse Opus picture data from {file_path}: {e}")
-                        continue
-        elif file_ext == ".m4a":
-            # M4A (MP4 audio) cover extraction
-            try:
-                mp4_obj = MP4(file_path)
-                covr = mp4_obj.tags.get("covr")
-                if covr:
-                    cover_obj = covr[0]
-                    if isinstance(cover_obj, MP4Cover):
-                        # Determine MIME type by cover_obj.imageformat
-                        # 13 is JPEG, 14 is PNG (see mutagen.mp4.MP4Cover)
-                        mime = "image/jpeg" if cover_obj.imageformat == MP4Cover.FORMAT_JPEG else "image/png"
-                        pictures_data.append({'data': cover_obj, 'mime': mime})
-            except Exception as e:
-                print(f"Error extracting cover from M4A: {file_path}: {e}")
-
-        if not pictures_data:
+        if tags['art'] is None:
             # print(f"No embedded art found in {file_path} using mutagen.") # Reduce verbosity
             return None
 
-        selected_picture = pictures_data[0]
-        pic_data_bytes = selected_picture['data']
-        mime_type = selected_picture['mime']
+        pic_data_bytes = tags['art']
+        mime_type = tags['art_mime']
 
         extensions = {"image/jpeg": "jpeg", "image/png": "png", "image/gif": "gif"}
         ext = extensions.get(mime_type, "jpeg")
@@ -134,15 +82,18 @@ def sanitize_filename(filename: str): # Added from original script, was missing
     )
 
 def get_album_tag(file_path: str): # Added from original script, was missing in user's version
-    try:
-        if file_path.endswith(SUPPORTED_EXTENSIONS):
-            album_tag = File(file_path, easy=True)["album"]
-            return album_tag[0] if isinstance(album_tag, list) else album_tag
-    except Exception as e:
-        print(f"Error reading metadata for {file_path}: {e}")
-        return None
+    if file_path.endswith(SUPPORTED_EXTENSIONS):
+        tags = get_tags(file_path)
+        return tags['album'] if tags else None
+    return None
 
 def organize_music_files(root_dir: str):
+    # read loose files' tags in one parallel pass
+    get_tags_bulk([
+        os.path.join(root_dir, f) for f in os.listdir(root_dir)
+        if f.endswith(SUPPORTED_EXTENSIONS)
+    ])
+
     for filename in os.listdir(root_dir):
         file_path = os.path.join(root_dir, filename)
 
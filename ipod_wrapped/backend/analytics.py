@@ -0,0 +1,416 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, List, Tuple
+from pymongo import MongoClient
+
+from .constants import DEFAULT_ALBUM_ART_DIR, MONGO_AGGREGATE_BATCH_SIZE
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+US_PER_HOUR = 3_600_000_000
+US_PER_DAY = 24 * US_PER_HOUR
+# 1970-01-01 was a thursday (monday = 0)
+EPOCH_WEEKDAY = 3
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+# how many date ranges each engine keeps listening patterns for
+MAX_CACHED_PATTERNS = 8
+
+# Columnar analytics over every play. Plays are held as parallel numpy
+# arrays sorted by time, so a date range is two binary searches and each
+# aggregation is a `bincount` over song ids. Songs map to their artist,
+# album and genres through index arrays. Results (incl. tie-breaks) match
+# `StatsSnapshot` over a local db: every song in the library takes part,
+# songs with no plays in the range just count as 0.
+
+
+def analytics_available() -> bool:
+    """Whether numpy is installed (the analytics engine is optional)"""
+    return np is not None
+
+
+def to_epoch_us(value) -> int:
+    """Converts a datetime (or ISO timestamp string) to microseconds since the epoch"""
+    return int(np.datetime64(value, 'us').astype(np.int64))
+
+
+def _index_keys(keys: list) -> Tuple[list, 'np.ndarray']:
+    """Assigns each distinct, non-empty key an index in sorted order
+
+    Returns:
+        Tuple[list, np.ndarray]: (sorted keys, index of each input key or -1)
+    """
+    names = sorted({k for k in keys if k})
+    positions = {k: i for i, k in enumerate(names)}
+    return names, np.array([positions.get(k, -1) for k in keys], dtype=np.int32)
+
+
+def _ranks(keys: list) -> 'np.ndarray':
+    """The sort position of each key (used for tie-breaks)"""
+    ranks = np.empty(len(keys), dtype=np.int32)
+    ranks[sorted(range(len(keys)), key=keys.__getitem__)] = np.arange(len(keys), dtype=np.int32)
+    return ranks
+
+
+class PlaysAnalytics:
+    """Listening stats over columnar play data"""
+
+    def __init__(self, songs: List[tuple], song_ids, timestamps, elapsed_ms,
+                 album_art_storage: str = DEFAULT_ALBUM_ART_DIR,
+                 song_lengths: Optional[List[int]] = None, presorted: bool = False):
+        """Build the engine from raw columns
+
+        Args:
+            songs (List[tuple]): (song, artist, album, genres) per song id
+            song_ids: Song id (index into `songs`) of each play
+            timestamps: Epoch microseconds of each play
+            elapsed_ms: Elapsed ms of each play
+            album_art_storage (str): The location of album covers. Defaults to DEFAULT_ALBUM_ART_DIR.
+            song_lengths (Optional[List[int]]): song_length_ms per song id. Defaults to None.
+            presorted (bool): The plays are already in time order, use the columns
+                              as is (e.g. memory-mapped). Defaults to False.
+        """
+        self.songs = [(song, artist, album or '', genres or '') for song, artist, album, genres in songs]
+        self.song_lengths = song_lengths or [0] * len(self.songs)
+        self.album_art_storage = album_art_storage
+
+        # plays, sorted by time
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        song_ids = np.asarray(song_ids, dtype=np.int32)
+        elapsed_ms = np.asarray(elapsed_ms, dtype=np.int32)
+        if not presorted:
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, song_ids, elapsed_ms = timestamps[order], song_ids[order], elapsed_ms[order]
+        self.timestamps = timestamps
+        self.song_ids = song_ids
+        self.elapsed_ms = elapsed_ms
+
+        # song -> group index arrays (-1 = not in a group). group names are
+        # sorted, so a lower index also wins ties
+        self.artists, self.song_artist = _index_keys([s[1] for s in self.songs])
+        self.albums, self.song_album = _index_keys(
+            [(s[2], s[1]) if s[2] and s[1] else None for s in self.songs])
+
+        # genres are many-to-many, so they're (song, genre) pairs
+        pair_songs, pair_genres = [], []
+        for song_id, song in enumerate(self.songs):
+            for genre in song[3].split(','):
+                genre = genre.strip()
+                if genre:
+                    pair_songs.append(song_id)
+                    pair_genres.append(genre)
+        self.genres, self.pair_genre = _index_keys(pair_genres)
+        self.pair_song = np.array(pair_songs, dtype=np.int32)
+
+        # tie-breaks: songs by (song, artist), representatives by (album, artist)
+        self.song_rank = _ranks([(s[0], s[1]) for s in self.songs])
+        self.album_rank = _ranks([(s[2], s[1]) for s in self.songs])
+
+        self._patterns = OrderedDict()  # {(start_date, end_date): patterns}
+        self._patterns_lock = threading.Lock()
+
+    @classmethod
+    def from_db(cls, db_type: str, db_path: str,
+                album_art_storage: str = DEFAULT_ALBUM_ART_DIR) -> Optional['PlaysAnalytics']:
+        """Loads every play from the db into a new engine
+
+        Args:
+            db_type (str): Type of database ('mongo' or 'local')
+            db_path (str): Path to local db file
+            album_art_storage (str): The location of album covers. Defaults to DEFAULT_ALBUM_ART_DIR.
+
+        Returns:
+            Optional[PlaysAnalytics]: The engine, None if numpy isn't installed
+        """
+        if not analytics_available():
+            print("numpy is not installed, analytics engine unavailable")
+            return None
+
+        if db_type == 'mongo':
+            db = MongoClient(os.getenv('MONGODB_URI')).song_db
+            song_docs = list(db.songs.find({}, projection={'_id': 0, 'song': 1, 'artist': 1, 'album': 1,
+                                                           'genres': 1, 'song_length_ms': 1}))
+            songs = [(d.get('song'), d.get('artist'), d.get('album'), d.get('genres')) for d in song_docs]
+            song_lengths = [d.get('song_length_ms') or 0 for d in song_docs]
+            song_lookup = {(s[0], s[1]): i for i, s in enumerate(songs)}
+
+            song_ids, timestamps, elapsed = [], [], []
+            plays = db.plays.find({}, projection={'_id': 0, 'song': 1, 'artist': 1,
+                                                  'timestamp': 1, 'elapsed_ms': 1},
+                                  batch_size=MONGO_AGGREGATE_BATCH_SIZE)
+            for play in plays:
+                song_id = song_lookup.get((play.get('song'), play.get('artist')))
+                if song_id is None:
+                    continue
+                song_ids.append(song_id)
+                timestamps.append(play['timestamp'])
+                elapsed.append(play.get('elapsed_ms', 0) or 0)
+        else:
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT rowid, song, artist, album, genres, song_length_ms FROM songs ORDER BY rowid')
+            song_rows = cursor.fetchall()
+            cursor.execute('''
+                SELECT s.rowid, p.timestamp, p.elapsed_ms
+                FROM plays p
+                JOIN songs s ON s.song = p.song AND s.artist = p.artist
+            ''')
+            play_rows = cursor.fetchall()
+            conn.close()
+
+            songs = [row[1:5] for row in song_rows]
+            song_lengths = [row[5] or 0 for row in song_rows]
+            rowids = np.array([row[0] for row in song_rows], dtype=np.int64)
+            play_rowids = np.array([row[0] for row in play_rows], dtype=np.int64)
+            song_ids = np.searchsorted(rowids, play_rowids)
+            timestamps = [row[1] for row in play_rows]
+            elapsed = [row[2] for row in play_rows]
+
+        timestamps = np.array(timestamps, dtype='datetime64[us]').astype(np.int64)
+        return cls(songs, song_ids, timestamps, elapsed, album_art_storage, song_lengths)
+
+    def _range(self, start_date: Optional[datetime], end_date: Optional[datetime]) -> Tuple[int, int]:
+        """Index range of the plays within the given dates (both inclusive)"""
+        lo = 0 if start_date is None else int(np.searchsorted(self.timestamps, to_epoch_us(start_date), 'left'))
+        hi = len(self.timestamps) if end_date is None else int(np.searchsorted(self.timestamps, to_epoch_us(end_date), 'right'))
+        return lo, max(lo, hi)
+
+    def song_totals(self, start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> Tuple['np.ndarray', 'np.ndarray']:
+        """Plays + listening time of every song within the given dates
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (plays, elapsed ms), indexed by song id
+        """
+        lo, hi = self._range(start_date, end_date)
+        ids = self.song_ids[lo:hi]
+        plays = np.bincount(ids, minlength=len(self.songs))
+        elapsed = np.bincount(ids, weights=self.elapsed_ms[lo:hi], minlength=len(self.songs))
+        return plays, elapsed.astype(np.int64)
+
+    def stats_rows(self, start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None) -> List[dict]:
+        """Per-song stats within the given dates, the same rows as
+        `load_stats_from_db` returns for a local db
+
+        Returns:
+            List[dict]: List of dicts with keys: song, artist, album, genres, total_plays,
+                       song_length_ms, total_elapsed_ms
+        """
+        plays, elapsed = self.song_totals(start_date, end_date)
+        return [
+            {'song': song, 'artist': artist, 'album': album, 'genres': genres,
+             'total_plays': song_plays, 'song_length_ms': length, 'total_elapsed_ms': song_elapsed}
+            for (song, artist, album, genres), length, song_plays, song_elapsed
+            in zip(self.songs, self.song_lengths, plays.tolist(), elapsed.tolist())
+        ]
+
+    def _group_totals(self, category: str, song_elapsed: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """Total listening time per group
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (totals per group, song of each
+                                                       membership, group of each membership)
+        """
+        if category == 'genres':
+            members, groups, n_groups = self.pair_song, self.pair_genre, len(self.genres)
+        else:
+            song_group = self.song_artist if category == 'artists' else self.song_album
+            members = np.flatnonzero(song_group >= 0).astype(np.int32)
+            groups = song_group[members]
+            n_groups = len(self.artists if category == 'artists' else self.albums)
+
+        totals = np.bincount(groups, weights=song_elapsed[members], minlength=n_groups)
+        return totals.astype(np.int64), members, groups
+
+    def _top_groups(self, category: str, n: int, start_date: Optional[datetime],
+                    end_date: Optional[datetime]) -> List[tuple]:
+        """Top n groups of a category by listening time
+
+        Returns:
+            List[tuple]: (group index, total ms, representative song id)
+        """
+        _, song_elapsed = self.song_totals(start_date, end_date)
+        totals, members, groups = self._group_totals(category, song_elapsed)
+
+        # by total desc, ties by name (= group index)
+        winners = np.lexsort((np.arange(len(totals)), -totals))[:n]
+
+        top = []
+        for group in winners:
+            # most listened song, ties by (album, artist)
+            candidates = members[groups == group]
+            best = candidates[np.lexsort((self.album_rank[candidates], -song_elapsed[candidates]))[0]]
+            top.append((int(group), int(totals[group]), int(best)))
+        return top
+
+    def _art(self, song_id: int) -> str:
+        """Looks up the art for a song's album"""
+        # avoid a circular import
+        from .wrapped_helpers import find_album_art
+        _, artist, album, _ = self.songs[song_id]
+        return find_album_art(album, self.album_art_storage, artist=artist)
+
+    def top_genres(self, n: int = 3, start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None) -> List[dict]:
+        """See `find_top_genres`"""
+        return [
+            {'genre': self.genres[group], 'total_elapsed_mins': total // 60000, 'album_art': self._art(best)}
+            for group, total, best in self._top_groups('genres', n, start_date, end_date)
+        ]
+
+    def top_artists(self, n: int = 3, start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> List[dict]:
+        """See `find_top_artists`"""
+        return [
+            {'artist': self.artists[group], 'total_elapsed_mins': total // 60000, 'album_art': self._art(best)}
+            for group, total, best in self._top_groups('artists', n, start_date, end_date)
+        ]
+
+    def top_albums(self, n: int = 3, start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None) -> List[dict]:
+        """See `find_top_albums`"""
+        top = []
+        for group, total, best in self._top_groups('albums', n, start_date, end_date):
+            album, artist = self.albums[group]
+            top.append({'album': album, 'artist': artist, 'total_elapsed_mins': total // 60000,
+                        'album_art': self._art(best)})
+        return top
+
+    def _top_song_ids(self, n: int, start_date: Optional[datetime],
+                      end_date: Optional[datetime]) -> List[tuple]:
+        """Top n songs by plays, ties by (song, artist)
+
+        Returns:
+            List[tuple]: (song id, plays)
+        """
+        plays, _ = self.song_totals(start_date, end_date)
+        winners = np.lexsort((self.song_rank, -plays))[:n]
+        return [(int(song_id), int(plays[song_id])) for song_id in winners]
+
+    def top_songs(self, n: int = 3, start_date: Optional[datetime] = None,
+                  end_date: Optional[datetime] = None) -> List[dict]:
+        """See `find_top_songs`"""
+        return [
+            {'song': self.songs[song_id][0], 'artist': self.songs[song_id][1],
+             'total_plays': plays, 'album_art': self._art(song_id)}
+            for song_id, plays in self._top_song_ids(n, start_date, end_date)
+        ]
+
+    def most_listened_song(self, start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None) -> Optional[tuple]:
+        """The song with the most plays
+
+        Returns:
+            Optional[tuple]: (song, artist, album)
+        """
+        top = self._top_song_ids(1, start_date, end_date)
+        if not top:
+            return None
+        song, artist, album, _ = self.songs[top[0][0]]
+        return (song, artist, album)
+
+    def total_listening_mins(self, start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None) -> int:
+        """See `get_total_listening_time`"""
+        lo, hi = self._range(start_date, end_date)
+        return int(self.elapsed_ms[lo:hi].sum(dtype=np.int64)) // 60000
+
+    def listening_patterns(self, start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None) -> dict:
+        """When the listening happened: an hour x weekday heatmap, the longest
+        run of consecutive days with plays, the busiest day and minutes per
+        month. Cached per date range.
+
+        Returns:
+            dict: {
+                'heatmap_mins': List[List[int]] (7 weekdays, monday first, x 24 hours),
+                'longest_streak': {'days': int, 'start': str, 'end': str} or None,
+                'busiest_day': {'date': str, 'mins': int} or None,
+                'monthly_mins': [{'month': str, 'mins': int}, ...]
+            }
+        """
+        key = (start_date, end_date)
+        with self._patterns_lock:
+            if key in self._patterns:
+                self._patterns.move_to_end(key)
+                return self._patterns[key]
+
+        patterns = self._compute_patterns(start_date, end_date)
+        with self._patterns_lock:
+            self._patterns[key] = patterns
+            while len(self._patterns) > MAX_CACHED_PATTERNS:
+                self._patterns.popitem(last=False)
+        return patterns
+
+    def _compute_patterns(self, start_date: Optional[datetime], end_date: Optional[datetime]) -> dict:
+        """See `listening_patterns`"""
+        lo, hi = self._range(start_date, end_date)
+        return compute_listening_patterns(self.timestamps[lo:hi], self.elapsed_ms[lo:hi])
+
+
+def compute_listening_patterns(timestamps: 'np.ndarray', elapsed: 'np.ndarray') -> dict:
+    """Works out the listening patterns (see `PlaysAnalytics.listening_patterns`).
+    Only the day and hour of each timestamp matter, so plays already summed
+    per hour give the same result.
+
+    Args:
+        timestamps (np.ndarray): Epoch microseconds, in time order
+        elapsed (np.ndarray): Listening time (ms) at each timestamp
+
+    Returns:
+        dict: The patterns
+    """
+    elapsed = np.asarray(elapsed).astype(np.int64)
+
+    # timestamps are local wall-clock times, so days/hours fall out directly
+    days = timestamps // US_PER_DAY
+    hours = (timestamps // US_PER_HOUR) % 24
+    weekdays = (days + EPOCH_WEEKDAY) % 7
+    heatmap = np.bincount(weekdays * 24 + hours, weights=elapsed, minlength=7 * 24)
+    heatmap = (heatmap.astype(np.int64) // 60000).reshape(7, 24)
+
+    patterns = {
+        'heatmap_mins': heatmap.tolist(),
+        'longest_streak': None,
+        'busiest_day': None,
+        'monthly_mins': []
+    }
+    if not len(timestamps):
+        return patterns
+
+    # plays are in time order, so each day (and month) is one contiguous run
+    day_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    unique_days = days[day_starts]
+    day_ms = np.add.reduceat(elapsed, day_starts)
+
+    busiest = int(np.argmax(day_ms))
+    patterns['busiest_day'] = {
+        'date': str(unique_days[busiest].astype('datetime64[D]')),
+        'mins': int(day_ms[busiest]) // 60000
+    }
+
+    # streaks break wherever consecutive listening days are >1 day apart
+    breaks = np.flatnonzero(np.diff(unique_days) != 1)
+    run_starts = np.r_[0, breaks + 1]
+    run_ends = np.r_[breaks, len(unique_days) - 1]
+    longest = int(np.argmax(run_ends - run_starts))
+    patterns['longest_streak'] = {
+        'days': int(run_ends[longest] - run_starts[longest]) + 1,
+        'start': str(unique_days[run_starts[longest]].astype('datetime64[D]')),
+        'end': str(unique_days[run_ends[longest]].astype('datetime64[D]'))
+    }
+
+    months = unique_days.astype('datetime64[D]').astype('datetime64[M]')
+    month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    month_ms = np.add.reduceat(day_ms, month_starts)
+    patterns['monthly_mins'] = [
+        {'month': str(month), 'mins': int(ms) // 60000}
+        for month, ms in zip(months[month_starts], month_ms)
+    ]
+    return patterns
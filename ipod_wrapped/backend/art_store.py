@@ -0,0 +1,394 @@
+import os
+import json
+import mmap
+import shutil
+import hashlib
+import threading
+from typing import Optional, Dict, List, Tuple
+
+from .constants import DEFAULT_ART_PACK_PATH, ART_PACK_ENV_VAR
+
+# art refs look like 'artpack://<content hash>' so they can travel through
+# the same 'art_path' fields as loose cover files
+ART_PACK_SCHEME = 'artpack://'
+
+# content-addressed loose covers: '<album_art_dir>/covers/<hash>.jpg', with
+# album -> hash references kept in '<album_art_dir>/art_refs.json'
+LOOSE_COVERS_DIRNAME = 'covers'
+LOOSE_REFS_FILENAME = 'art_refs.json'
+
+
+def hash_art(data: bytes) -> str:
+    """Content hash used to address album art"""
+    return hashlib.sha1(data).hexdigest()
+
+
+def _reuse_stats(refs: Dict[str, str], sizes: Dict[str, int]) -> dict:
+    """Summarises how many covers are shared between albums
+
+    Args:
+        refs (Dict[str, str]): {album key: content hash}
+        sizes (Dict[str, int]): {content hash: size in bytes}
+
+    Returns:
+        dict: {'albums': int, 'unique_covers': int, 'reused': int, 'bytes_saved': int}
+    """
+    counts = {}
+    for art_hash in refs.values():
+        counts[art_hash] = counts.get(art_hash, 0) + 1
+
+    bytes_saved = sum(sizes.get(art_hash, 0) * (count - 1) for art_hash, count in counts.items())
+    return {
+        'albums': len(refs),
+        'unique_covers': len(counts),
+        'reused': len(refs) - len(counts),
+        'bytes_saved': bytes_saved
+    }
+
+
+class ArtPack:
+    """A packed album art store. Every unique cover lives once in an
+    append-only blob file, addressed by its content hash. A small JSON index
+    next to it maps (artist, album) -> hash and hash -> (offset, length).
+    Reads are served straight out of a read-only mmap."""
+
+    INDEX_VERSION = 2
+
+    def __init__(self, pack_path: str = DEFAULT_ART_PACK_PATH):
+        """Open (or lazily create) the pack at the given location
+
+        Args:
+            pack_path (str): Path to the blob file. The index is stored
+                             alongside it as '<pack_path>.json'.
+        """
+        self.pack_path = str(pack_path)
+        self.index_path = f"{self.pack_path}.json"
+        self.refs: Dict[str, str] = {}         # {"artist\x1falbum": hash}
+        self.blobs: Dict[str, List[int]] = {}  # {hash: [offset, length]}
+
+        self._by_artist: Optional[Dict[str, List[str]]] = None
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._mmap_file = None
+        self._load_index()
+
+    @staticmethod
+    def _key(artist: str, album: str) -> str:
+        """Builds the index key for the given artist + album"""
+        return f"{artist or ''}\x1f{album or ''}"
+
+    @staticmethod
+    def _split_key(key: str) -> Tuple[str, str]:
+        """Splits an index key back into (artist, album)"""
+        artist, _, album = key.partition('\x1f')
+        return artist, album
+
+    def _load_index(self) -> None:
+        """Loads the index from disk (if it exists)"""
+        if not os.path.exists(self.index_path):
+            return
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except Exception as e:
+            print(f"Warning: could not read album art pack index: {e}")
+            return
+
+        if index.get('version') == self.INDEX_VERSION:
+            self.refs = index.get('albums', {})
+            self.blobs = index.get('blobs', {})
+            return
+
+        # older index of {key: [offset, length]} -- hash the blobs in place
+        for key, (offset, length) in index.items():
+            data = self._read(offset, length)
+            if data is None:
+                continue
+            art_hash = hash_art(data)
+            self.blobs.setdefault(art_hash, [offset, length])
+            self.refs[key] = art_hash
+        self._save_index()
+
+    def _save_index(self) -> None:
+        """Writes the index to disk atomically"""
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.INDEX_VERSION, 'albums': self.refs, 'blobs': self.blobs}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _close_mmap(self) -> None:
+        """Drops the current mapping (if any)"""
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # views handed out are still alive, the mapping is released
+                # once the last of them is garbage collected
+                pass
+            self._mmap = None
+        if self._mmap_file is not None:
+            self._mmap_file.close()
+            self._mmap_file = None
+
+    def _get_mmap(self, needed_size: int) -> Optional[mmap.mmap]:
+        """Returns a read-only mapping covering at least `needed_size`
+        bytes, remapping if the pack has grown since it was last mapped"""
+        with self._lock:
+            if self._mmap is not None and len(self._mmap) >= needed_size:
+                return self._mmap
+
+            self._close_mmap()
+            if not os.path.exists(self.pack_path) or os.path.getsize(self.pack_path) == 0:
+                return None
+
+            self._mmap_file = open(self.pack_path, 'rb')
+            self._mmap = mmap.mmap(self._mmap_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._mmap) < needed_size:
+                return None
+            return self._mmap
+
+    def _read(self, offset: int, length: int) -> Optional[memoryview]:
+        """Returns a view of the given byte range of the pack"""
+        mapped = self._get_mmap(offset + length)
+        if mapped is None:
+            return None
+        return memoryview(mapped)[offset:offset + length]
+
+    def has(self, artist: str, album: str) -> bool:
+        """Checks if the pack has a cover for the given artist + album"""
+        return self._key(artist, album) in self.refs
+
+    def has_blob(self, art_hash: str) -> bool:
+        """Checks if the pack has a cover with the given content hash"""
+        return art_hash in self.blobs
+
+    def get_blob(self, art_hash: str) -> Optional[memoryview]:
+        """Gets the cover with the given content hash
+
+        Returns:
+            Optional[memoryview]: A view straight into the mapped pack, or None
+        """
+        entry = self.blobs.get(art_hash)
+        if entry is None:
+            return None
+        return self._read(*entry)
+
+    def get(self, artist: str, album: str) -> Optional[memoryview]:
+        """Gets the cover for the given artist + album
+
+        Returns:
+            Optional[memoryview]: A view straight into the mapped pack, or None
+        """
+        art_hash = self.refs.get(self._key(artist, album))
+        if art_hash is None:
+            return None
+        return self.get_blob(art_hash)
+
+    def put(self, artist: str, album: str, data: bytes, save: bool = True) -> bool:
+        """Adds/replaces the cover for the given artist + album. Each unique
+        image is stored once; new images are appended to the end of the pack
+        so existing views stay valid.
+
+        Args:
+            artist (str): The album artist
+            album (str): The album name
+            data (bytes): The encoded image
+            save (bool): Write the index to disk straight away. Defaults to True.
+
+        Returns:
+            bool: True if the pack changed, False otherwise
+        """
+        key = self._key(artist, album)
+        art_hash = hash_art(data)
+        if self.refs.get(key) == art_hash:
+            return False
+
+        if art_hash not in self.blobs:
+            os.makedirs(os.path.dirname(self.pack_path) or '.', exist_ok=True)
+            with open(self.pack_path, 'ab') as f:
+                offset = f.tell()
+                f.write(data)
+            self.blobs[art_hash] = [offset, len(data)]
+
+        self.refs[key] = art_hash
+        self._by_artist = None
+        if save:
+            self._save_index()
+        return True
+
+    def save(self) -> None:
+        """Writes any pending index changes to disk"""
+        self._save_index()
+
+    def albums(self) -> List[Tuple[str, str]]:
+        """Lists every (artist, album) stored in the pack"""
+        return [self._split_key(key) for key in self.refs]
+
+    def albums_for(self, artist: str) -> List[str]:
+        """Lists the albums stored in the pack for the given artist"""
+        if self._by_artist is None:
+            by_artist = {}
+            for pack_artist, pack_album in self.albums():
+                by_artist.setdefault(pack_artist, []).append(pack_album)
+            self._by_artist = by_artist
+        return self._by_artist.get(artist or '', [])
+
+    def reuse_stats(self) -> dict:
+        """Reports how many albums share a cover (see `_reuse_stats`)"""
+        sizes = {art_hash: length for art_hash, (_, length) in self.blobs.items()}
+        return _reuse_stats(self.refs, sizes)
+
+    def compact(self) -> None:
+        """Rewrites the pack without any covers no album refers to anymore"""
+        tmp_path = f"{self.pack_path}.tmp"
+        new_blobs = {}
+        with open(tmp_path, 'wb') as out:
+            for art_hash in set(self.refs.values()):
+                data = self.get_blob(art_hash)
+                if data is None:
+                    continue
+                new_blobs[art_hash] = [out.tell(), len(data)]
+                out.write(data)
+
+        with self._lock:
+            self._close_mmap()
+            os.replace(tmp_path, self.pack_path)
+        self.blobs = new_blobs
+        self.refs = {key: art_hash for key, art_hash in self.refs.items() if art_hash in new_blobs}
+        self._by_artist = None
+        self._save_index()
+
+    def ref(self, artist: str, album: str) -> Optional[str]:
+        """Builds the art ref for the given artist + album. Albums sharing a
+        cover share a ref, so the UI only decodes it once."""
+        art_hash = self.refs.get(self._key(artist, album))
+        return f"{ART_PACK_SCHEME}{art_hash}" if art_hash else None
+
+    def close(self) -> None:
+        """Closes the underlying mapping"""
+        with self._lock:
+            self._close_mmap()
+
+
+class LooseArtStore:
+    """Content-addressed loose album art. Each unique cover is stored once as
+    '<album_art_dir>/covers/<hash>.jpg', and albums refer to it by hash."""
+
+    def __init__(self, album_art_storage: str):
+        """Open the loose store in the given album art directory
+
+        Args:
+            album_art_storage (str): The album art directory
+        """
+        self.album_art_storage = str(album_art_storage)
+        self.covers_dir = os.path.join(self.album_art_storage, LOOSE_COVERS_DIRNAME)
+        self.refs_path = os.path.join(self.album_art_storage, LOOSE_REFS_FILENAME)
+        self.refs: Dict[str, str] = {}  # {album: hash}
+
+        if os.path.exists(self.refs_path):
+            try:
+                with open(self.refs_path, 'r', encoding='utf-8') as f:
+                    self.refs = json.load(f)
+            except Exception as e:
+                print(f"Warning: could not read album art refs: {e}")
+
+    def cover_path(self, art_hash: str) -> str:
+        """The location of the cover with the given content hash"""
+        return os.path.join(self.covers_dir, f"{art_hash}.jpg")
+
+    def put_file(self, album: str, src_path: str) -> bool:
+        """Stores the given cover file for the given album
+
+        Returns:
+            bool: True if a new unique cover was written, False if one was reused
+        """
+        with open(src_path, 'rb') as f:
+            art_hash = hash_art(f.read())
+
+        self.refs[album] = art_hash
+        dest_path = self.cover_path(art_hash)
+        if os.path.exists(dest_path):
+            return False
+
+        os.makedirs(self.covers_dir, exist_ok=True)
+        shutil.copy2(src_path, dest_path)
+        return True
+
+    def save(self) -> None:
+        """Writes the album -> hash refs to disk atomically"""
+        os.makedirs(self.album_art_storage, exist_ok=True)
+        tmp_path = f"{self.refs_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.refs, f)
+        os.replace(tmp_path, self.refs_path)
+
+    def art_paths(self) -> Dict[str, str]:
+        """{album: cover path} for every album with a stored cover"""
+        return {album: self.cover_path(art_hash) for album, art_hash in self.refs.items()}
+
+    def reuse_stats(self) -> dict:
+        """Reports how many albums share a cover (see `_reuse_stats`)"""
+        sizes = {}
+        for art_hash in set(self.refs.values()):
+            try:
+                sizes[art_hash] = os.path.getsize(self.cover_path(art_hash))
+            except OSError:
+                continue
+        return _reuse_stats(self.refs, sizes)
+
+
+_art_pack: Optional[ArtPack] = None
+_art_pack_lock = threading.Lock()
+
+
+def get_art_pack(pack_path: str = DEFAULT_ART_PACK_PATH) -> ArtPack:
+    """Returns the process-wide art pack (opening it on first use)"""
+    global _art_pack
+    with _art_pack_lock:
+        if _art_pack is None or _art_pack.pack_path != str(pack_path):
+            _art_pack = ArtPack(pack_path)
+        return _art_pack
+
+
+def is_art_pack_ref(art_path: str) -> bool:
+    """Checks if the given art path is a packed art ref"""
+    return isinstance(art_path, str) and art_path.startswith(ART_PACK_SCHEME)
+
+
+def parse_art_pack_ref(art_path: str) -> Optional[str]:
+    """Parses an art ref back into its content hash"""
+    if not is_art_pack_ref(art_path):
+        return None
+    return art_path[len(ART_PACK_SCHEME):]
+
+
+def read_art_bytes(art_path: str) -> Optional[memoryview]:
+    """Reads the encoded image behind a packed art ref.
+
+    Args:
+        art_path (str): An art ref (see `ArtPack.ref`)
+
+    Returns:
+        Optional[memoryview]: The image data, or None if `art_path` is not a
+                              ref (i.e. a loose file) or is missing from the pack
+    """
+    art_hash = parse_art_pack_ref(art_path)
+    if art_hash is None:
+        return None
+    return get_art_pack().get_blob(art_hash)
+
+
+def art_exists(art_path: str) -> bool:
+    """Checks if the given art path (loose file or art ref) exists"""
+    if not art_path:
+        return False
+    if is_art_pack_ref(art_path):
+        return get_art_pack().has_blob(parse_art_pack_ref(art_path))
+    return os.path.exists(art_path)
+
+
+def art_pack_enabled() -> bool:
+    """Whether new album art should be written to the packed store.
+    Read at call time so a value from the .env is picked up."""
+    return os.getenv(ART_PACK_ENV_VAR, '0') == '1'
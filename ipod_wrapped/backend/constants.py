@@ -5,6 +5,9 @@ from enum import Enum
 
 # misc.
 BATCH_SIZE = 50
+MONGO_AGGREGATE_BATCH_SIZE = 2000
+SONG_STORE_CHUNK_SIZE = 1000  # songs added to a table per idle callback
+SONGS_PAGE_SIZE = 200  # songs fetched per page by the songs table
 SERVICE_NAME = 'ipod-wrapped'
 IPOD_LOG_PATTERN = r'^(\d+):(\d+):(\d+):(.+)$'
 SONG_EXTENSIONS = ['.mp3', '.flac', '.ogg', '.wav', '.m4a', '.aac', '.alac', '.aiff', '.opus', '.wma', '.ape', '.wv', '.mpc', '.dsf', '.dsd', '.tta']
@@ -31,6 +34,26 @@ else:
 # storage
 DEFAULT_DB_PATH = STORAGE_DIR / "ipod_wrapped.db"
 DEFAULT_ALBUM_ART_DIR = STORAGE_DIR / "album_art"
+DEFAULT_ART_PACK_PATH = DEFAULT_ALBUM_ART_DIR / "album_art.pack"
+DEFAULT_MUSIC_MANIFEST_PATH = STORAGE_DIR / "music_manifest.json"
+DEFAULT_TAG_CACHE_PATH = STORAGE_DIR / "tag_cache.json"
+GENRE_MAPPINGS_HASH_PATH = STORAGE_DIR / "genre_mappings_hash.json"
+DEFAULT_PLAYS_SNAPSHOT_DIR = STORAGE_DIR / "plays_snapshot"
+DEFAULT_ROUNDED_ART_DIR = STORAGE_DIR / "rounded_art"
+
+# album covers kept in memory (decoded RGBA bytes) - plain covers shared by
+# every widget, and the rounded ones on album buttons
+ART_TEXTURE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+ROUNDED_ART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# rounded covers saved to DEFAULT_ROUNDED_ART_DIR (least recently used go first)
+ROUNDED_ART_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# packed album art store (opt-in) - loose covers are still read either way
+ART_PACK_ENV_VAR = "IPOD_WRAPPED_ART_PACK"
+
+# where sync gets song metadata from: 'path' (folder layout heuristics) or
+# 'tagcache' (rockbox's tag database, falling back to path heuristics)
+METADATA_SOURCE_ENV_VAR = "IPOD_WRAPPED_METADATA_SOURCE"
 
 # responsive scaling - default sizes and per-tier sizes
 DEFAULT_SCALE_TIER = 'scale-compact'
@@ -116,6 +139,20 @@ VISUAL_PAGE_MARGINS = {
     'scale-medium': 50,
     'scale-large': 60,
 }
+DEFAULT_VISUAL_HEATMAP_CELL_SIZE = 10
+DEFAULT_VISUAL_MONTH_BAR_HEIGHT = 60
+VISUAL_HEATMAP_MONTHS = 24
+
+VISUAL_HEATMAP_CELL_SIZES = {
+    'scale-compact': DEFAULT_VISUAL_HEATMAP_CELL_SIZE,
+    'scale-medium': 14,
+    'scale-large': 20,
+}
+VISUAL_MONTH_BAR_HEIGHTS = {
+    'scale-compact': DEFAULT_VISUAL_MONTH_BAR_HEIGHT,
+    'scale-medium': 80,
+    'scale-large': 110,
+}
 
 # lastfm
 lastfm_root = 'http://ws.audioscrobbler.com'
@@ -0,0 +1,139 @@
+import os
+import psutil
+import hashlib
+import platform
+import threading
+from typing import Optional, Tuple
+
+MOUNTINFO_PATH = '/proc/self/mountinfo'
+
+# names the Music folder usually goes by, checked directly under the mount
+MUSIC_DIR_CANDIDATES = ('Music', 'music', 'MUSIC')
+
+
+class MountWatcher:
+    """Notices when devices are mounted/unmounted. Reads /proc/self/mountinfo
+    where available, otherwise falls back to the psutil partition list."""
+
+    def __init__(self):
+        self._signature = self._read_signature()
+
+    @staticmethod
+    def _read_signature() -> str:
+        """Fingerprint of the current mount table"""
+        try:
+            with open(MOUNTINFO_PATH, 'rb') as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            mounts = sorted((p.device, p.mountpoint) for p in psutil.disk_partitions(all=False))
+            return hashlib.sha1(repr(mounts).encode()).hexdigest()
+
+    def changed(self) -> bool:
+        """Checks if the mount table has changed since the last check"""
+        signature = self._read_signature()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+
+class DeviceLocator:
+    """Finds the mounted Rockbox device and its Music folder. Known layouts
+    are probed first, and the result is cached by (mount point, device id)
+    until the mount table changes."""
+
+    def __init__(self):
+        self.watcher = MountWatcher()
+        self._lock = threading.Lock()
+        self._device: Optional[Tuple[str, int]] = None  # (mount point, st_dev)
+        self._music_dir: Optional[str] = None
+
+    def invalidate(self) -> None:
+        """Forgets the cached device + Music folder"""
+        with self._lock:
+            self._device = None
+            self._music_dir = None
+
+    def _cached_device(self) -> Optional[str]:
+        """Returns the cached mount point if it still looks valid"""
+        if self._device is None:
+            return None
+        if self.watcher.changed():
+            self._device = None
+            self._music_dir = None
+            return None
+
+        mount_point, device_id = self._device
+        try:
+            if os.stat(mount_point).st_dev != device_id:
+                raise OSError("device changed")
+        except OSError:
+            self._device = None
+            self._music_dir = None
+            return None
+        return mount_point
+
+    def find_device(self) -> Optional[str]:
+        """Find the mounted device with a .rockbox folder in it"""
+        with self._lock:
+            mount_point = self._cached_device()
+            if mount_point is not None:
+                return mount_point
+
+            for partition in psutil.disk_partitions(all=False):
+                # skip sys partitions on Windows
+                if partition.device.startswith('C:\\') and platform.system() == "Windows":
+                    continue
+
+                try:
+                    # check if rockbox folder present
+                    if os.path.isdir(os.path.join(partition.mountpoint, '.rockbox')):
+                        self._device = (partition.mountpoint, os.stat(partition.mountpoint).st_dev)
+                        self._music_dir = None
+                        print(f"Found Rockbox device at: {partition.mountpoint}")
+                        return partition.mountpoint
+                except (PermissionError, OSError):
+                    # mount can't be accessed
+                    continue
+
+            print("No Rockbox device found")
+            return None
+
+    def find_music_dir(self) -> Optional[str]:
+        """Finds the location of the 'Music' directory on the device"""
+        mount_point = self.find_device()
+        if not mount_point:
+            return None
+
+        with self._lock:
+            if self._music_dir is not None and os.path.isdir(self._music_dir):
+                return self._music_dir
+
+            # usual layout: '<mount>/Music'
+            for name in MUSIC_DIR_CANDIDATES:
+                candidate = os.path.join(mount_point, name)
+                if os.path.isdir(candidate):
+                    self._music_dir = candidate
+                    return candidate
+
+            # otherwise walk the device, stopping at the first match
+            for root, dirs, _ in os.walk(mount_point):
+                if '.rockbox' in dirs:
+                    dirs.remove('.rockbox')
+                if 'Music' in dirs:
+                    self._music_dir = os.path.join(root, 'Music')
+                    return self._music_dir
+            return None
+
+
+_device_locator: Optional[DeviceLocator] = None
+_device_locator_lock = threading.Lock()
+
+
+def get_device_locator() -> DeviceLocator:
+    """Returns the process-wide device locator"""
+    global _device_locator
+    with _device_locator_lock:
+        if _device_locator is None:
+            _device_locator = DeviceLocator()
+        return _device_locator
@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import threading
+from typing import Optional, Dict, List
+
+from .constants import DEFAULT_MUSIC_MANIFEST_PATH, SONG_EXTENSIONS
+
+# dirs whose mtime is this close to the scan time are relisted next scan, as
+# FAT (what most iPods use) only has 2 second timestamp resolution
+_RACY_MTIME_NS = 3 * 1_000_000_000
+
+
+class MusicScanner:
+    """Incremental scanner for the iPod's Music directory.
+
+    Keeps a manifest (in STORAGE_DIR) of every file's (size, mtime) and every
+    directory's mtime. A scan only relists directories whose mtime changed, and
+    just stats the known files of the rest: a directory's mtime only moves when
+    entries are added, removed or renamed, not when a file is rewritten in
+    place (retagged, cover.jpg overwritten). Each change is stamped with
+    a scan generation, letting every consumer ask for what was added, changed
+    or removed since it last looked (see `diff` / `mark_consumed`).
+    """
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, music_dir: str, manifest_path: str = DEFAULT_MUSIC_MANIFEST_PATH):
+        """Open the manifest for the given Music directory
+
+        Args:
+            music_dir (str): Location of the 'Music' directory on the iPod
+            manifest_path (str): Where to persist the manifest.
+                                 Defaults to DEFAULT_MUSIC_MANIFEST_PATH.
+        """
+        self.music_dir = str(music_dir)
+        self.manifest_path = str(manifest_path)
+        self.generation = 0
+        # {rel dir: {'mtime': int|None, 'subdirs': [names],
+        #            'files': {name: [size, mtime, added_gen, changed_gen]}}}
+        self.dirs: Dict[str, dict] = {}
+        self.removed: Dict[str, int] = {}    # {rel path: gen removed}
+        self.consumers: Dict[str, int] = {}  # {consumer: last gen consumed}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _join(rel_dir: str, name: str) -> str:
+        """Joins a manifest-relative dir and a name"""
+        return f"{rel_dir}/{name}" if rel_dir else name
+
+    def _abs(self, rel_path: str) -> str:
+        """Turns a manifest-relative path into a full path"""
+        return os.path.join(self.music_dir, *rel_path.split('/')) if rel_path else self.music_dir
+
+    def _load(self) -> None:
+        """Loads the manifest from disk (if it's for this Music directory)"""
+        if not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"Warning: could not read music manifest: {e}")
+            return
+
+        if manifest.get('version') != self.MANIFEST_VERSION or manifest.get('root') != self.music_dir:
+            # different device/mount, start again
+            return
+
+        self.generation = manifest.get('generation', 0)
+        self.dirs = manifest.get('dirs', {})
+        self.removed = manifest.get('removed', {})
+        self.consumers = manifest.get('consumers', {})
+
+    def _save(self) -> None:
+        """Writes the manifest to disk atomically"""
+        os.makedirs(os.path.dirname(self.manifest_path) or '.', exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.MANIFEST_VERSION,
+                'root': self.music_dir,
+                'generation': self.generation,
+                'dirs': self.dirs,
+                'removed': self.removed,
+                'consumers': self.consumers
+            }, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _restat_files(self, rel_dir: str, files: Dict[str, list], gen: int) -> bool:
+        """Stats the cached files of an unchanged directory, stamping any
+        whose size/mtime moved (retags, replaced covers) as changed
+
+        Returns:
+            bool: True if any file changed or disappeared
+        """
+        changed = False
+        for name, entry in list(files.items()):
+            rel_path = self._join(rel_dir, name)
+            try:
+                stat = os.stat(self._abs(rel_path))
+            except OSError:
+                del files[name]
+                self.removed[rel_path] = gen
+                changed = True
+                continue
+            if entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+                files[name] = [stat.st_size, stat.st_mtime_ns, entry[2], gen]
+                changed = True
+        return changed
+
+    def scan(self, full: bool = False) -> bool:
+        """Brings the manifest up to date with the Music directory. New and
+        deleted files are found through their directory's mtime, files rewritten
+        in place through their own (size, mtime), so an edit that keeps both
+        (e.g. a tag editor restoring the old mtime) isn't detected, not even
+        with `full`.
+
+        Args:
+            full (bool): Relist every directory, even unchanged ones (files are
+                         still compared by size and mtime). Defaults to False.
+
+        Returns:
+            bool: True if anything changed since the last scan
+        """
+        with self._lock:
+            gen = self.generation + 1
+            scan_start = time.time_ns()
+            changed = False
+            seen_dirs = set()
+            stack = ['']
+
+            while stack:
+                rel_dir = stack.pop()
+                abs_dir = self._abs(rel_dir)
+                try:
+                    dir_mtime = os.stat(abs_dir).st_mtime_ns
+                except OSError:
+                    continue
+                seen_dirs.add(rel_dir)
+
+                # unchanged dir, reuse the cached listing (but still stat its
+                # files, edits in place don't touch the dir's mtime)
+                cached = self.dirs.get(rel_dir)
+                if not full and cached and cached['mtime'] == dir_mtime:
+                    if self._restat_files(rel_dir, cached['files'], gen):
+                        changed = True
+                    stack.extend(self._join(rel_dir, d) for d in cached['subdirs'])
+                    continue
+
+                files = {}
+                subdirs = []
+                try:
+                    with os.scandir(abs_dir) as entries:
+                        for entry in entries:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    if entry.name != '.rockbox':
+                                        subdirs.append(entry.name)
+                                elif entry.is_file():
+                                    stat = entry.stat()
+                                    files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+                            except OSError:
+                                continue
+                except OSError:
+                    continue
+
+                # compare against what we had before
+                old_files = cached['files'] if cached else {}
+                for name, (size, mtime) in files.items():
+                    rel_path = self._join(rel_dir, name)
+                    old = old_files.get(name)
+                    if old is None:
+                        files[name] = [size, mtime, gen, gen]
+                        self.removed.pop(rel_path, None)
+                        changed = True
+                    elif old[0] != size or old[1] != mtime:
+                        files[name] = [size, mtime, old[2], gen]
+                        changed = True
+                    else:
+                        files[name] = old
+
+                for name in old_files.keys() - files.keys():
+                    self.removed[self._join(rel_dir, name)] = gen
+                    changed = True
+
+                # racy timestamps get relisted next time
+                racy = scan_start - dir_mtime < _RACY_MTIME_NS
+                self.dirs[rel_dir] = {'mtime': None if racy else dir_mtime, 'subdirs': subdirs, 'files': files}
+                stack.extend(self._join(rel_dir, d) for d in subdirs)
+
+            # dirs that have disappeared entirely
+            for rel_dir in set(self.dirs) - seen_dirs:
+                for name in self.dirs[rel_dir]['files']:
+                    self.removed[self._join(rel_dir, name)] = gen
+                del self.dirs[rel_dir]
+                changed = True
+
+            if changed:
+                self.generation = gen
+            self._save()
+            return changed
+
+    @staticmethod
+    def _matches(name: str, extensions: Optional[List[str]]) -> bool:
+        """Checks if the file name ends with one of the given extensions"""
+        if extensions is None:
+            return True
+        lower_name = name.lower()
+        return any(lower_name.endswith(ext) for ext in extensions)
+
+    def files(self, extensions: Optional[List[str]] = None) -> List[str]:
+        """Lists every file in the manifest (as full paths)
+
+        Args:
+            extensions (Optional[List[str]]): Only include these extensions. Defaults to all.
+        """
+        return [
+            self._abs(self._join(rel_dir, name))
+            for rel_dir, entry in self.dirs.items()
+            for name in entry['files']
+            if self._matches(name, extensions)
+        ]
+
+    def songs(self) -> List[str]:
+        """Lists every song file in the manifest (as full paths)"""
+        return self.files(SONG_EXTENSIONS)
+
+    def tree(self) -> Dict[str, dict]:
+        """The cached listing: {full dir path: {'subdirs': [names], 'files': [names]}}"""
+        return {
+            self._abs(rel_dir): {'subdirs': list(entry['subdirs']), 'files': list(entry['files'])}
+            for rel_dir, entry in self.dirs.items()
+        }
+
+    def diff(self, consumer: str, extensions: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """What changed since the given consumer last called `mark_consumed`.
+        A consumer that has never consumed sees every file as added.
+
+        Args:
+            consumer (str): Name of the consumer
+            extensions (Optional[List[str]]): Only include these extensions. Defaults to all.
+
+        Returns:
+            Dict[str, List[str]]: {'added': [...], 'changed': [...], 'removed': [...]} full paths
+        """
+        since = self.consumers.get(consumer, 0)
+        result = {'added': [], 'changed': [], 'removed': []}
+
+        for rel_dir, entry in self.dirs.items():
+            for name, (_, _, added_gen, changed_gen) in entry['files'].items():
+                if not self._matches(name, extensions):
+                    continue
+                if added_gen > since:
+                    result['added'].append(self._abs(self._join(rel_dir, name)))
+                elif changed_gen > since:
+                    result['changed'].append(self._abs(self._join(rel_dir, name)))
+
+        if since > 0:
+            result['removed'] = [
+                self._abs(rel_path) for rel_path, removed_gen in self.removed.items()
+                if removed_gen > since and self._matches(rel_path, extensions)
+            ]
+        return result
+
+    def mark_consumed(self, consumer: str) -> None:
+        """Records that the given consumer has handled everything up to now"""
+        with self._lock:
+            self.consumers[consumer] = self.generation
+
+            # nobody needs tombstones older than the slowest consumer
+            oldest = min(self.consumers.values())
+            self.removed = {path: gen for path, gen in self.removed.items() if gen > oldest}
+            self._save()
+
+
+_scanners: Dict[str, MusicScanner] = {}
+_scanners_lock = threading.Lock()
+
+
+def get_music_scanner(music_dir: str, manifest_path: str = DEFAULT_MUSIC_MANIFEST_PATH) -> MusicScanner:
+    """Returns the process-wide scanner for the given Music directory"""
+    with _scanners_lock:
+        scanner = _scanners.get(str(music_dir))
+        if scanner is None or scanner.manifest_path != str(manifest_path):
+            scanner = MusicScanner(music_dir, manifest_path)
+            _scanners[str(music_dir)] = scanner
+        return scanner
+
+
+def scan_music_dir(music_dir: str) -> MusicScanner:
+    """Incrementally scans the given Music directory
+
+    Returns:
+        MusicScanner: The up to date scanner
+    """
+    scanner = get_music_scanner(music_dir)
+    scanner.scan()
+    return scanner
@@ -3,12 +3,13 @@ import re
 import glob
 import json
 import shutil
+import hashlib
 import sqlite3
 import pandas as pd
 import requests
 from time import sleep
-from pymongo import MongoClient, UpdateOne
-from typing import Optional, List
+from pymongo import MongoClient, UpdateOne, UpdateMany, DeleteMany
+from typing import Optional, List, Dict
 from datetime import datetime
 
 from .constants import *
@@ -16,13 +17,21 @@ from .constants import DEFAULT_DB_PATH
 from .creds_manager import get_credentials
 from .wrapped_helpers import (
     find_rockbox_device, fix_filenames_in_db, extract_song_path,
-    find_top_genres, find_top_artists, find_top_albums, find_top_songs,
-    list_dir_song_paths, extract_metadata_from_path, find_music_directory
+    extract_metadata_from_path, find_music_directory
 )
+from .fs_scanner import scan_music_dir
+from .tag_reader import get_tags_bulk, get_tag_cache
+from .tagcache import load_tagcache, tagcache_enabled
+from .track_index import TrackIndex, build_track_index
+from .stats_engine import get_stats_engine
+from .mongo_queries import aggregate, song_stats_pipeline
+from .plays_snapshot import update_plays_snapshot
 from .schema import (
     SQLITE_SONGS_TABLE, SQLITE_PLAYS_TABLE,
-    SQLITE_PLAYS_TIMESTAMP_INDEX, SQLITE_PLAYS_SONG_ARTIST_INDEX,
-    MONGO_SONGS_COLLECTION, MONGO_PLAYS_COLLECTION, MONGO_PLAYS_INDEXES
+    SQLITE_PLAYS_TIMESTAMP_INDEX, SQLITE_PLAYS_SONG_ARTIST_INDEX, SQLITE_SONGS_SORT_INDEXES,
+    SQLITE_PLAYS_CHANGES,
+    MONGO_SONGS_COLLECTION, MONGO_PLAYS_COLLECTION, MONGO_PLAYS_INDEXES,
+    MONGO_SONGS_INDEXES, MONGO_SONGS_SORT_INDEXES, MONGO_SONGS_SORT_COLLATION
 )
 
 # load .env (optional for development)
@@ -35,6 +44,58 @@ except ImportError:
 # TODO:
 # - display albums missing genre info
 
+def normalize_genres(genres: str) -> str:
+    """Maps each genre in a comma separated genre string through
+    `genre_mappings` and drops duplicates (e.g. hip-hop vs hip hop)
+
+    Args:
+        genres (str): e.g. 'hip-hop,rap,hip hop'
+
+    Returns:
+        str: The normalized genre string
+    """
+    if not genres:
+        return genres
+
+    # split, normalize, rejoin
+    genre_list = [g.strip() for g in genres.split(',')]
+    normalized_genres = [genre_mappings.get(g.lower(), g) for g in genre_list]
+
+    # remove duplicates
+    seen = set()
+    unique_genres = []
+    for g in normalized_genres:
+        if g.lower() not in seen:
+            seen.add(g.lower())
+            unique_genres.append(g)
+
+    return ','.join(unique_genres)
+
+
+def genre_mappings_hash() -> str:
+    """Hash of the current `genre_mappings` table"""
+    return hashlib.sha1(json.dumps(genre_mappings, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _load_genre_mapping_hashes() -> dict:
+    """Loads the {db: genre_mappings hash} each db was last normalized with"""
+    if not os.path.exists(GENRE_MAPPINGS_HASH_PATH):
+        return {}
+    try:
+        with open(GENRE_MAPPINGS_HASH_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Warning: could not read genre mapping hashes: {e}")
+        return {}
+
+
+def _save_genre_mapping_hashes(hashes: dict) -> None:
+    """Saves the {db: genre_mappings hash} each db was last normalized with"""
+    os.makedirs(os.path.dirname(GENRE_MAPPINGS_HASH_PATH), exist_ok=True)
+    with open(GENRE_MAPPINGS_HASH_PATH, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f)
+
+
 class LogAnalyser:
 
     def __init__(self, db_type: str = 'mongo', db_path: str = DEFAULT_DB_PATH):
@@ -57,6 +118,9 @@ class LogAnalyser:
         self.batch_entries = []
         self.genre_data = dict()
         self.seen_songs = set()
+        self.tagcache_tracks = dict()  # {'/Music/...' path: rockbox tagcache track}
+        self.track_index = TrackIndex()
+        self.path_renames = dict()  # {(path song, artist): (tag song, artist)}
 
         # load existing data from db
         raw_data = self._fetch_all_songs()
@@ -87,6 +151,14 @@ class LogAnalyser:
         self.plays_collection.create_index(MONGO_PLAYS_INDEXES[0])
         self.plays_collection.create_index(MONGO_PLAYS_INDEXES[1])
 
+        # index on songs for joining plays to their song
+        for index in MONGO_SONGS_INDEXES:
+            self.song_collection.create_index(index)
+
+        # indexes for paging through songs in each sort order
+        for index in MONGO_SONGS_SORT_INDEXES:
+            self.song_collection.create_index(index, collation=MONGO_SONGS_SORT_COLLATION)
+
 
     def _setup_local_db(self):
         """Setup SQLite local database"""
@@ -98,6 +170,10 @@ class LogAnalyser:
         self.cursor.execute(SQLITE_PLAYS_TABLE)
         self.cursor.execute(SQLITE_PLAYS_TIMESTAMP_INDEX)
         self.cursor.execute(SQLITE_PLAYS_SONG_ARTIST_INDEX)
+        for statement in SQLITE_PLAYS_CHANGES:
+            self.cursor.execute(statement)
+        for index in SQLITE_SONGS_SORT_INDEXES:
+            self.cursor.execute(index)
 
         self.conn.commit()
 
@@ -208,7 +284,24 @@ class LogAnalyser:
 
 
     def parse_track_info(self, path: str) -> tuple:
-        """Parses track info from the given path.
+        """Parses track info from the given path. Tracks still on the device
+        are looked up in the track index, anything else falls back to
+        guessing from the path.
+
+        Args:
+            path (str): a path in the iPod log
+
+        Returns:
+            tuple: (album, artist, song) found from the path
+        """
+        track = self.track_index.resolve(path)
+        if track:
+            return track['album'], track['artist'], track['song']
+        return self._parse_track_info_heuristics(path)
+
+
+    def _parse_track_info_heuristics(self, path: str) -> tuple:
+        """Guesses track info from the folder layout of the given path.
 
         Args:
             path (str): a path in the iPod log
@@ -313,6 +406,163 @@ class LogAnalyser:
         return album, artist, song
     
 
+    def _track_metadata_from_path(self, file_path: str) -> Optional[dict]:
+        """Builds a song's track index metadata for a file on the device.
+        Names come from the file's own tags when it has them; the path
+        heuristics are only used for untagged files.
+
+        Args:
+            file_path (str): full path to the song file
+
+        Returns:
+            Optional[dict]: song, artist, album, path, song_length_ms,
+                            tracknumber and genre, or None if the song can't be identified
+        """
+        tags = get_tag_cache().cached(file_path) or {}
+
+        if tags.get('title') and tags.get('artist'):
+            song, artist = tags['title'], tags['artist']
+            album = self.fix_explicit_label(tags['album']) if tags.get('album') else None
+            if not album:
+                # untagged album, the folder layout usually knows it
+                try:
+                    album = self._parse_track_info_heuristics(file_path.replace(os.sep, '/'))[0]
+                except ValueError:
+                    album = "Unknown Album"
+        else:
+            try:
+                album, artist, song = self._parse_track_info_heuristics(file_path.replace(os.sep, '/'))
+            except ValueError:
+                return None
+
+        return {
+            'song': song,
+            'artist': artist,
+            'album': album,
+            'path': extract_song_path(file_path.replace(os.sep, '/')),
+            'song_length_ms': tags.get('duration_ms'),
+            'tracknumber': tags.get('tracknumber'),
+            'genre': tags.get('genre')
+        }
+
+
+    def build_track_index(self, music_dir: Optional[str]) -> TrackIndex:
+        """Builds the path -> track index from the tag database (if loaded)
+        or the Music directory
+
+        Args:
+            music_dir (Optional[str]): path to the Music directory on iPod
+
+        Returns:
+            TrackIndex: The index
+        """
+        if self.tagcache_tracks:
+            tagcache_metadata = {path: self._tagcache_metadata(path) for path in self.tagcache_tracks}
+            return build_track_index([], self._track_metadata_from_path, tagcache_metadata)
+
+        song_paths = scan_music_dir(music_dir).songs() if music_dir else []
+        # read every file's tags up front (cached, in a worker pool) so the
+        # index gets its names from the tags rather than the path
+        get_tags_bulk(song_paths)
+        self.path_renames = self._path_name_renames(song_paths)
+        return build_track_index(song_paths, self._track_metadata_from_path)
+
+
+    def _path_name_renames(self, song_paths: List[str]) -> Dict[tuple, tuple]:
+        """Works out which songs were named from their path before names came
+        from file tags, and what they're called now
+
+        Args:
+            song_paths (List[str]): Song paths from the filesystem scan (tags already cached)
+
+        Returns:
+            Dict[tuple, tuple]: {(path song, artist): (tag song, artist)}
+        """
+        renames = {}
+        tag_names = set()
+        for song_path in song_paths:
+            tags = get_tag_cache().cached(song_path) or {}
+            if not (tags.get('title') and tags.get('artist')):
+                continue
+            new_name = (tags['title'], tags['artist'])
+            tag_names.add(new_name)
+            try:
+                _, artist, song = self._parse_track_info_heuristics(song_path.replace(os.sep, '/'))
+            except ValueError:
+                continue
+            if (song, artist) != new_name:
+                renames.setdefault((song, artist), set()).add(new_name)
+
+        # leave names that map to several songs, or are still another file's real name
+        return {
+            old_name: next(iter(new_names)) for old_name, new_names in renames.items()
+            if len(new_names) == 1 and old_name not in tag_names
+        }
+
+
+    def rename_path_named_songs(self):
+        """Moves songs (and their plays) still stored under the name guessed
+        from their path over to the name from their tags, merging into the
+        tag-named song if both exist. Nothing to do once they've all moved."""
+        renames = [(old, new) for old, new in self.path_renames.items()
+                   if f"{old[0]}:{old[1]}" in self.seen_songs]
+        if not renames:
+            return
+
+        if self.db_type == 'mongo':
+            song_writes = []
+            for (song, artist), (new_song, new_artist) in renames:
+                if f"{new_song}:{new_artist}" in self.seen_songs:
+                    song_writes.append(DeleteMany({'song': song, 'artist': artist}))
+                else:
+                    song_writes.append(UpdateMany({'song': song, 'artist': artist},
+                                                  {'$set': {'song': new_song, 'artist': new_artist}}))
+            self.song_collection.bulk_write(song_writes, ordered=False)
+            self.plays_collection.bulk_write([
+                UpdateMany({'song': song, 'artist': artist}, {'$set': {'song': new_song, 'artist': new_artist}})
+                for (song, artist), (new_song, new_artist) in renames
+            ], ordered=False)
+        else:
+            params = [(new[0], new[1], old[0], old[1]) for old, new in renames]
+            old_params = [old for old, _ in renames]
+            # rows left with the old name were duplicates of the tag-named one
+            self.cursor.executemany('UPDATE OR IGNORE songs SET song = ?, artist = ? WHERE song = ? AND artist = ?', params)
+            self.cursor.executemany('DELETE FROM songs WHERE song = ? AND artist = ?', old_params)
+            self.cursor.executemany('UPDATE OR IGNORE plays SET song = ?, artist = ? WHERE song = ? AND artist = ?', params)
+            self.cursor.executemany('DELETE FROM plays WHERE song = ? AND artist = ?', old_params)
+            self.conn.commit()
+
+        for (song, artist), (new_song, new_artist) in renames:
+            self.seen_songs.discard(f"{song}:{artist}")
+            self.seen_songs.add(f"{new_song}:{new_artist}")
+        print(f"Renamed {len(renames)} songs to the names in their tags")
+
+
+    def _tagcache_metadata(self, song_path: str) -> Optional[dict]:
+        """Gets a song's metadata from the rockbox tag database
+
+        Args:
+            song_path (str): Path starting from /Music/
+
+        Returns:
+            Optional[dict]: song, artist, album, path, song_length_ms and genre,
+                            or None if the track isn't in the tag database (or is untagged)
+        """
+        track = self.tagcache_tracks.get(song_path)
+        if not track or not track.get('title') or not track.get('artist'):
+            return None
+
+        return {
+            'song': track['title'],
+            'artist': track['artist'],
+            'album': self.fix_explicit_label(track['album']) if track.get('album') else "Unknown Album",
+            'path': song_path,
+            'song_length_ms': track.get('length') or None,
+            'tracknumber': track.get('tracknumber') or None,
+            'genre': track.get('genre')
+        }
+
+
     def fix_explicit_label(self, file: str) -> str:
         """Removes the 'Explicit' tag and re-adds it neatly to the
         given string. This is because sometimes (often) the rockbox
@@ -434,6 +684,9 @@ class LogAnalyser:
     def batch_add_to_db(self, entry: dict, final_add: bool = False) -> bool:
         """Adds song metadata to the songs table/collection"""
         if entry and entry != {}:
+            # normalize genres once, as the song goes in
+            if entry.get('genres'):
+                entry['genres'] = normalize_genres(entry['genres'])
             self.batch_entries.append(entry)
 
         if len(self.batch_entries) == BATCH_SIZE or final_add:
@@ -583,35 +836,9 @@ class LogAnalyser:
     def load_stats_from_db(self) -> pd.DataFrame:
         """Loads song statistics aggregated from plays table into a pandas DataFrame"""
         if self.db_type == 'mongo':
-            # aggregate from plays collection
-            pipeline = [
-                {'$group': {
-                    '_id': {'song': '$song', 'artist': '$artist'},
-                    'total_plays': {'$sum': 1},
-                    'total_elapsed_ms': {'$sum': '$elapsed_ms'}
-                }}
-            ]
-            play_stats = list(self.plays_collection.aggregate(pipeline))
-
-            # get song metadata
-            all_songs = list(self.song_collection.find({}, projection={'_id': 0}))
-            songs_metadata = {(s['song'], s['artist']): s for s in all_songs}
-
-            # combine stats with metadata
-            all_docs = []
-            for stat in play_stats:
-                song_key = (stat['_id']['song'], stat['_id']['artist'])
-                if song_key in songs_metadata:
-                    metadata = songs_metadata[song_key]
-                    all_docs.append({
-                        'song': stat['_id']['song'],
-                        'artist': stat['_id']['artist'],
-                        'album': metadata.get('album', ''),
-                        'genres': metadata.get('genres', ''),
-                        'total_plays': stat['total_plays'],
-                        'song_length_ms': metadata.get('song_length_ms', 0) or 0,
-                        'total_elapsed_ms': stat['total_elapsed_ms']
-                    })
+            # aggregate plays and join song metadata on the server
+            pipeline = song_stats_pipeline()
+            all_docs = list(aggregate(self.plays_collection, pipeline))
         else:
             # aggregate from plays table
             self.cursor.execute('''
@@ -647,36 +874,41 @@ class LogAnalyser:
         return pd.DataFrame(all_docs)
 
 
-    def merge_duplicate_genres(self) -> None:
+    def _genre_mappings_key(self) -> str:
+        """Identifies this db in the stored genre mapping hashes"""
+        return 'mongo' if self.db_type == 'mongo' else f"local:{os.path.abspath(self.db_path)}"
+
+
+    def merge_duplicate_genres(self, force: bool = False) -> None:
         """Merges any duplicate genres (e.g. hip-hop vs hip hop) in the db.
-        Fixes with a batch update if necessary."""
+        New songs are normalized as they're inserted, so this full pass only
+        runs when `genre_mappings` has changed since it last ran on this db.
+        Fixes with a batch update if necessary.
+
+        Args:
+            force (bool): Run even if `genre_mappings` hasn't changed. Defaults to False.
+        """
+        mappings_hash = genre_mappings_hash()
+        stored_hashes = _load_genre_mapping_hashes()
+        db_key = self._genre_mappings_key()
+        if not force and stored_hashes.get(db_key) == mappings_hash:
+            print("Genre mappings unchanged, skipping genre normalization")
+            return
 
         if self.db_type == 'mongo':
             bulk_operations = []
 
             # fetch all songs with genres
-            all_docs = self.song_collection.find({'genres': {'$exists': True, '$ne': ''}})
+            all_docs = self.song_collection.find({'genres': {'$exists': True, '$ne': ''}},
+                                                 projection={'genres': 1})
 
             for doc in all_docs:
                 genres = doc.get('genres', '')
                 if not genres:
                     continue
 
-                # split, normalize, rejoin
-                genre_list = [g.strip() for g in genres.split(',')]
-                normalized_genres = [genre_mappings.get(g.lower(), g) for g in genre_list]
-
-                # remove duplicates
-                seen = set()
-                unique_genres = []
-                for g in normalized_genres:
-                    if g.lower() not in seen:
-                        seen.add(g.lower())
-                        unique_genres.append(g)
-
-                new_genre_str = ','.join(unique_genres)
-
                 # only update if genres changed
+                new_genre_str = normalize_genres(genres)
                 if new_genre_str != genres:
                     bulk_operations.append(
                         UpdateOne(
@@ -702,21 +934,8 @@ class LogAnalyser:
                 if not genres:
                     continue
 
-                # split, normalize, rejoin
-                genre_list = [g.strip() for g in genres.split(',')]
-                normalized_genres = [genre_mappings.get(g.lower(), g) for g in genre_list]
-
-                # remove duplicates
-                seen = set()
-                unique_genres = []
-                for g in normalized_genres:
-                    if g.lower() not in seen:
-                        seen.add(g.lower())
-                        unique_genres.append(g)
-
-                new_genre_str = ','.join(unique_genres)
-
                 # only update if genres changed
+                new_genre_str = normalize_genres(genres)
                 if new_genre_str != genres:
                     updates.append((new_genre_str, song, artist))
 
@@ -730,6 +949,9 @@ class LogAnalyser:
             else:
                 print("No genre duplicates found")
 
+        stored_hashes[db_key] = mappings_hash
+        _save_genre_mapping_hashes(stored_hashes)
+
 
     def find_most_listened_to(self) -> Optional[tuple]:
         """Finds the song most listened to by total_plays_count.
@@ -737,59 +959,32 @@ class LogAnalyser:
         Returns:
             Optional[tuple]: (song, artist, album)
         """
-        # load stats from db
-        stats_df = self.load_stats_from_db()
-
-        if stats_df.empty:
-            return None
-
-        # filter out rows without total_plays
-        stats_df = stats_df[stats_df['total_plays'].notna()]
-
-        # sort by total_plays and get top song
-        top_song = stats_df.sort_values('total_plays', ascending=False).head(1)
-
-        if len(top_song) == 0:
-            return None
-
-        row = top_song.iloc[0]
-        return (row['song'], row['artist'], row['album'])
+        return get_stats_engine(self.db_type, self.db_path).snapshot().most_listened_song()
 
 
     def calc_total_play_time(self) -> int:
         """Calculates the total amount of time listened in minutes.
         An aggregation of total_elapsed_ms."""
-        # load stats from db
-        stats_df = self.load_stats_from_db()
-
-        if stats_df.empty:
-            return 0
-
-        # filter out rows without total_elapsed_ms
-        stats_df = stats_df[stats_df['total_elapsed_ms'].notna()]
-
-        # sum elapsed time + convert to minutes
-        total_ms = stats_df['total_elapsed_ms'].sum()
-        total_minutes = total_ms // 60000
-        return int(total_minutes)
+        return get_stats_engine(self.db_type, self.db_path).snapshot().total_listening_mins()
     
     
     def calc_all_stats(self) -> dict:
-        """Calculates all the relevant iPod Wrapped Stats"""
-        # calculations
-        top_genres = find_top_genres(self.db_type, self.db_path)
-        top_artists = find_top_artists(self.db_type, self.db_path, 5)
-        top_albums = find_top_albums(self.db_type, self.db_path)
-        top_songs = find_top_songs(self.db_type, self.db_path, 5)
+        """Calculates all the relevant iPod Wrapped Stats from a single
+        snapshot of the db"""
+        # the db has just been synced, start from fresh data
+        engine = get_stats_engine(self.db_type, self.db_path)
+        engine.invalidate()
+        snapshot = engine.snapshot()
 
         # setup
         stats = {
-            "top_genres": top_genres,
-            "top_artists": top_artists,
-            "top_albums": top_albums,
-            "top_songs": top_songs,
-            "most_listened_song": self.find_most_listened_to(),
-            "total_play_time_mins": self.calc_total_play_time()
+            "top_genres": snapshot.top_genres(),
+            "top_artists": snapshot.top_artists(5),
+            "top_albums": snapshot.top_albums(),
+            "top_songs": snapshot.top_songs(5),
+            "most_listened_song": snapshot.most_listened_song(),
+            "total_play_time_mins": snapshot.total_listening_mins(),
+            "listening_patterns": engine.listening_patterns()
         }
         return stats
 
@@ -800,20 +995,49 @@ class LogAnalyser:
         Args:
             music_dir (str): path to the Music directory on iPod
         """
-        print("Processing all songs from filesystem...")
-        all_song_paths = list_dir_song_paths(music_dir)
+        # the tag database already lists the whole library, no need to walk it
+        if self.tagcache_tracks:
+            self._process_tagcache_songs()
+            return
+
+        # only files added/changed since the last sync into this db
+        scanner = scan_music_dir(music_dir)
+        consumer = f"filesystem_songs:{self.db_type}:{self.db_path}"
+        if self.seen_songs:
+            diff = scanner.diff(consumer, SONG_EXTENSIONS)
+            song_paths = diff['added'] + diff['changed']
+            print(f"Processing {len(song_paths)} new/changed songs from filesystem "
+                  f"({len(diff['removed'])} removed)...")
+        else:
+            song_paths = scanner.songs()
+            print("Processing all songs from filesystem...")
         added_count = 0
 
-        for song_path in all_song_paths:
-            # grab metadata
-            metadata = extract_metadata_from_path(song_path)
+        # one pass over each file for tags + duration (cached, in a worker pool)
+        all_tags = get_tags_bulk(song_paths)
+        length_backfill = []  # [(song_length_ms, song, artist)] for songs already in the db
+
+        for song_path in song_paths:
+            tags = all_tags.get(song_path) or {}
+
+            # grab metadata (track index first, tags if the path doesn't fit)
+            metadata = self.track_index.resolve(song_path) or extract_metadata_from_path(song_path)
             if not metadata:
-                continue
+                if not (tags.get('title') and tags.get('artist') and tags.get('album')):
+                    continue
+                metadata = {
+                    'song': tags['title'],
+                    'artist': tags['artist'],
+                    'album': tags['album'],
+                    'path': extract_song_path(song_path)
+                }
 
             song_key = f"{metadata['song']}:{metadata['artist']}"
 
-            # skip if already seen in logs
+            # skip if already seen in logs (but fill in its length if we know it)
             if song_key in self.seen_songs:
+                if tags.get('duration_ms'):
+                    length_backfill.append((tags['duration_ms'], metadata['song'], metadata['artist']))
                 continue
 
             # find genre info based on album
@@ -822,6 +1046,10 @@ class LogAnalyser:
                 genres = self.genre_data[album_key]
             else:
                 genres = self.find_album_genres((metadata['artist'], metadata['album']))
+                # fall back to the file's own genre tag
+                tag_genre = (tags.get('genre') or '').lower().strip()
+                if not genres and tag_genre in all_genres:
+                    genres = tag_genre
                 self.genre_data[album_key] = genres
 
             # add to db
@@ -830,17 +1058,95 @@ class LogAnalyser:
                 "album": metadata['album'],
                 "artist": metadata['artist'],
                 "genres": genres,
-                "song_length_ms": None,  # no length info from filesystem
+                "song_length_ms": tags.get('duration_ms'),
                 "path": metadata['path']
             })
             self.seen_songs.add(song_key)
             added_count += 1
 
+        self._backfill_song_lengths(length_backfill)
+
         # add remaining batch
         self.batch_add_to_db({}, final_add=True)
+        scanner.mark_consumed(consumer)
         print(f"Added {added_count} songs from filesystem that weren't in playback.log")
 
 
+    def _process_tagcache_songs(self):
+        """Adds every song in the rockbox tag database that isn't in the db yet"""
+        print("Processing all songs from the Rockbox tag database...")
+        added_count = 0
+        length_backfill = []
+
+        for song_path, track in self.tagcache_tracks.items():
+            metadata = self._tagcache_metadata(song_path)
+            if not metadata:
+                # untagged, fall back to the path
+                metadata = extract_metadata_from_path(song_path)
+                if not metadata:
+                    continue
+                metadata['song_length_ms'] = track.get('length') or None
+                metadata['genre'] = track.get('genre')
+
+            song_key = f"{metadata['song']}:{metadata['artist']}"
+            if song_key in self.seen_songs:
+                if metadata['song_length_ms']:
+                    length_backfill.append((metadata['song_length_ms'], metadata['song'], metadata['artist']))
+                continue
+
+            # find genre info based on album
+            album_key = f"{metadata['album']}:{metadata['artist']}"
+            if album_key in self.genre_data:
+                genres = self.genre_data[album_key]
+            else:
+                genres = self.find_album_genres((metadata['artist'], metadata['album']))
+                tag_genre = (metadata['genre'] or '').lower().strip()
+                if not genres and tag_genre in all_genres:
+                    genres = tag_genre
+                self.genre_data[album_key] = genres
+
+            self.batch_add_to_db({
+                "song": metadata['song'],
+                "album": metadata['album'],
+                "artist": metadata['artist'],
+                "genres": genres,
+                "song_length_ms": metadata['song_length_ms'],
+                "path": metadata['path']
+            })
+            self.seen_songs.add(song_key)
+            added_count += 1
+
+        self._backfill_song_lengths(length_backfill)
+        self.batch_add_to_db({}, final_add=True)
+        print(f"Added {added_count} songs from the tag database that weren't in playback.log")
+
+
+    def _backfill_song_lengths(self, lengths: List[tuple]):
+        """Fills in song lengths that are missing from the db
+
+        Args:
+            lengths (List[tuple]): [(song_length_ms, song, artist)]
+        """
+        if not lengths:
+            return
+
+        try:
+            if self.db_type == 'mongo':
+                self.song_collection.bulk_write([
+                    UpdateOne({'song': song, 'artist': artist, 'song_length_ms': None},
+                              {'$set': {'song_length_ms': length}})
+                    for length, song, artist in lengths
+                ], ordered=False)
+            else:
+                self.cursor.executemany(
+                    'UPDATE songs SET song_length_ms = ? WHERE song = ? AND artist = ? AND song_length_ms IS NULL',
+                    lengths
+                )
+                self.conn.commit()
+        except Exception as e:
+            print(f"Failed to fill in song lengths: {e}")
+
+
     def close(self):
         """Close database connection (for SQLite)"""
         if self.db_type == 'local' and hasattr(self, 'conn'):
@@ -858,6 +1164,17 @@ class LogAnalyser:
         
         
         try:
+            # load rockbox's tag database (if it's the chosen metadata source)
+            if tagcache_enabled():
+                ipod_location = find_rockbox_device()
+                if ipod_location:
+                    self.tagcache_tracks = load_tagcache(os.path.join(ipod_location, '.rockbox'))
+
+            # index what's on the device so log lines resolve exactly
+            music_dir = find_music_directory()
+            self.track_index = self.build_track_index(music_dir)
+            self.rename_path_named_songs()
+
             # merge iPod playback.log with local storage copy
             local_log_path = os.path.join(STORAGE_DIR, 'playback.log')
 
@@ -909,7 +1226,6 @@ class LogAnalyser:
             self.add_plays_from_dataframe(self.log_df)
 
             # add songs from ipod fs not in logs
-            music_dir = find_music_directory()
             if music_dir:
                 self.process_filesystem_songs(music_dir)
             else:
@@ -921,6 +1237,10 @@ class LogAnalyser:
 
             # consolidate genre names
             self.merge_duplicate_genres()
+
+            # bring the columnar plays snapshot up to date
+            if self.db_type == 'local':
+                update_plays_snapshot(self.db_path)
             
             # run stats
             self.stats = self.calc_all_stats()
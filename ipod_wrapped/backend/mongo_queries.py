@@ -0,0 +1,199 @@
+import re
+from datetime import datetime
+from typing import Optional, List, Iterator
+
+from .constants import MONGO_AGGREGATE_BATCH_SIZE
+from .schema import MONGO_SONGS_COLLECTION, MONGO_PLAYS_COLLECTION
+
+# Aggregation pipelines that join songs + plays on the server, so only the
+# joined, trimmed documents come back instead of whole collections.
+
+
+def plays_date_filter(start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None) -> dict:
+    """Builds the plays `$match` filter for the given date range"""
+    plays_filter = {}
+    if start_date or end_date:
+        plays_filter['timestamp'] = {}
+        if start_date:
+            plays_filter['timestamp']['$gte'] = start_date
+        if end_date:
+            plays_filter['timestamp']['$lte'] = end_date
+    return plays_filter
+
+
+def song_filter_query(filters: Optional[dict], required_field: str = 'album') -> dict:
+    """Builds the songs `$match` filter for the `filters` dict the frontend passes in
+
+    Args:
+        filters (Optional[dict]): Supports 'album', 'artist', 'song' (exact) and
+                                  'genre' (case-insensitive, partial match)
+        required_field (str): Field (besides artist) that must be set. Defaults to 'album'.
+
+    Returns:
+        dict: The query
+    """
+    filters = filters or {}
+    song_filter = {required_field: {'$ne': None}, 'artist': {'$ne': None}}
+    for field in ('album', 'artist', 'song'):
+        if filters.get(field):
+            song_filter[field] = filters[field]
+    if filters.get('genre'):
+        song_filter['genres'] = {'$regex': re.escape(filters['genre']), '$options': 'i'}
+    return song_filter
+
+
+def song_stats_pipeline(start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None) -> List[dict]:
+    """Pipeline (run on plays) producing one doc per played song that has
+    metadata, with keys: song, artist, album, genres, total_plays,
+    song_length_ms, total_elapsed_ms
+    """
+    return [
+        {'$match': plays_date_filter(start_date, end_date)},
+        {'$group': {
+            '_id': {'song': '$song', 'artist': '$artist'},
+            'total_plays': {'$sum': 1},
+            'total_elapsed_ms': {'$sum': '$elapsed_ms'}
+        }},
+        # equality on song is an index lookup (song/artist index, mongo 5.0+),
+        # the artist check then only sees songs with that title
+        {'$lookup': {
+            'from': MONGO_SONGS_COLLECTION,
+            'localField': '_id.song',
+            'foreignField': 'song',
+            'let': {'artist': '$_id.artist'},
+            'pipeline': [
+                {'$match': {'$expr': {'$eq': ['$artist', '$$artist']}}},
+                {'$limit': 1},
+                {'$project': {'_id': 0, 'album': 1, 'genres': 1, 'song_length_ms': 1}}
+            ],
+            'as': 'metadata'
+        }},
+        # only songs we have metadata for
+        {'$unwind': '$metadata'},
+        {'$project': {
+            '_id': 0,
+            'song': '$_id.song',
+            'artist': '$_id.artist',
+            'album': {'$ifNull': ['$metadata.album', '']},
+            'genres': {'$ifNull': ['$metadata.genres', '']},
+            'total_plays': 1,
+            'song_length_ms': {'$ifNull': ['$metadata.song_length_ms', 0]},
+            'total_elapsed_ms': 1
+        }}
+    ]
+
+
+def listening_hours_pipeline(start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None) -> List[dict]:
+    """Pipeline (run on plays) summing listening time per hour of each day,
+    in time order, with keys: day ('YYYY-MM-DD'), hour, elapsed_ms
+    """
+    return [
+        {'$match': plays_date_filter(start_date, end_date)},
+        {'$group': {
+            '_id': {
+                'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$timestamp'}},
+                'hour': {'$hour': '$timestamp'}
+            },
+            'elapsed_ms': {'$sum': '$elapsed_ms'}
+        }},
+        {'$sort': {'_id.day': 1, '_id.hour': 1}},
+        {'$project': {'_id': 0, 'day': '$_id.day', 'hour': '$_id.hour', 'elapsed_ms': 1}}
+    ]
+
+
+def songs_with_plays_pipeline(song_filter: dict,
+                              start_date: Optional[datetime] = None,
+                              end_date: Optional[datetime] = None) -> List[dict]:
+    """Pipeline (run on songs) producing one doc per matching song, including
+    songs with no plays, with keys: song, artist, album, genres,
+    song_length_ms, total_plays, total_elapsed_ms
+
+    Args:
+        song_filter (dict): Songs `$match` filter (see `song_filter_query`)
+        start_date (Optional[datetime]): Count plays from this date onwards
+        end_date (Optional[datetime]): Count plays up to this date
+
+    Returns:
+        List[dict]: The pipeline
+    """
+    play_conditions = [
+        {'$eq': ['$song', '$$song']},
+        {'$eq': ['$artist', '$$artist']}
+    ]
+    if start_date:
+        play_conditions.append({'$gte': ['$timestamp', start_date]})
+    if end_date:
+        play_conditions.append({'$lte': ['$timestamp', end_date]})
+
+    return [
+        {'$match': song_filter},
+        {'$project': {'_id': 0, 'song': 1, 'artist': 1, 'album': 1,
+                      'genres': 1, 'song_length_ms': 1}},
+        # sum this song's plays on the server (uses the song/artist index)
+        {'$lookup': {
+            'from': MONGO_PLAYS_COLLECTION,
+            'let': {'song': '$song', 'artist': '$artist'},
+            'pipeline': [
+                {'$match': {'$expr': {'$and': play_conditions}}},
+                {'$group': {
+                    '_id': None,
+                    'total_plays': {'$sum': 1},
+                    'total_elapsed_ms': {'$sum': '$elapsed_ms'}
+                }}
+            ],
+            'as': 'stats'
+        }},
+        {'$project': {
+            'song': 1,
+            'artist': 1,
+            'album': 1,
+            'genres': {'$ifNull': ['$genres', '']},
+            'song_length_ms': {'$ifNull': ['$song_length_ms', 0]},
+            'total_plays': {'$ifNull': [{'$arrayElemAt': ['$stats.total_plays', 0]}, 0]},
+            'total_elapsed_ms': {'$ifNull': [{'$arrayElemAt': ['$stats.total_elapsed_ms', 0]}, 0]}
+        }}
+    ]
+
+
+def plays_for_songs_pipeline(songs: List[tuple],
+                             start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None) -> List[dict]:
+    """Pipeline (run on plays) summing the plays of just the given songs, with
+    keys: song, artist, total_plays, total_elapsed_ms
+
+    Args:
+        songs (List[tuple]): (song, artist) pairs
+        start_date (Optional[datetime]): Count plays from this date onwards
+        end_date (Optional[datetime]): Count plays up to this date
+
+    Returns:
+        List[dict]: The pipeline
+    """
+    plays_filter = plays_date_filter(start_date, end_date)
+    plays_filter['$or'] = [{'song': song, 'artist': artist} for song, artist in songs]
+    return [
+        {'$match': plays_filter},
+        {'$group': {
+            '_id': {'song': '$song', 'artist': '$artist'},
+            'total_plays': {'$sum': 1},
+            'total_elapsed_ms': {'$sum': '$elapsed_ms'}
+        }},
+        {'$project': {
+            '_id': 0,
+            'song': '$_id.song',
+            'artist': '$_id.artist',
+            'total_plays': 1,
+            'total_elapsed_ms': 1
+        }}
+    ]
+
+
+def aggregate(collection, pipeline: List[dict]) -> Iterator[dict]:
+    """Runs a pipeline sized for large libraries - big $group/$sort stages
+    can spill to disk, and results are streamed back in large batches
+    """
+    return collection.aggregate(pipeline, allowDiskUse=True,
+                                batchSize=MONGO_AGGREGATE_BATCH_SIZE)
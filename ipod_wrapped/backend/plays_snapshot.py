@@ -0,0 +1,312 @@
+import os
+import json
+import shutil
+import hashlib
+import sqlite3
+import threading
+from typing import Optional, Dict
+
+from .constants import DEFAULT_PLAYS_SNAPSHOT_DIR, DEFAULT_ALBUM_ART_DIR
+from .analytics import PlaysAnalytics, analytics_available, np
+from .schema import SQLITE_PLAYS_CHANGES
+
+# On-disk columnar copy of a local db's plays table, so analytics start
+# without decoding every play out of sqlite. Each column is a .npy file
+# (in time order) opened with mmap, so pages are shared between processes.
+# Syncs only decode the plays added since the last update; the columns
+# are then written as a new generation and swapped in by rewriting the
+# metadata, so a reader never sees a half-written file.
+
+SNAPSHOT_VERSION = 3
+COLUMNS = {
+    'timestamps': 'int64',  # epoch microseconds
+    'song_ids': 'int32',    # index into songs.json
+    'elapsed_ms': 'int32'
+}
+
+
+def _ensure_plays_changes(conn: sqlite3.Connection) -> None:
+    """Adds the plays change counter to dbs created before it existed"""
+    try:
+        for statement in SQLITE_PLAYS_CHANGES:
+            conn.execute(statement)
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Failed to create plays change counter: {e}")
+
+
+def _plays_changes(cursor: sqlite3.Cursor) -> Optional[int]:
+    """How many times existing plays were updated/deleted (None if not tracked)"""
+    try:
+        cursor.execute('SELECT counter FROM plays_changes WHERE id = 0')
+    except sqlite3.Error:
+        return None
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _db_version(db_path: str) -> Optional[list]:
+    """Cheap fingerprint of the db file"""
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class PlaysSnapshot:
+    """The columnar plays snapshot of one local db"""
+
+    def __init__(self, db_path: str, snapshot_dir: str = DEFAULT_PLAYS_SNAPSHOT_DIR):
+        """Locate the snapshot for the given db
+
+        Args:
+            db_path (str): Path to local db file
+            snapshot_dir (str): Where snapshots are stored. Defaults to DEFAULT_PLAYS_SNAPSHOT_DIR.
+        """
+        self.db_path = os.path.abspath(str(db_path))
+        db_key = hashlib.sha1(self.db_path.encode('utf-8')).hexdigest()[:16]
+        self.dir = os.path.join(str(snapshot_dir), db_key)
+        self.meta_path = os.path.join(self.dir, 'meta.json')
+
+    def _generation_dir(self, generation: int) -> str:
+        return os.path.join(self.dir, f'gen_{generation}')
+
+    def _column_path(self, generation: int, name: str) -> str:
+        return os.path.join(self._generation_dir(generation), f'{name}.npy')
+
+    def _songs_path(self, generation: int) -> str:
+        return os.path.join(self._generation_dir(generation), 'songs.json')
+
+    def _load_meta(self) -> Optional[dict]:
+        """Loads the snapshot's metadata, None if there's no usable snapshot"""
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != SNAPSHOT_VERSION or meta.get('db_path') != self.db_path:
+            return None
+        return meta
+
+    def _load_columns(self, meta: dict) -> Optional[Dict[str, 'np.ndarray']]:
+        """Memory-maps every column, None if any is missing or incomplete"""
+        try:
+            columns = {name: np.load(self._column_path(meta['generation'], name), mmap_mode='r')
+                       for name in COLUMNS}
+        except (OSError, ValueError):
+            return None
+        if any(len(column) != meta['count'] for column in columns.values()):
+            return None
+        return columns
+
+    def _load_songs(self, meta: dict) -> Optional[list]:
+        """Loads the songs the snapshot's song ids point into"""
+        try:
+            with open(self._songs_path(meta['generation']), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: str, data) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def update(self) -> bool:
+        """Brings the snapshot up to date with the db. Only plays added since
+        the last update are read; it's rebuilt from scratch if songs were
+        renamed/removed or old plays changed (without a change counter, e.g. a
+        read-only db, every update is a rebuild).
+
+        Returns:
+            bool: True if the snapshot is usable
+        """
+        if not analytics_available() or not os.path.exists(self.db_path):
+            return False
+
+        os.makedirs(self.dir, exist_ok=True)
+        meta = self._load_meta()
+        columns = self._load_columns(meta) if meta else None
+        old_songs = self._load_songs(meta) if columns is not None else None
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        if _plays_changes(cursor) is None:
+            _ensure_plays_changes(conn)
+        try:
+            # one read transaction, so songs + plays are read from the same state
+            cursor.execute('BEGIN')
+            cursor.execute('SELECT rowid, song, artist, album, genres, song_length_ms FROM songs ORDER BY rowid')
+            songs = [list(row) for row in cursor.fetchall()]
+
+            full_rebuild = old_songs is None or not self._can_extend(cursor, meta, old_songs, songs)
+            last_play_id = 0 if full_rebuild else meta['last_play_id']
+
+            # only decode the plays we don't have yet
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM plays')
+            max_play_id = cursor.fetchone()[0]
+            plays_changes = _plays_changes(cursor)
+            cursor.execute('''
+                SELECT s.rowid, p.timestamp, p.elapsed_ms
+                FROM plays p
+                JOIN songs s ON s.song = p.song AND s.artist = p.artist
+                WHERE p.id > ? AND p.id <= ?
+                ORDER BY p.id
+            ''', (last_play_id, max_play_id))
+            new_rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        generation = meta['generation'] if meta else 0
+        count = meta['count'] if not full_rebuild else 0
+        if full_rebuild or new_rows:
+            rowids = np.array([song[0] for song in songs], dtype=np.int64)
+            new_columns = {
+                'timestamps': np.array([row[1] for row in new_rows], dtype='datetime64[us]').astype(np.int64),
+                'song_ids': np.searchsorted(rowids, np.array([row[0] for row in new_rows], dtype=np.int64)),
+                'elapsed_ms': np.array([row[2] for row in new_rows], dtype=np.int32)
+            }
+            if full_rebuild:
+                merged = new_columns
+            else:
+                merged = {name: np.concatenate([columns[name], new_columns[name]]) for name in COLUMNS}
+
+            # plays usually arrive in time order, only sort when they didn't
+            if not np.all(np.diff(merged['timestamps']) >= 0):
+                order = np.argsort(merged['timestamps'], kind='stable')
+                merged = {name: column[order] for name, column in merged.items()}
+
+            # columns go into a new generation dir, so readers (in any
+            # process) keep their maps of the old one
+            generation += 1
+            os.makedirs(self._generation_dir(generation), exist_ok=True)
+            for name, column in merged.items():
+                np.save(self._column_path(generation, name), np.ascontiguousarray(column, dtype=COLUMNS[name]))
+            count = len(merged['timestamps'])
+            print(f"{'Rebuilt' if full_rebuild else 'Updated'} plays snapshot "
+                  f"({len(new_rows)} new plays, {count} total)")
+
+        # song metadata (genres, album fixes, ...) may have changed either way
+        self._write_json(self._songs_path(generation), songs)
+        self._write_json(self.meta_path, {
+            'version': SNAPSHOT_VERSION,
+            'db_path': self.db_path,
+            'db_version': _db_version(self.db_path),
+            'generation': generation,
+            'count': count,
+            'last_play_id': max_play_id,
+            'plays_changes': plays_changes
+        })
+
+        # drop old generations (ones still mapped on windows go next time)
+        columns = None
+        for entry in os.listdir(self.dir):
+            if entry.startswith('gen_') and entry != f'gen_{generation}':
+                shutil.rmtree(os.path.join(self.dir, entry), ignore_errors=True)
+        return True
+
+    def _can_extend(self, cursor: sqlite3.Cursor, meta: dict, old_songs: list, songs: list) -> bool:
+        """Whether the existing columns are still valid, so new plays can just be appended"""
+        # song ids are positions in the (rowid ordered) songs list, every
+        # old song must still be in its place
+        if len(songs) < len(old_songs):
+            return False
+        for old, new in zip(old_songs, songs):
+            if old[:3] != new[:3]:
+                return False
+
+        # plays removed or edited (renamed, retimed, ...) since the last update
+        # (counted by triggers, so the old plays never have to be read)
+        plays_changes = _plays_changes(cursor)
+        if plays_changes is None or plays_changes != meta['plays_changes']:
+            return False
+
+        # older plays that only now match a (new) song
+        if len(songs) > len(old_songs):
+            cursor.execute('''
+                SELECT COUNT(*)
+                FROM plays p
+                JOIN songs s ON s.song = p.song AND s.artist = p.artist
+                WHERE p.id <= ? AND s.rowid > ?
+            ''', (meta['last_play_id'], old_songs[-1][0] if old_songs else 0))
+            if cursor.fetchone()[0]:
+                return False
+        return True
+
+    def is_current(self) -> bool:
+        """Whether the snapshot was last updated against the db as it is now"""
+        meta = self._load_meta()
+        return meta is not None and meta.get('db_version') == _db_version(self.db_path)
+
+    def open(self, album_art_storage: str = DEFAULT_ALBUM_ART_DIR) -> Optional[PlaysAnalytics]:
+        """Opens the snapshot (memory-mapped) as an analytics engine
+
+        Args:
+            album_art_storage (str): The location of album covers. Defaults to DEFAULT_ALBUM_ART_DIR.
+
+        Returns:
+            Optional[PlaysAnalytics]: The engine, None if there's no usable snapshot
+        """
+        if not analytics_available():
+            return None
+        meta = self._load_meta()
+        columns = self._load_columns(meta) if meta else None
+        songs = self._load_songs(meta) if columns is not None else None
+        if songs is None:
+            return None
+
+        return PlaysAnalytics(
+            [song[1:5] for song in songs],
+            columns['song_ids'], columns['timestamps'], columns['elapsed_ms'],
+            album_art_storage,
+            song_lengths=[song[5] or 0 for song in songs],
+            presorted=True
+        )
+
+
+def update_plays_snapshot(db_path: str) -> bool:
+    """Updates the plays snapshot of a local db (call after each sync)
+
+    Args:
+        db_path (str): Path to local db file
+
+    Returns:
+        bool: True if the snapshot is usable
+    """
+    return PlaysSnapshot(db_path).update()
+
+
+_analytics: Dict[str, tuple] = {}  # {db_path: (db version, engine)}
+_analytics_lock = threading.Lock()
+
+
+def get_plays_analytics(db_type: str, db_path: str) -> Optional[PlaysAnalytics]:
+    """Returns an analytics engine over the db's plays snapshot, updating the
+    snapshot first if the db has changed. Reused until the db changes.
+
+    Args:
+        db_type (str): Type of database ('mongo' or 'local')
+        db_path (str): Path to local db file
+
+    Returns:
+        Optional[PlaysAnalytics]: The engine, None for mongo or if numpy isn't installed
+    """
+    if db_type != 'local' or not db_path or not analytics_available():
+        return None
+
+    key = os.path.abspath(str(db_path))
+    version = _db_version(key)
+    with _analytics_lock:
+        cached = _analytics.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        snapshot = PlaysSnapshot(key)
+        if not snapshot.is_current() and not snapshot.update():
+            return None
+        analytics = snapshot.open()
+        if analytics is not None:
+            _analytics[key] = (version, analytics)
+        return analytics
@@ -0,0 +1,59 @@
+from bisect import bisect_left
+from typing import Optional, Iterable
+
+# shorter prefixes than this are too ambiguous to call a truncation
+MIN_TRUNCATED_LENGTH = 8
+
+
+class PrefixIndex:
+    """Sorted names + bisect, for expanding truncated names. A name matches
+    if it's an exact match, or the only name starting with it."""
+
+    def __init__(self, names: Iterable[str], min_length: int = MIN_TRUNCATED_LENGTH):
+        """Build the index
+
+        Args:
+            names (Iterable[str]): The full names
+            min_length (int): Shortest prefix that will be expanded.
+                              Defaults to MIN_TRUNCATED_LENGTH.
+        """
+        self.names = sorted(set(names))
+        self.min_length = min_length
+
+    def match(self, prefix: str) -> Optional[str]:
+        """Finds the full name for the given (possibly truncated) name
+
+        Args:
+            prefix (str): The name to look up
+
+        Returns:
+            Optional[str]: The full name, None if there's no unambiguous match
+        """
+        if not prefix:
+            return None
+
+        i = bisect_left(self.names, prefix)
+        if i < len(self.names) and self.names[i] == prefix:
+            return prefix
+
+        # truncation often leaves a dangling space
+        prefix = prefix.rstrip()
+        if len(prefix) < self.min_length:
+            return None
+
+        # names starting with the prefix sit together straight after it
+        i = bisect_left(self.names, prefix)
+        if i >= len(self.names) or not self.names[i].startswith(prefix):
+            return None
+        if self.names[i] == prefix:
+            return prefix
+        if i + 1 < len(self.names) and self.names[i + 1].startswith(prefix):
+            return None
+        return self.names[i]
+
+    def __contains__(self, name: str) -> bool:
+        i = bisect_left(self.names, name)
+        return i < len(self.names) and self.names[i] == name
+
+    def __len__(self) -> int:
+        return len(self.names)
@@ -35,6 +35,25 @@ SQLITE_PLAYS_SONG_ARTIST_INDEX = '''
     ON plays(song, artist)
 '''
 
+# counts updates/deletes of existing plays (inserts only add new ids), so the
+# plays snapshot can tell if old plays changed without reading them
+SQLITE_PLAYS_CHANGES = [
+    'CREATE TABLE IF NOT EXISTS plays_changes (id INTEGER PRIMARY KEY CHECK (id = 0), counter INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO plays_changes (id, counter) VALUES (0, 0)',
+    '''CREATE TRIGGER IF NOT EXISTS plays_changed_on_update AFTER UPDATE ON plays
+       BEGIN UPDATE plays_changes SET counter = counter + 1 WHERE id = 0; END''',
+    '''CREATE TRIGGER IF NOT EXISTS plays_changed_on_delete AFTER DELETE ON plays
+       BEGIN UPDATE plays_changes SET counter = counter + 1 WHERE id = 0; END'''
+]
+
+# songs table sort orders (each index also orders by rowid, the keyset tiebreaker)
+SQLITE_SONGS_SORT_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_songs_song_sort ON songs(song COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_songs_artist_sort ON songs(artist COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_songs_album_sort ON songs(album COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_songs_length_sort ON songs(IFNULL(song_length_ms, 0))'
+]
+
 SQLITE_UI_PLAYS_TABLE = '''
     CREATE TABLE IF NOT EXISTS ui_plays (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -64,3 +83,16 @@ MONGO_PLAYS_INDEXES = [
     ('timestamp', 1),  # ascending index on timestamp
     [('song', 1), ('artist', 1)]  # compound index
 ]
+# song/artist lookups (plays -> songs joins), default collation so plain
+# equality matches can use it
+MONGO_SONGS_INDEXES = [
+    [('song', 1), ('artist', 1)]
+]
+# case-insensitive, like the sqlite sort indexes
+MONGO_SONGS_SORT_COLLATION = {'locale': 'en', 'strength': 2}
+MONGO_SONGS_SORT_INDEXES = [
+    [('song', 1), ('_id', 1)],
+    [('artist', 1), ('_id', 1)],
+    [('album', 1), ('_id', 1)],
+    [('song_length_ms', 1), ('_id', 1)]
+]
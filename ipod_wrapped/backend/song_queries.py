@@ -0,0 +1,226 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, List, Tuple
+from pymongo import MongoClient
+
+from .constants import DEFAULT_ALBUM_ART_DIR, SONGS_PAGE_SIZE
+from .schema import SQLITE_SONGS_SORT_INDEXES, MONGO_SONGS_SORT_COLLATION
+from .mongo_queries import aggregate, plays_for_songs_pipeline, song_filter_query
+
+# Keyset pagination over the songs table: each page continues after the
+# (sort key, row id) of the last song of the previous page, so every page
+# is an index range scan no matter how deep into the library it is.
+
+# sort name -> (column, case-insensitive)
+SORT_COLUMNS = {
+    'title': ('song', True),
+    'artist': ('artist', True),
+    'album': ('album', True),
+    'duration': ('song_length_ms', False)
+}
+
+_indexed_dbs = set()
+_indexed_dbs_lock = threading.Lock()
+
+
+def _sqlite_sort_expr(sort: str, table: str) -> str:
+    """The expression songs are ordered by (matches SQLITE_SONGS_SORT_INDEXES)"""
+    column, nocase = SORT_COLUMNS[sort]
+    if nocase:
+        return f'{table}.{column} COLLATE NOCASE'
+    return f'IFNULL({table}.{column}, 0)'
+
+
+def _ensure_sort_indexes(db_path: str) -> None:
+    """Adds the sort indexes to dbs created before they existed (once per db)"""
+    key = os.path.abspath(str(db_path))
+    with _indexed_dbs_lock:
+        if key in _indexed_dbs:
+            return
+        conn = sqlite3.connect(db_path)
+        try:
+            for index in SQLITE_SONGS_SORT_INDEXES:
+                conn.execute(index)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Failed to create songs sort indexes: {e}")
+        finally:
+            conn.close()
+        _indexed_dbs.add(key)
+
+
+def _sqlite_songs_page(db_path: str, sort: str, descending: bool, after: Optional[tuple],
+                       limit: int, filters: dict, start_date: Optional[datetime],
+                       end_date: Optional[datetime]) -> List[tuple]:
+    """Runs the page query
+
+    Returns:
+        List[tuple]: (sort key, rowid, song, artist, album, genres, song_length_ms,
+                      total_plays, total_elapsed_ms) per song
+    """
+    _ensure_sort_indexes(db_path)
+    sort_expr = _sqlite_sort_expr(sort, 's')
+    direction = 'DESC' if descending else 'ASC'
+
+    # build SQL filter query
+    conditions = ['s.song IS NOT NULL', 's.artist IS NOT NULL']
+    params = []
+    for field, column in (('album', 'album'), ('artist', 'artist'), ('song', 'song')):
+        if filters.get(field):
+            conditions.append(f's.{column} = ?')
+            params.append(filters[field])
+    if filters.get('genre'):
+        conditions.append("instr(LOWER(IFNULL(s.genres, '')), ?) > 0")
+        params.append(filters['genre'].lower())
+
+    # continue after the last song of the previous page
+    # (the plain comparison lets sqlite seek the index, the row value breaks ties)
+    if after is not None:
+        conditions.append(f"{sort_expr} {'<=' if descending else '>='} ?")
+        conditions.append(f"({sort_expr}, s.rowid) {'<' if descending else '>'} (?, ?)")
+        params.extend([after[0], *after])
+
+    # date filter for plays
+    date_filter = ''
+    date_params = []
+    if start_date:
+        date_filter += ' AND p.timestamp >= ?'
+        date_params.append(start_date.isoformat())
+    if end_date:
+        date_filter += ' AND p.timestamp <= ?'
+        date_params.append(end_date.isoformat())
+
+    # pick the page first, then only sum the plays of its songs
+    query = f'''
+        WITH page AS (
+            SELECT {sort_expr} AS sort_key, s.rowid AS id, s.song, s.artist,
+                   s.album, s.genres, s.song_length_ms
+            FROM songs s
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {sort_expr} {direction}, s.rowid {direction}
+            LIMIT ?
+        )
+        SELECT page.sort_key, page.id, page.song, page.artist, page.album,
+               page.genres, page.song_length_ms,
+               COUNT(p.id) AS total_plays,
+               COALESCE(SUM(p.elapsed_ms), 0) AS total_elapsed_ms
+        FROM page
+        LEFT JOIN plays p ON p.song = page.song AND p.artist = page.artist{date_filter}
+        GROUP BY page.id
+        ORDER BY page.sort_key{' COLLATE NOCASE' if SORT_COLUMNS[sort][1] else ''} {direction},
+                 page.id {direction}
+    '''
+
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(query, params + [limit] + date_params).fetchall()
+    finally:
+        conn.close()
+
+
+def _mongo_songs_page(sort: str, descending: bool, after: Optional[tuple], limit: int,
+                      filters: dict, start_date: Optional[datetime],
+                      end_date: Optional[datetime]) -> List[tuple]:
+    """Runs the page query (see `_sqlite_songs_page`, the row id is the doc's _id)"""
+    client = MongoClient(os.getenv('MONGODB_URI'))
+    db = client.song_db
+    column = SORT_COLUMNS[sort][0]
+    order = -1 if descending else 1
+
+    song_filter = song_filter_query(filters, required_field='song')
+    if after is not None:
+        value, last_id = after
+        id_op = '$lt' if descending else '$gt'
+        if value is None:
+            # nulls sort first, and don't compare to numbers
+            keyset = [{column: None, '_id': {id_op: last_id}}]
+            if not descending:
+                keyset.append({column: {'$ne': None}})
+        else:
+            keyset = [{column: {id_op: value}}, {column: value, '_id': {id_op: last_id}}]
+        song_filter = {'$and': [song_filter, {'$or': keyset}]}
+
+    docs = list(db.songs.find(
+        song_filter,
+        projection={'song': 1, 'artist': 1, 'album': 1, 'genres': 1, 'song_length_ms': 1},
+        sort=[(column, order), ('_id', order)],
+        limit=limit,
+        collation=MONGO_SONGS_SORT_COLLATION
+    ))
+    if not docs:
+        return []
+
+    # only sum the plays of this page's songs
+    stats = {}
+    pipeline = plays_for_songs_pipeline([(d['song'], d['artist']) for d in docs], start_date, end_date)
+    for doc in aggregate(db.plays, pipeline):
+        stats[(doc['song'], doc['artist'])] = (doc['total_plays'], doc['total_elapsed_ms'])
+
+    rows = []
+    for d in docs:
+        total_plays, total_elapsed_ms = stats.get((d['song'], d['artist']), (0, 0))
+        rows.append((d.get(column), d['_id'], d['song'], d['artist'], d.get('album'),
+                     d.get('genres'), d.get('song_length_ms'), total_plays, total_elapsed_ms))
+    return rows
+
+
+def grab_songs_page(db_type: str, db_path: str, album_art_dir: str = DEFAULT_ALBUM_ART_DIR,
+                    sort: str = 'title', descending: bool = False,
+                    after: Optional[Tuple] = None, limit: int = SONGS_PAGE_SIZE,
+                    filters: Optional[dict] = None,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> dict:
+    """Grabs one page of songs (same song dicts as `grab_all_songs`), in the
+    given sort order
+
+    Args:
+        db_type (str): The type of db ('mongo' or 'local')
+        db_path (str): The location of the db if 'local'
+        album_art_dir (str): The location of album covers. Defaults to DEFAULT_ALBUM_ART_DIR.
+        sort (str): 'title', 'artist', 'album' or 'duration'. Defaults to 'title'.
+        descending (bool): Sort descending. Defaults to False.
+        after (Optional[Tuple]): The previous page's 'next', None for the first page
+        limit (int): Max songs in the page. Defaults to SONGS_PAGE_SIZE.
+        filters (Optional[dict]): Same as `grab_all_songs`
+        start_date (Optional[datetime]): Count plays from this date onwards
+        end_date (Optional[datetime]): Count plays up to this date
+
+    Returns:
+        dict: {
+            "songs": List[dict],    # see `grab_all_songs`
+            "next": Optional[tuple] # pass as `after` for the next page, None if this was the last
+        }
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown songs sort: {sort}")
+    if db_type not in ('mongo', 'local') or (db_type == 'local' and not db_path):
+        return {'songs': [], 'next': None}
+
+    filters = filters or {}
+    if db_type == 'mongo':
+        rows = _mongo_songs_page(sort, descending, after, limit, filters, start_date, end_date)
+    else:
+        rows = _sqlite_songs_page(db_path, sort, descending, after, limit, filters, start_date, end_date)
+
+    from .wrapped_helpers import find_album_art
+
+    songs = []
+    for _, _, song, artist, album, genres, length_ms, total_plays, total_elapsed_ms in rows:
+        songs.append({
+            'title': song,
+            'artist': artist,
+            'album': album,
+            'duration': length_ms or 0,
+            'metadata': {
+                'genres': genres or '',
+                'art_path': find_album_art(album, album_art_dir, artist),
+                'total_elapsed_ms': total_elapsed_ms,
+                'total_plays': total_plays,
+            }
+        })
+
+    # a full page means there may be more
+    next_key = (rows[-1][0], rows[-1][1]) if len(rows) == limit else None
+    return {'songs': songs, 'next': next_key}
@@ -0,0 +1,262 @@
+import os
+import heapq
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+
+from pymongo import MongoClient
+
+from .constants import DEFAULT_ALBUM_ART_DIR
+from .analytics import analytics_available, compute_listening_patterns, np
+from .mongo_queries import aggregate, listening_hours_pipeline
+from .plays_snapshot import get_plays_analytics
+
+# how many date ranges each engine keeps snapshots for
+MAX_CACHED_SNAPSHOTS = 8
+
+
+def _top_n(totals: Dict, n: int) -> List:
+    """Top n keys by total, ties broken by key (heap based, no full sort)"""
+    return heapq.nsmallest(n, totals, key=lambda k: (-totals[k][0], k))
+
+
+class StatsSnapshot:
+    """Every stats category, computed in one pass over one load of
+    `load_stats_from_db`. Album art is only looked up for the winners:
+    each group is represented by the album of its most listened to song."""
+
+    def __init__(self, stats: List[dict], album_art_storage: str = DEFAULT_ALBUM_ART_DIR):
+        """Aggregate the given stats
+
+        Args:
+            stats (List[dict]): Rows from `load_stats_from_db`
+            album_art_storage (str): The location of album covers. Defaults to DEFAULT_ALBUM_ART_DIR.
+        """
+        self.stats = stats
+        self.album_art_storage = album_art_storage
+        self.total_elapsed_ms = 0
+
+        # {key: [total_elapsed_ms, representative (elapsed, album, artist)]}
+        self.genres: Dict[str, list] = {}
+        self.artists: Dict[str, list] = {}
+        self.albums: Dict[Tuple[str, str], list] = {}
+        # {(song, artist): [total_plays, album]}
+        self.songs: Dict[Tuple[str, str], list] = {}
+
+        for row in stats:
+            song = row.get('song', '')
+            artist = row.get('artist', '')
+            album = row.get('album', '')
+            elapsed = row.get('total_elapsed_ms', 0) or 0
+            self.total_elapsed_ms += elapsed
+            representative = (elapsed, album, artist)
+
+            if artist:
+                self._add(self.artists, artist, elapsed, representative)
+            if album and artist:
+                self._add(self.albums, (album, artist), elapsed, representative)
+            for genre in (row.get('genres', '') or '').split(','):
+                genre = genre.strip()
+                if genre:
+                    self._add(self.genres, genre, elapsed, representative)
+
+            self.songs[(song, artist)] = [row.get('total_plays', 0) or 0, album]
+
+    @staticmethod
+    def _add(totals: dict, key, elapsed: int, representative: tuple) -> None:
+        """Adds a song's listening time to a group, tracking its most listened to song"""
+        entry = totals.get(key)
+        if entry is None:
+            totals[key] = [elapsed, representative]
+            return
+
+        entry[0] += elapsed
+        best = entry[1]
+        if representative[0] > best[0] or (representative[0] == best[0] and representative[1:] < best[1:]):
+            entry[1] = representative
+
+    def _art(self, album: str, artist: str) -> str:
+        """Looks up the art for one album"""
+        # avoid a circular import
+        from .wrapped_helpers import find_album_art
+        return find_album_art(album, self.album_art_storage, artist=artist)
+
+    def top_genres(self, n: int = 3) -> List[dict]:
+        """See `find_top_genres`"""
+        return [
+            {'genre': genre, 'total_elapsed_mins': self.genres[genre][0] // 60000,
+             'album_art': self._art(*self.genres[genre][1][1:])}
+            for genre in _top_n(self.genres, n)
+        ]
+
+    def top_artists(self, n: int = 3) -> List[dict]:
+        """See `find_top_artists`"""
+        return [
+            {'artist': artist, 'total_elapsed_mins': self.artists[artist][0] // 60000,
+             'album_art': self._art(*self.artists[artist][1][1:])}
+            for artist in _top_n(self.artists, n)
+        ]
+
+    def top_albums(self, n: int = 3) -> List[dict]:
+        """See `find_top_albums`"""
+        return [
+            {'album': album, 'artist': artist, 'total_elapsed_mins': self.albums[(album, artist)][0] // 60000,
+             'album_art': self._art(album, artist)}
+            for album, artist in _top_n(self.albums, n)
+        ]
+
+    def top_songs(self, n: int = 3) -> List[dict]:
+        """See `find_top_songs`"""
+        return [
+            {'song': song, 'artist': artist, 'total_plays': self.songs[(song, artist)][0],
+             'album_art': self._art(self.songs[(song, artist)][1], artist)}
+            for song, artist in _top_n(self.songs, n)
+        ]
+
+    def most_listened_song(self) -> Optional[tuple]:
+        """The song with the most plays
+
+        Returns:
+            Optional[tuple]: (song, artist, album)
+        """
+        top = _top_n(self.songs, 1)
+        if not top:
+            return None
+        song, artist = top[0]
+        return (song, artist, self.songs[(song, artist)][1])
+
+    def total_listening_mins(self) -> int:
+        """See `get_total_listening_time`"""
+        return self.total_elapsed_ms // 60000
+
+
+class StatsEngine:
+    """Hands out `StatsSnapshot`s per date range, loading each range from
+    the db once. Local snapshots are dropped when the db file changes;
+    call `invalidate` after writing to a mongo db."""
+
+    def __init__(self, db_type: str, db_path: str, album_art_storage: str = DEFAULT_ALBUM_ART_DIR):
+        """Create an engine for the given db
+
+        Args:
+            db_type (str): Type of database ('mongo' or 'local')
+            db_path (str): Path to local db file
+            album_art_storage (str): The location of album covers. Defaults to DEFAULT_ALBUM_ART_DIR.
+        """
+        self.db_type = db_type
+        self.db_path = db_path
+        self.album_art_storage = album_art_storage
+        self._snapshots = OrderedDict()  # {(start_date, end_date): (db version, snapshot)}
+        self._mongo_patterns = OrderedDict()  # {(start_date, end_date): patterns}
+        self._lock = threading.Lock()
+
+    def _db_version(self) -> Optional[tuple]:
+        """Cheap fingerprint of the local db file (None for mongo)"""
+        if self.db_type == 'mongo':
+            return None
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def snapshot(self, start_date: Optional[datetime] = None,
+                 end_date: Optional[datetime] = None) -> StatsSnapshot:
+        """Gets the stats snapshot for the given date range
+
+        Args:
+            start_date (Optional[datetime]): Filter plays from this date onwards
+            end_date (Optional[datetime]): Filter plays up to this date
+
+        Returns:
+            StatsSnapshot: The snapshot
+        """
+        key = (start_date, end_date)
+        version = self._db_version()
+        with self._lock:
+            cached = self._snapshots.get(key)
+            if cached and cached[0] == version:
+                self._snapshots.move_to_end(key)
+                return cached[1]
+
+        # local dbs read from the memory-mapped plays snapshot when possible
+        analytics = get_plays_analytics(self.db_type, self.db_path)
+        if analytics is not None:
+            stats = analytics.stats_rows(start_date, end_date)
+        else:
+            # avoid a circular import
+            from .wrapped_helpers import load_stats_from_db
+            stats = load_stats_from_db(self.db_type, self.db_path, start_date, end_date)
+        snapshot = StatsSnapshot(stats, self.album_art_storage)
+
+        with self._lock:
+            self._snapshots[key] = (version, snapshot)
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > MAX_CACHED_SNAPSHOTS:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def listening_patterns(self, start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None) -> Optional[dict]:
+        """Gets the listening patterns (see `PlaysAnalytics.listening_patterns`)
+        for the given date range
+
+        Args:
+            start_date (Optional[datetime]): Filter plays from this date onwards
+            end_date (Optional[datetime]): Filter plays up to this date
+
+        Returns:
+            Optional[dict]: The patterns, None if numpy isn't installed
+        """
+        if self.db_type == 'mongo':
+            return self._mongo_listening_patterns(start_date, end_date)
+
+        analytics = get_plays_analytics(self.db_type, self.db_path)
+        if analytics is None:
+            return None
+        return analytics.listening_patterns(start_date, end_date)
+
+    def _mongo_listening_patterns(self, start_date: Optional[datetime],
+                                  end_date: Optional[datetime]) -> Optional[dict]:
+        """Listening patterns from plays summed per hour on the server
+        (cached per date range until invalidated)"""
+        if not analytics_available():
+            return None
+
+        key = (start_date, end_date)
+        with self._lock:
+            if key in self._mongo_patterns:
+                self._mongo_patterns.move_to_end(key)
+                return self._mongo_patterns[key]
+
+        db = MongoClient(os.getenv('MONGODB_URI')).song_db
+        hours = list(aggregate(db.plays, listening_hours_pipeline(start_date, end_date)))
+        timestamps = np.array([f"{h['day']}T{h['hour']:02d}" for h in hours], dtype='datetime64[us]')
+        elapsed = np.array([h['elapsed_ms'] or 0 for h in hours], dtype=np.int64)
+        patterns = compute_listening_patterns(timestamps.astype(np.int64), elapsed)
+
+        with self._lock:
+            self._mongo_patterns[key] = patterns
+            while len(self._mongo_patterns) > MAX_CACHED_SNAPSHOTS:
+                self._mongo_patterns.popitem(last=False)
+        return patterns
+
+    def invalidate(self) -> None:
+        """Drops every cached snapshot"""
+        with self._lock:
+            self._snapshots.clear()
+            self._mongo_patterns.clear()
+
+
+_engines: Dict[tuple, StatsEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_stats_engine(db_type: str, db_path: str) -> StatsEngine:
+    """Returns the process-wide stats engine for the given db"""
+    key = (db_type, str(db_path))
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = StatsEngine(db_type, db_path)
+        return _engines[key]
@@ -0,0 +1,224 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import Optional, List, Tuple
+from pymongo import MongoClient
+
+from .constants import DEFAULT_ALBUM_ART_DIR
+from .mongo_queries import aggregate, song_stats_pipeline
+
+# Top-N stats computed inside the db, so only the N winning rows come back.
+# These mirror `StatsSnapshot` exactly: groups are ordered by total listening
+# time (ties by name), and each group is represented by the album of its most
+# listened to song (ties by album, then artist).
+
+CATEGORIES = ('genres', 'artists', 'albums', 'songs')
+
+# characters python's str.strip() would remove from a genre name
+_SQL_WHITESPACE = "' ' || char(9) || char(10) || char(13)"
+
+
+def _sqlite_song_stats(start_date: Optional[datetime], end_date: Optional[datetime]) -> Tuple[str, list]:
+    """Builds the per-song stats CTE (same rows as `load_stats_from_db`)"""
+    date_conditions = []
+    params = []
+    if start_date:
+        date_conditions.append('p.timestamp >= ?')
+        params.append(start_date.isoformat())
+    if end_date:
+        date_conditions.append('p.timestamp <= ?')
+        params.append(end_date.isoformat())
+
+    date_filter = ''
+    if date_conditions:
+        date_filter = ' AND ' + ' AND '.join(date_conditions)
+
+    cte = f'''
+        song_stats AS (
+            SELECT
+                s.song,
+                s.artist,
+                COALESCE(s.album, '') AS album,
+                COALESCE(s.genres, '') AS genres,
+                COUNT(p.id) AS total_plays,
+                COALESCE(SUM(p.elapsed_ms), 0) AS total_elapsed_ms
+            FROM songs s
+            LEFT JOIN plays p ON s.song = p.song AND s.artist = p.artist{date_filter}
+            GROUP BY s.song, s.artist
+        )
+    '''
+    return cte, params
+
+
+def _sqlite_top_n(db_path: str, category: str, n: int,
+                  start_date: Optional[datetime], end_date: Optional[datetime]) -> List[tuple]:
+    """Runs the top-N query for the given category
+
+    Returns:
+        List[tuple]: (name, total, album, artist) for groups, (song, artist, album, total_plays) for songs
+    """
+    song_stats, params = _sqlite_song_stats(start_date, end_date)
+
+    if category == 'songs':
+        query = f'''
+            WITH {song_stats}
+            SELECT song, artist, album, total_plays FROM song_stats
+            ORDER BY total_plays DESC, song, artist
+            LIMIT ?
+        '''
+    elif category == 'albums':
+        query = f'''
+            WITH {song_stats}
+            SELECT album, SUM(total_elapsed_ms) AS total, album, artist FROM song_stats
+            WHERE album != '' AND artist != ''
+            GROUP BY album, artist
+            ORDER BY total DESC, album, artist
+            LIMIT ?
+        '''
+    else:
+        if category == 'genres':
+            # split the comma separated genres into one row each
+            group_rows = f'''
+                genre_split(album, artist, total_elapsed_ms, name, rest) AS (
+                    SELECT album, artist, total_elapsed_ms, '', genres || ',' FROM song_stats WHERE genres != ''
+                    UNION ALL
+                    SELECT album, artist, total_elapsed_ms,
+                           trim(substr(rest, 1, instr(rest, ',') - 1), {_SQL_WHITESPACE}),
+                           substr(rest, instr(rest, ',') + 1)
+                    FROM genre_split WHERE rest != ''
+                ),
+                group_rows AS (
+                    SELECT name, album, artist, total_elapsed_ms FROM genre_split WHERE name != ''
+                )
+            '''
+        else:
+            group_rows = '''
+                group_rows AS (
+                    SELECT artist AS name, album, artist, total_elapsed_ms FROM song_stats WHERE artist != ''
+                )
+            '''
+
+        query = f'''
+            WITH RECURSIVE {song_stats}, {group_rows},
+            ranked AS (
+                SELECT
+                    name, album, artist,
+                    SUM(total_elapsed_ms) OVER (PARTITION BY name) AS total,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY name ORDER BY total_elapsed_ms DESC, album, artist
+                    ) AS rank_in_group
+                FROM group_rows
+            )
+            SELECT name, total, album, artist FROM ranked
+            WHERE rank_in_group = 1
+            ORDER BY total DESC, name
+            LIMIT ?
+        '''
+
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(query, params + [n]).fetchall()
+    finally:
+        conn.close()
+
+
+def _mongo_top_n(category: str, n: int,
+                 start_date: Optional[datetime], end_date: Optional[datetime]) -> List[tuple]:
+    """Runs the top-N pipeline for the given category (see `_sqlite_top_n`)"""
+    client = MongoClient(os.getenv('MONGODB_URI'))
+    plays_collection = client.song_db.plays
+    pipeline = song_stats_pipeline(start_date, end_date)
+
+    if category == 'songs':
+        pipeline += [
+            {'$sort': {'total_plays': -1, 'song': 1, 'artist': 1}},
+            {'$limit': n}
+        ]
+        return [(d['song'], d['artist'], d['album'], d['total_plays'])
+                for d in aggregate(plays_collection, pipeline)]
+
+    if category == 'albums':
+        pipeline += [
+            {'$match': {'album': {'$nin': ['', None]}, 'artist': {'$nin': ['', None]}}},
+            {'$group': {
+                '_id': {'album': '$album', 'artist': '$artist'},
+                'total': {'$sum': '$total_elapsed_ms'}
+            }},
+            {'$sort': {'total': -1, '_id.album': 1, '_id.artist': 1}},
+            {'$limit': n}
+        ]
+        return [(d['_id']['album'], d['total'], d['_id']['album'], d['_id']['artist'])
+                for d in aggregate(plays_collection, pipeline)]
+
+    if category == 'genres':
+        pipeline += [
+            {'$set': {'name': {'$split': ['$genres', ',']}}},
+            {'$unwind': '$name'},
+            {'$set': {'name': {'$trim': {'input': '$name'}}}},
+            {'$match': {'name': {'$ne': ''}}}
+        ]
+    else:
+        pipeline += [
+            {'$match': {'artist': {'$nin': ['', None]}}},
+            {'$set': {'name': '$artist'}}
+        ]
+
+    pipeline += [
+        # most listened song first, so $first picks each group's representative
+        {'$sort': {'total_elapsed_ms': -1, 'album': 1, 'artist': 1}},
+        {'$group': {
+            '_id': '$name',
+            'total': {'$sum': '$total_elapsed_ms'},
+            'album': {'$first': '$album'},
+            'artist': {'$first': '$artist'}
+        }},
+        {'$sort': {'total': -1, '_id': 1}},
+        {'$limit': n}
+    ]
+    return [(d['_id'], d['total'], d['album'], d['artist'])
+            for d in aggregate(plays_collection, pipeline)]
+
+
+def query_top_n(db_type: str, db_path: str, category: str, n: int = 3,
+                start_date: Optional[datetime] = None,
+                end_date: Optional[datetime] = None,
+                album_art_storage: str = DEFAULT_ALBUM_ART_DIR) -> List[dict]:
+    """Finds the top n of a category inside the db. Returns exactly what
+    the matching `find_top_*` / `StatsSnapshot.top_*` would.
+
+    Args:
+        db_type (str): Type of database ('mongo' or 'local')
+        db_path (str): Path to local db file
+        category (str): One of 'genres', 'artists', 'albums' or 'songs'
+        n (int): The number of results. Defaults to 3.
+        start_date (Optional[datetime]): Filter plays from this date onwards
+        end_date (Optional[datetime]): Filter plays up to this date
+        album_art_storage (str): The location of album covers. Defaults to DEFAULT_ALBUM_ART_DIR.
+
+    Returns:
+        List[dict]: See `find_top_genres`, `find_top_artists`, `find_top_albums`, `find_top_songs`
+    """
+    if category not in CATEGORIES:
+        raise ValueError(f"Unknown stats category: {category}")
+
+    if db_type == 'mongo':
+        rows = _mongo_top_n(category, n, start_date, end_date)
+    else:
+        rows = _sqlite_top_n(db_path, category, n, start_date, end_date)
+
+    # art for the winners only
+    from .wrapped_helpers import find_album_art
+
+    if category == 'songs':
+        return [{'song': song, 'artist': artist, 'total_plays': total_plays,
+                 'album_art': find_album_art(album, album_art_storage, artist=artist)}
+                for song, artist, album, total_plays in rows]
+    if category == 'albums':
+        return [{'album': album, 'artist': artist, 'total_elapsed_mins': total // 60000,
+                 'album_art': find_album_art(album, album_art_storage, artist=artist)}
+                for _, total, album, artist in rows]
+
+    name_key = 'genre' if category == 'genres' else 'artist'
+    return [{name_key: name, 'total_elapsed_mins': total // 60000,
+             'album_art': find_album_art(album, album_art_storage, artist=artist)}
+            for name, total, album, artist in rows]
@@ -0,0 +1,265 @@
+import os
+import json
+import base64
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List
+
+from mutagen import File
+from mutagen.flac import Picture as FLACPicture, error as FLACError
+from mutagen.mp4 import MP4Cover
+
+from .constants import DEFAULT_TAG_CACHE_PATH
+
+# tag names per format: (id3, vorbis/ape, mp4)
+_TAG_KEYS = {
+    'album': ('TALB', 'album', '\xa9alb'),
+    'artist': ('TPE1', 'artist', '\xa9ART'),
+    'title': ('TIT2', 'title', '\xa9nam'),
+    'tracknumber': ('TRCK', 'tracknumber', 'trkn'),
+    'genre': ('TCON', 'genre', '\xa9gen'),
+}
+
+# embedded art kept in memory between stages (e.g. song processing -> cover
+# extraction) so files don't have to be reopened. bounded by total bytes
+MAX_ART_MEMO_BYTES = 64 * 1024 * 1024
+
+
+def _first_text(tags, keys: tuple) -> Optional[str]:
+    """Gets the first value of the first tag present out of the given keys"""
+    for key in keys:
+        try:
+            value = tags.get(key)
+        except (KeyError, ValueError, TypeError):
+            value = None
+        if value is None:
+            # vorbis comments are case insensitive, APEv2 keys are usually capitalised
+            try:
+                value = tags.get(key.upper()) or tags.get(key.title())
+            except (KeyError, ValueError, TypeError):
+                value = None
+        if value is None:
+            continue
+
+        # id3 frames keep their values in .text
+        value = getattr(value, 'text', value)
+        if isinstance(value, list):
+            if not value:
+                continue
+            value = value[0]
+        # mp4 track numbers are (track, total) tuples
+        if isinstance(value, tuple):
+            value = value[0]
+        return str(value).strip()
+    return None
+
+
+def _parse_track_number(value: Optional[str]) -> Optional[int]:
+    """'3/12' -> 3"""
+    if not value:
+        return None
+    try:
+        return int(str(value).split('/')[0])
+    except ValueError:
+        return None
+
+
+def _extract_art(file_obj, file_ext: str) -> tuple:
+    """Gets the first embedded picture as (bytes, mime), or (None, None)"""
+    tags = getattr(file_obj, 'tags', None)
+
+    if file_ext == '.flac' and getattr(file_obj, 'pictures', None):
+        pic = file_obj.pictures[0]
+        return pic.data, pic.mime
+
+    if not tags:
+        return None, None
+
+    if file_ext == '.mp3':
+        for key in tags.keys():
+            if key.startswith('APIC:'):
+                return tags[key].data, tags[key].mime
+
+    elif file_ext in ('.opus', '.ogg'):
+        b64_pictures = tags.get('METADATA_BLOCK_PICTURE') or tags.get('metadata_block_picture') or []
+        if isinstance(b64_pictures, str):
+            b64_pictures = [b64_pictures]
+        for b64_data in b64_pictures:
+            try:
+                pic = FLACPicture(base64.b64decode(b64_data))
+                return pic.data, pic.mime
+            except (TypeError, ValueError, base64.binascii.Error, FLACError):
+                continue
+
+    elif file_ext == '.m4a':
+        covr = tags.get('covr')
+        if covr and isinstance(covr[0], MP4Cover):
+            mime = "image/jpeg" if covr[0].imageformat == MP4Cover.FORMAT_JPEG else "image/png"
+            return bytes(covr[0]), mime
+
+    return None, None
+
+
+def read_tags(file_path: str) -> Optional[dict]:
+    """Opens the given audio file once and reads everything we need from it
+
+    Args:
+        file_path (str): Full path to the song file
+
+    Returns:
+        Optional[dict]: {'album', 'artist', 'title', 'tracknumber', 'genre',
+                         'duration_ms', 'art', 'art_mime'}, or None if unreadable
+    """
+    try:
+        file_obj = File(file_path, easy=False)
+    except Exception as e:
+        print(f"Error reading metadata for {file_path}: {e}")
+        return None
+    if file_obj is None:
+        return None
+
+    tags = getattr(file_obj, 'tags', None) or {}
+    result = {name: _first_text(tags, keys) for name, keys in _TAG_KEYS.items()}
+    result['tracknumber'] = _parse_track_number(result['tracknumber'])
+
+    length = getattr(getattr(file_obj, 'info', None), 'length', None)
+    result['duration_ms'] = int(length * 1000) if length else None
+
+    try:
+        art, art_mime = _extract_art(file_obj, os.path.splitext(file_path)[1].lower())
+    except Exception as e:
+        print(f"Error extracting art from {file_path}: {e}")
+        art, art_mime = None, None
+    result['art'] = art
+    result['art_mime'] = art_mime
+    return result
+
+
+class TagCache:
+    """Caches `read_tags` results by (path, size, mtime). Text tags and
+    durations are persisted to disk; art is only kept in a bounded in-memory
+    memo, since it's only needed once per album."""
+
+    def __init__(self, cache_path: str = DEFAULT_TAG_CACHE_PATH):
+        self.cache_path = str(cache_path)
+        self.entries: Dict[str, list] = {}  # {path: [size, mtime, tags (no art), has_art]}
+        self._art = OrderedDict()           # {(path, size, mtime): (bytes, mime)}
+        self._art_bytes = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"Warning: could not read tag cache: {e}")
+
+    def _remember_art(self, key: tuple, art: bytes, mime: str) -> None:
+        """Adds art to the in-memory memo, evicting the oldest if over budget"""
+        if len(art) > MAX_ART_MEMO_BYTES:
+            return
+        self._art[key] = (art, mime)
+        self._art_bytes += len(art)
+        while self._art_bytes > MAX_ART_MEMO_BYTES:
+            _, (old_art, _) = self._art.popitem(last=False)
+            self._art_bytes -= len(old_art)
+
+    def get(self, file_path: str, want_art: bool = False) -> Optional[dict]:
+        """Gets the tags for the given file, reading it only if it has changed
+
+        Args:
+            file_path (str): Full path to the song file
+            want_art (bool): Also return the embedded art. Defaults to False.
+
+        Returns:
+            Optional[dict]: See `read_tags`. 'art' is only filled in if `want_art`.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        key = (file_path, stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            cached = self.entries.get(file_path)
+            if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                tags = dict(cached[2])
+                if not want_art or not cached[3]:
+                    tags['art'], tags['art_mime'] = None, None
+                    return tags
+                if key in self._art:
+                    tags['art'], tags['art_mime'] = self._art.pop(key)
+                    self._art_bytes -= len(tags['art'])
+                    return tags
+
+        tags = read_tags(file_path)
+        if tags is None:
+            return None
+
+        with self._lock:
+            stored = {k: v for k, v in tags.items() if k not in ('art', 'art_mime')}
+            self.entries[file_path] = [stat.st_size, stat.st_mtime_ns, stored, tags['art'] is not None]
+            self._dirty = True
+            if tags['art'] is not None and not want_art:
+                self._remember_art(key, tags['art'], tags['art_mime'])
+        if not want_art:
+            tags['art'], tags['art_mime'] = None, None
+        return tags
+
+    def cached(self, file_path: str) -> Optional[dict]:
+        """Gets the last tags read for the given file without touching the
+        file (may be stale if it changed since)"""
+        cached = self.entries.get(file_path)
+        return dict(cached[2]) if cached else None
+
+    def get_many(self, file_paths: List[str], max_workers: Optional[int] = None) -> Dict[str, dict]:
+        """Reads the tags for many files in a worker pool
+
+        Args:
+            file_paths (List[str]): Full paths to the song files
+            max_workers (Optional[int]): Pool size. Defaults to ThreadPoolExecutor's default.
+
+        Returns:
+            Dict[str, dict]: {path: tags} for every readable file (without art)
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = dict(zip(file_paths, pool.map(self.get, file_paths)))
+        self.save()
+        return {path: tags for path, tags in results.items() if tags is not None}
+
+    def save(self) -> None:
+        """Writes the cache to disk (if anything changed)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+
+
+_tag_cache: Optional[TagCache] = None
+_tag_cache_lock = threading.Lock()
+
+
+def get_tag_cache() -> TagCache:
+    """Returns the process-wide tag cache"""
+    global _tag_cache
+    with _tag_cache_lock:
+        if _tag_cache is None:
+            _tag_cache = TagCache()
+        return _tag_cache
+
+
+def get_tags(file_path: str, want_art: bool = False) -> Optional[dict]:
+    """Cached `read_tags` (see `TagCache.get`)"""
+    return get_tag_cache().get(file_path, want_art)
+
+
+def get_tags_bulk(file_paths: List[str], max_workers: Optional[int] = None) -> Dict[str, dict]:
+    """Cached `read_tags` for many files in a worker pool (see `TagCache.get_many`)"""
+    return get_tag_cache().get_many(file_paths, max_workers)
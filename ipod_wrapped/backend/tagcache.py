@@ -0,0 +1,215 @@
+import os
+import mmap
+import struct
+from typing import Optional, List, Dict
+
+from .constants import METADATA_SOURCE_ENV_VAR
+
+# Reader for Rockbox's tag database (.rockbox/database_*.tcd).
+#
+# database_idx.tcd is the master index:
+#   header: magic, datasize, entry_count, serial, commitid, dirty (int32 each)
+#   then entry_count entries of one int32 per tag + an int32 flag. Which tags
+#   (and in what order) depends on the format version in the magic's low byte.
+#   String tags hold an offset into database_<tag>.tcd, numeric tags hold the value.
+# database_<n>.tcd (one per string tag):
+#   header: magic, datasize, entry_count (int32 each)
+#   then entries of tag_length, idx_id (int32) + tag_length bytes of NUL-terminated data
+
+TAGCACHE_MAGIC_MASK = 0xFFFFFF00
+TAGCACHE_MAGIC = 0x54434800  # 'TCH' + format version byte
+MASTER_HEADER_SIZE = 24
+TAGFILE_HEADER_SIZE = 12
+FLAG_DELETED = 0x0001
+
+# tag order in the index entries (see rockbox apps/tagcache.h)
+TAG_NAMES = [
+    'artist', 'album', 'genre', 'title', 'filename', 'composer', 'comment',
+    'albumartist', 'grouping', 'year', 'discnumber', 'tracknumber', 'bitrate',
+    'length', 'playcount', 'rating', 'playtime', 'lastplayed', 'commitid',
+    'mtime', 'lastelapsed', 'lastoffset'
+]
+# later versions added the canonical artist (a string tag) after tracknumber
+TAG_NAMES_CANONICAL_ARTIST = TAG_NAMES[:12] + ['canonicalartist'] + TAG_NAMES[12:]
+
+# {format version: tag order}. unknown versions are skipped rather than guessed
+TAG_LAYOUTS = {
+    0x0d: TAG_NAMES,
+    0x0e: TAG_NAMES,
+    0x0f: TAG_NAMES_CANONICAL_ARTIST,
+    0x10: TAG_NAMES_CANONICAL_ARTIST,
+}
+# tags stored in database_<tag>.tcd, the rest are numbers
+STRING_TAGS = {
+    'artist', 'album', 'genre', 'title', 'filename', 'composer', 'comment',
+    'albumartist', 'grouping', 'canonicalartist'
+}
+UNTAGGED = '<Untagged>'
+
+
+def _detect_byte_order(header: bytes) -> Optional[str]:
+    """Works out the byte order from the magic number ('<' / '>' or None)"""
+    for byte_order in ('<', '>'):
+        magic, = struct.unpack_from(f'{byte_order}i', header)
+        if magic & TAGCACHE_MAGIC_MASK == TAGCACHE_MAGIC:
+            return byte_order
+    return None
+
+
+class TagcacheReader:
+    """Bulk reader for a Rockbox tag database. The index is read in one
+    sequential pass, and string files are memory mapped."""
+
+    def __init__(self, rockbox_dir: str):
+        """Open the tag database in the given '.rockbox' directory
+
+        Args:
+            rockbox_dir (str): Location of the '.rockbox' directory
+        """
+        self.rockbox_dir = str(rockbox_dir)
+        self.byte_order = '<'
+        self._string_maps: Dict[int, Optional[mmap.mmap]] = {}
+        self._string_cache: Dict[tuple, Optional[str]] = {}  # {(tag, offset): value}
+        self._files = []
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.rockbox_dir, name)
+
+    def exists(self) -> bool:
+        """Checks if there's a tag database to read"""
+        return os.path.exists(self._path('database_idx.tcd'))
+
+    def _open_map(self, path: str) -> Optional[mmap.mmap]:
+        """Maps the given file read-only (None if missing/empty)"""
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        f = open(path, 'rb')
+        self._files.append(f)
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _string_map(self, tag: int) -> Optional[mmap.mmap]:
+        """Gets the mapped string file for the given tag"""
+        if tag not in self._string_maps:
+            self._string_maps[tag] = self._open_map(self._path(f'database_{tag}.tcd'))
+        return self._string_maps[tag]
+
+    def _read_string(self, tag: int, offset: int) -> Optional[str]:
+        """Reads the string stored at the given offset of a tag file"""
+        key = (tag, offset)
+        if key in self._string_cache:
+            return self._string_cache[key]
+
+        value = None
+        data = self._string_map(tag)
+        if data is not None and TAGFILE_HEADER_SIZE <= offset <= len(data) - 8:
+            tag_length, _ = struct.unpack_from(f'{self.byte_order}ii', data, offset)
+            start = offset + 8
+            raw = data[start:start + max(tag_length, 0)]
+            value = raw.split(b'\0', 1)[0].decode('utf-8', errors='replace')
+            if value == UNTAGGED:
+                value = None
+
+        self._string_cache[key] = value
+        return value
+
+    def read_all(self) -> List[dict]:
+        """Reads every (non-deleted) track in the database
+
+        Returns:
+            List[dict]: One dict per track, keyed by the names in TAG_NAMES
+                        (string tags are None when untagged)
+        """
+        index = self._open_map(self._path('database_idx.tcd'))
+        if index is None or len(index) < MASTER_HEADER_SIZE:
+            return []
+
+        try:
+            byte_order = _detect_byte_order(index[:4])
+            if byte_order is None:
+                print("Rockbox tag database has an unknown format, skipping")
+                return []
+            self.byte_order = byte_order
+
+            magic, datasize, entry_count, _, _, _ = struct.unpack_from(f'{byte_order}6i', index)
+            tag_names = TAG_LAYOUTS.get(magic & 0xFF)
+            if tag_names is None:
+                print(f"Rockbox tag database version {magic & 0xFF:#x} isn't supported, skipping")
+                return []
+            if entry_count <= 0:
+                return []
+
+            # the entry size has to agree with the version's layout
+            if datasize <= 0:
+                datasize = len(index) - MASTER_HEADER_SIZE
+            entry_size = (len(tag_names) + 1) * 4
+            if datasize != entry_size * entry_count:
+                print("Rockbox tag database doesn't match its version's layout, skipping")
+                return []
+            if MASTER_HEADER_SIZE + datasize > len(index):
+                print("Rockbox tag database looks truncated, skipping")
+                return []
+
+            tracks = []
+            entry_format = f'{byte_order}{len(tag_names) + 1}i'
+            entries = struct.iter_unpack(entry_format, index[MASTER_HEADER_SIZE:MASTER_HEADER_SIZE + datasize])
+            for values in entries:
+                if values[-1] & FLAG_DELETED:
+                    continue
+
+                track = {}
+                for tag, (name, value) in enumerate(zip(tag_names, values)):
+                    if name in STRING_TAGS:
+                        track[name] = self._read_string(tag, value)
+                    else:
+                        track[name] = value
+                tracks.append(track)
+            return tracks
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Releases the mapped files"""
+        for mapped in self._string_maps.values():
+            if mapped is not None:
+                mapped.close()
+        self._string_maps = {}
+        for f in self._files:
+            f.close()
+        self._files = []
+
+
+def load_tagcache(rockbox_dir: str) -> Dict[str, dict]:
+    """Loads the whole Rockbox library from its tag database
+
+    Args:
+        rockbox_dir (str): Location of the '.rockbox' directory
+
+    Returns:
+        Dict[str, dict]: {'/Music/...' path: track}, empty if there's no database
+    """
+    # avoid a circular import
+    from .wrapped_helpers import extract_song_path
+
+    reader = TagcacheReader(rockbox_dir)
+    if not reader.exists():
+        return {}
+
+    try:
+        tracks = reader.read_all()
+    except (OSError, struct.error, ValueError) as e:
+        print(f"Could not read Rockbox tag database: {e}")
+        return {}
+
+    library = {}
+    for track in tracks:
+        song_path = extract_song_path(track.get('filename') or '')
+        if song_path:
+            library[song_path] = track
+    print(f"Loaded {len(library)} tracks from the Rockbox tag database")
+    return library
+
+
+def tagcache_enabled() -> bool:
+    """Whether the Rockbox tag database should be the primary metadata source.
+    Read at call time so a value from the .env is picked up."""
+    return os.getenv(METADATA_SOURCE_ENV_VAR, 'path').lower() == 'tagcache'
@@ -0,0 +1,89 @@
+import os
+import unicodedata
+from typing import Optional, Dict, Callable, Iterable
+
+from .wrapped_helpers import extract_song_path
+
+
+def normalize_track_path(path: str) -> str:
+    """Normalizes an on-device path (from the log, filesystem or tag
+    database) into an index key: the part from /Music/ on, NFC-normalized
+    and case-folded (iPods use case-insensitive FAT)
+
+    Args:
+        path (str): A full or /Music/-relative path
+
+    Returns:
+        str: The index key, or an empty string if it's not under /Music/
+    """
+    song_path = extract_song_path(path.replace(os.sep, '/'))
+    return unicodedata.normalize('NFC', song_path).casefold()
+
+
+class TrackIndex:
+    """Exact map of on-device path -> canonical track metadata
+    (song, artist, album, path, song_length_ms, tracknumber, genre).
+    Built from what's actually on the device, so resolving a log line
+    is one dict lookup; heuristics are only needed for paths that are
+    no longer there."""
+
+    def __init__(self):
+        self._tracks: Dict[str, dict] = {}
+
+    def add(self, path: str, metadata: dict) -> None:
+        """Adds a track to the index
+
+        Args:
+            path (str): The track's on-device path
+            metadata (dict): At least song, artist and album
+        """
+        key = normalize_track_path(path)
+        if key:
+            self._tracks[key] = metadata
+
+    def resolve(self, path: str) -> Optional[dict]:
+        """Looks up the canonical metadata for the given path
+
+        Args:
+            path (str): A path from the log, filesystem or tag database
+
+        Returns:
+            Optional[dict]: The track's metadata, None if it isn't on the device
+        """
+        return self._tracks.get(normalize_track_path(path))
+
+    def __contains__(self, path: str) -> bool:
+        return normalize_track_path(path) in self._tracks
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+
+def build_track_index(song_paths: Iterable[str],
+                      parse_path: Callable[[str], Optional[dict]],
+                      tagcache_tracks: Optional[Dict[str, dict]] = None) -> TrackIndex:
+    """Builds a track index from the device's songs
+
+    Args:
+        song_paths (Iterable[str]): Song paths from the filesystem scan
+        parse_path (Callable[[str], Optional[dict]]): Turns a full path into
+            metadata (song, artist, album, path, ...), None if it can't
+        tagcache_tracks (Optional[Dict[str, dict]]): {'/Music/...' path: metadata}
+            already resolved from rockbox's tag database. These take priority.
+
+    Returns:
+        TrackIndex: The index
+    """
+    index = TrackIndex()
+
+    for song_path in song_paths:
+        metadata = parse_path(song_path)
+        if metadata:
+            index.add(song_path, metadata)
+
+    for song_path, metadata in (tagcache_tracks or {}).items():
+        if metadata:
+            index.add(song_path, metadata)
+
+    print(f"Indexed {len(index)} tracks on the device")
+    return index
@@ -1,19 +1,23 @@
 import os
 import re
-import glob
 import json
-import psutil
-import shutil
 import sqlite3
-import platform
-from pathlib import Path
 from typing import Optional, List
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateMany
 from datetime import datetime
-from collections import defaultdict
 from dotenv import load_dotenv
 
 from .album_art_fixer import process_images, organize_music_files, clear_temp_directory
+from .art_store import get_art_pack, art_pack_enabled, LooseArtStore
+from .device_locator import get_device_locator
+from .fs_scanner import scan_music_dir
+from .tag_reader import get_tag_cache
+from .prefix_index import PrefixIndex
+from .stats_engine import StatsSnapshot, get_stats_engine
+from .analytics import PlaysAnalytics
+from .plays_snapshot import get_plays_analytics
+from .stats_queries import query_top_n
+from .mongo_queries import aggregate, song_filter_query, song_stats_pipeline, songs_with_plays_pipeline
 from .constants import DEFAULT_DB_PATH, DEFAULT_ALBUM_ART_DIR, SONG_EXTENSIONS
 
 load_dotenv()
@@ -40,15 +44,7 @@ def extract_song_path(full_path: str) -> str:
 
 def list_dir_song_paths(music_dir: str) -> List[str]:
     """Returns a list of song paths starting from the given music directory"""
-    song_paths = []
-    for root, _, files in os.walk(music_dir):
-        for file in files:
-            for ext in SONG_EXTENSIONS:
-                if file.endswith(ext):
-                    song_paths.append(os.path.join(root, file))
-                    break
-                
-    return song_paths
+    return scan_music_dir(music_dir).songs()
 
 
 def extract_metadata_from_path(file_path: str) -> Optional[dict]:
@@ -147,42 +143,14 @@ def ms_to_mmss(milliseconds: int) -> str:
 
 
 def find_rockbox_device() -> Optional[str]:
-    """Find the mounted device with a .rockbox folder in it"""
-    for partition in psutil.disk_partitions(all=False):
-        # skip sys partitions on Windows
-        if partition.device.startswith('C:\\') and platform.system() == "Windows":
-            continue
-
-        # found mount point
-        mount_point = partition.mountpoint
-        rockbox_path = Path(mount_point) / '.rockbox'
-        
-        try:
-            # check if rockbox folder present
-            if rockbox_path.exists() and rockbox_path.is_dir():
-                print(f"Found Rockbox device at: {mount_point}")
-                return mount_point
-        except (PermissionError, OSError):
-            # mount can't be accessed
-            continue
-    
-    print("No Rockbox device found")
-    return None
+    """Find the mounted device with a .rockbox folder in it. Cached until the
+    mounts change (see `DeviceLocator`)."""
+    return get_device_locator().find_device()
 
 
 def find_music_directory() -> Optional[str]:
     """Finds the location of the 'Music' directory"""
-    # find ipod
-    ipod_location = find_rockbox_device()
-    if not ipod_location:
-        return None
-
-    # look for Music directory
-    full_pattern = os.path.join(ipod_location, '**', "Music")
-    found_files = glob.glob(full_pattern, recursive=True)
-    if not found_files or len(found_files) == 0:
-        return None
-    return found_files[0]
+    return get_device_locator().find_music_dir()
 
 
 def has_data(db_type: str, db_path: str) -> bool:
@@ -221,10 +189,68 @@ def has_data(db_type: str, db_path: str) -> bool:
             return False
 
 
+def _strip_song_filename(song_file: str) -> str:
+    """Turns a song's filename into its name (no extension or track number)"""
+    # remove extension and track number to get song name
+    song_name = song_file
+    for ext in ['.mp3', '.flac', '.ogg', '.m4a', '.wav']:
+        if song_name.lower().endswith(ext):
+            song_name = song_name[:-len(ext)]
+            break
+
+    # remove track number prefix (e.g., "01. ", "1 ", or "1-01. ")
+    parts = song_name.split('.', 1)
+    if len(parts) == 2:
+        prefix = parts[0].strip()
+        if prefix.isdigit() or re.match(r'^\d+-\d+$', prefix):
+            song_name = parts[1].strip()
+    return song_name
+
+
+def _find_name_fixes(rows: List[tuple], album_index: dict, song_index: dict,
+                     tag_named: Optional[set] = None) -> List[dict]:
+    """Works out which (song, artist, album) rows have truncated names
+
+    Args:
+        rows (List[tuple]): (song, artist, album) as stored in the db
+        album_index (dict): {artist: PrefixIndex of album folder names}
+        song_index (dict): {(artist, album): PrefixIndex of song names}
+        tag_named (Optional[set]): (song, artist) named from file tags, left as they are
+
+    Returns:
+        List[dict]: [{'song', 'artist', 'album', 'new_song', 'new_album'}] for rows that need fixing
+    """
+    fixes = []
+    for song, artist, album in rows:
+        if not all([song, album, artist]):
+            continue
+        if tag_named and (song, artist) in tag_named:
+            continue
+
+        # check if album needs fixing
+        full_album = album
+        if artist in album_index:
+            full_album = album_index[artist].match(album) or album
+
+        # check if song needs fixing (using original or fixed album)
+        full_song = song
+        if (artist, full_album) in song_index:
+            full_song = song_index[(artist, full_album)].match(song) or song
+
+        if full_album != album or full_song != song:
+            fixes.append({
+                'song': song, 'artist': artist, 'album': album,
+                'new_song': full_song, 'new_album': full_album
+            })
+    return fixes
+
+
 def fix_filenames_in_db(db_type: str = 'local', db_path: str = DEFAULT_DB_PATH) -> bool:
     """Fixes the album and song names saved in the mongo or local db to match
     the names found in the Music directory. This is because often the
-    log file truncates or otherwise messes them up.
+    log file truncates or otherwise messes them up. Renamed songs are
+    carried over to their plays too. Songs named from their file tags are
+    left alone.
 
     Args:
         db_type (str): Either 'mongo' or 'local'
@@ -239,107 +265,59 @@ def fix_filenames_in_db(db_type: str = 'local', db_path: str = DEFAULT_DB_PATH)
         print("Could not find Music directory on iPod")
         return False
 
-    # scan music directory for actual album and song names
-    actual_albums = {}  # {artist: {truncated_album: full_album}}
-    actual_songs = {}   # {(artist, album): {truncated_song: full_song}}
+    # index actual album and song names, so any truncation can be matched
+    album_index = {}  # {artist: PrefixIndex(albums)}
+    song_index = {}   # {(artist, album): PrefixIndex(songs)}
+    tag_named = set()  # {(song, artist)} named from their tags, not the path
+    tag_cache = get_tag_cache()
 
-    for artist_dir in os.listdir(music_dir):
+    tree = scan_music_dir(music_dir).tree()
+    for artist_dir in tree.get(music_dir, {}).get('subdirs', []):
         artist_path = os.path.join(music_dir, artist_dir)
-        if not os.path.isdir(artist_path) or artist_dir == '.rockbox':
-            continue
-
-        actual_albums[artist_dir] = {}
+        album_dirs = tree.get(artist_path, {}).get('subdirs', [])
+        album_index[artist_dir] = PrefixIndex(album_dirs)
 
-        for album_dir in os.listdir(artist_path):
+        for album_dir in album_dirs:
             album_path = os.path.join(artist_path, album_dir)
-            if not os.path.isdir(album_path):
-                continue
-
-            # store album name mappings
-            actual_albums[artist_dir][album_dir] = album_dir
-            if len(album_dir) > 40:
-                truncated = album_dir[:40]
-                actual_albums[artist_dir][truncated] = album_dir
-
-            # scan songs in this album
-            song_key = (artist_dir, album_dir)
-            actual_songs[song_key] = {}
-
-            for song_file in os.listdir(album_path):
-                song_path = os.path.join(album_path, song_file)
-                if not os.path.isfile(song_path):
-                    continue
-
-                # remove extension and track number to get song name
-                song_name = song_file
-                for ext in ['.mp3', '.flac', '.ogg', '.m4a', '.wav']:
-                    if song_name.lower().endswith(ext):
-                        song_name = song_name[:-len(ext)]
-                        break
-
-                # remove track number prefix (e.g., "01. ", "1 ", or "1-01. ")
-                parts = song_name.split('.', 1)
-                if len(parts) == 2:
-                    prefix = parts[0].strip()
-                    if prefix.isdigit() or re.match(r'^\d+-\d+$', prefix):
-                        song_name = parts[1].strip()
-
-                # store song name mappings
-                actual_songs[song_key][song_name] = song_name
-                if len(song_name) > 40:
-                    truncated_song = song_name[:40]
-                    actual_songs[song_key][truncated_song] = song_name
+            song_files = tree.get(album_path, {}).get('files', [])
+            song_index[(artist_dir, album_dir)] = PrefixIndex(_strip_song_filename(f) for f in song_files)
+            for song_file in song_files:
+                tags = tag_cache.cached(os.path.join(album_path, song_file)) or {}
+                if tags.get('title') and tags.get('artist'):
+                    tag_named.add((tags['title'], tags['artist']))
 
     # fix database entries
     if db_type == 'mongo':
         client = MongoClient(os.getenv('MONGODB_URI'))
         db = client.song_db
         song_collection = db.songs
+        plays_collection = db.plays
 
-        album_updates = []
-        song_updates = []
+        docs = list(song_collection.find({}, projection={'song': 1, 'artist': 1, 'album': 1}))
+        rows = {(d.get('song'), d.get('artist'), d.get('album')) for d in docs}
+        fixes = _find_name_fixes(list(rows), album_index, song_index, tag_named)
 
-        # get all songs
-        all_songs = song_collection.find({})
+        if fixes:
+            # one bulk write for the songs, one for their plays
+            song_collection.bulk_write([
+                UpdateMany({'song': f['song'], 'artist': f['artist'], 'album': f['album']},
+                           {'$set': {'song': f['new_song'], 'album': f['new_album']}})
+                for f in fixes
+            ], ordered=False)
 
-        for doc in all_songs:
-            song = doc.get('song')
-            album = doc.get('album')
-            artist = doc.get('artist')
+            play_fixes = [f for f in fixes if f['new_song'] != f['song']]
+            if play_fixes:
+                plays_collection.bulk_write([
+                    UpdateMany({'song': f['song'], 'artist': f['artist']}, {'$set': {'song': f['new_song']}})
+                    for f in play_fixes
+                ], ordered=False)
 
-            if not all([song, album, artist]):
-                continue
-
-            update_fields = {}
-
-            # check if album needs fixing
-            if artist in actual_albums and album in actual_albums[artist]:
-                full_album = actual_albums[artist][album]
-                if full_album != album:
-                    update_fields['album'] = full_album
-
-            # check if song needs fixing (using original or fixed album)
-            album_to_check = update_fields.get('album', album)
-            song_key = (artist, album_to_check)
-            if song_key in actual_songs and song in actual_songs[song_key]:
-                full_song = actual_songs[song_key][song]
-                if full_song != song:
-                    update_fields['song'] = full_song
-
-            # perform update if needed
-            if update_fields:
-                song_collection.update_one(
-                    {'_id': doc['_id']},
-                    {'$set': update_fields}
-                )
-                if 'album' in update_fields:
-                    album_updates.append(update_fields['album'])
-                if 'song' in update_fields:
-                    song_updates.append(update_fields['song'])
+        album_fixes = sum(1 for f in fixes if f['new_album'] != f['album'])
+        song_fixes = sum(1 for f in fixes if f['new_song'] != f['song'])
 
         # print results
-        if album_updates or song_updates:
-            print(f"Fixed {len(album_updates)} album names and {len(song_updates)} song names in MongoDB")
+        if fixes:
+            print(f"Fixed {album_fixes} album names and {song_fixes} song names in MongoDB")
         else:
             print("No truncated names found in MongoDB")
 
@@ -348,57 +326,35 @@ def fix_filenames_in_db(db_type: str = 'local', db_path: str = DEFAULT_DB_PATH)
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
 
-        album_updates = []
-        song_updates = []
-
         # get all songs
         cursor.execute('SELECT song, artist, album FROM songs WHERE song IS NOT NULL AND artist IS NOT NULL')
+        fixes = _find_name_fixes(cursor.fetchall(), album_index, song_index, tag_named)
+
+        if fixes:
+            song_params = [(f['new_song'], f['new_album'], f['song'], f['artist'], f['album']) for f in fixes]
+            old_params = [(f['song'], f['artist'], f['album']) for f in fixes]
+            cursor.executemany(
+                'UPDATE OR IGNORE songs SET song = ?, album = ? WHERE song = ? AND artist = ? AND album = ?',
+                song_params
+            )
+            # rows left with the old name were duplicates of an existing song
+            cursor.executemany('DELETE FROM songs WHERE song = ? AND artist = ? AND album = ?', old_params)
 
-        for row in cursor.fetchall():
-            song, artist, album = row
-
-            update_fields = {}
-            where_clause = []
-            params = []
-
-            # check if album needs fixing
-            if artist in actual_albums and album in actual_albums[artist]:
-                full_album = actual_albums[artist][album]
-                if full_album != album:
-                    update_fields['album'] = full_album
-
-            # check if song needs fixing (using original or fixed album)
-            album_to_check = update_fields.get('album', album)
-            song_key = (artist, album_to_check)
-            if song_key in actual_songs and song in actual_songs[song_key]:
-                full_song = actual_songs[song_key][song]
-                if full_song != song:
-                    update_fields['song'] = full_song
-
-            # perform update if needed
-            if update_fields:
-                set_clause = ', '.join([f"{k} = ?" for k in update_fields.keys()])
-                params = list(update_fields.values())
-
-                # add where clause params
-                params.extend([song, artist, album])
-
-                cursor.execute(
-                    f'UPDATE songs SET {set_clause} WHERE song = ? AND artist = ? AND album = ?',
-                    params
-                )
-
-                if 'album' in update_fields:
-                    album_updates.append(update_fields['album'])
-                if 'song' in update_fields:
-                    song_updates.append(update_fields['song'])
+            # move plays over to the fixed song names (dropping any that now duplicate)
+            play_params = [(f['new_song'], f['song'], f['artist']) for f in fixes if f['new_song'] != f['song']]
+            if play_params:
+                cursor.executemany('UPDATE OR IGNORE plays SET song = ? WHERE song = ? AND artist = ?', play_params)
+                cursor.executemany('DELETE FROM plays WHERE song = ? AND artist = ?', [p[1:] for p in play_params])
 
         conn.commit()
         conn.close()
 
+        album_fixes = sum(1 for f in fixes if f['new_album'] != f['album'])
+        song_fixes = sum(1 for f in fixes if f['new_song'] != f['song'])
+
         # print results
-        if album_updates or song_updates:
-            print(f"Fixed {len(album_updates)} album names and {len(song_updates)} song names in local database")
+        if fixes:
+            print(f"Fixed {album_fixes} album names and {song_fixes} song names in local database")
         else:
             print("No truncated names found in local database")
 
@@ -510,33 +466,64 @@ def _should_process_album_art(album_art_storage: str, db_type: str, db_path: str
     return db_last_updated > last_processed
 
 
-def find_album_art(album: str, album_art_storage: str = DEFAULT_ALBUM_ART_DIR) -> str:
-    """Finds the art associated with the given album. Logic from Claude.
+_loose_art_index = {}  # {album_art_storage: (dir mtime, {album: art_path})}
+
+
+def _get_loose_art_index(album_art_storage: str) -> dict:
+    """Gets the {album: art_path} index of loose covers in the given directory:
+    content-addressed covers (see `LooseArtStore`) plus any older
+    '<album>_cover.jpg' files. Cached until the directory changes.
 
     Args:
-        album (str): The album to search for
-        album_art_storage (str): The location of album covers. Defaults to
-        DEFAULT_ALBUM_ART_DIR
+        album_art_storage (str): The location of album covers
 
     Returns:
-        str: The location of the album's specific cover art, or path to missing_album_cover.jpg if not found
+        dict: {album: art_path}
     """
-    # build available art dictionary
+    storage = str(album_art_storage)
+    try:
+        dir_mtime = os.stat(storage).st_mtime_ns
+    except OSError:
+        return {}
+
+    cached = _loose_art_index.get(storage)
+    if cached and cached[0] == dir_mtime:
+        return cached[1]
+
     available_art = {}
-    for filename in os.listdir(album_art_storage):
-        if filename.endswith('_cover.jpg'):
-            album_from_file = filename.replace('_cover.jpg', '')
-            available_art[album_from_file] = os.path.join(album_art_storage, filename)
+    with os.scandir(storage) as entries:
+        for entry in entries:
+            if entry.name.endswith('_cover.jpg'):
+                album_from_file = entry.name.replace('_cover.jpg', '')
+                available_art[album_from_file] = os.path.join(storage, entry.name)
+
+    # albums sharing a cover resolve to the same path
+    available_art.update(LooseArtStore(storage).art_paths())
 
+    _loose_art_index[storage] = (dir_mtime, available_art)
+    return available_art
+
+
+def _match_album_name(album: str, available: List[str]) -> Optional[str]:
+    """Matches the given album against the available album names, allowing
+    for truncation and version suffixes. Logic from Claude.
+
+    Args:
+        album (str): The album to search for
+        available (List[str]): The album names to search through
+
+    Returns:
+        Optional[str]: The matching album name, None if not found
+    """
     # try exact match first
-    if album in available_art:
-        return available_art[album]
+    if album in available:
+        return album
 
     # try fuzzy match for truncated filenames or slight variations
-    for file_album, file_art_path in available_art.items():
+    for file_album in available:
         # check if one is a prefix of the other (handles truncation)
         if file_album.startswith(album) or album.startswith(file_album):
-            return file_art_path
+            return file_album
 
         # check if only difference is version info like (Explicit) vs (Expanded Edition)
         # strip common version suffixes and compare
@@ -544,14 +531,49 @@ def find_album_art(album: str, album_art_storage: str = DEFAULT_ALBUM_ART_DIR) -
         file_base = re.sub(r' \((Explicit|Expanded Edition|Deluxe|Deluxe Version)\)$', '', file_album)
 
         if album_base == file_base and album_base != album:
-            return file_art_path
+            return file_album
+
+    return None
+
+
+def find_album_art(album: str, album_art_storage: str = DEFAULT_ALBUM_ART_DIR, artist: Optional[str] = None) -> str:
+    """Finds the art associated with the given album. Looks in the packed art
+    store first (keyed by artist + album), then the loose covers.
+
+    Args:
+        album (str): The album to search for
+        album_art_storage (str): The location of album covers. Defaults to
+        DEFAULT_ALBUM_ART_DIR
+        artist (Optional[str]): The album's artist. Used to tell apart
+        same-titled albums in the packed art store.
+
+    Returns:
+        str: The location of the album's specific cover art (or an art ref into the
+        packed store), or path to missing_album_cover.jpg if not found
+    """
+    # packed store
+    pack = get_art_pack()
+    if pack.refs:
+        # same artist first, then covers stored without an artist
+        for candidate_artist in ([artist] if artist else []) + ['']:
+            match = _match_album_name(album, pack.albums_for(candidate_artist))
+            if match is not None:
+                return pack.ref(candidate_artist, match)
+
+    # loose files
+    available_art = _get_loose_art_index(album_art_storage)
+    match = _match_album_name(album, list(available_art.keys()))
+    if match is not None:
+        return available_art[match]
 
     # no art found, return missing cover placeholder
     return os.path.join(album_art_storage, "missing_album_cover.jpg")
 
 
 def fix_and_store_album_art(album_art_storage: str, db_type: str = 'local', db_path: str = DEFAULT_DB_PATH, force: bool = False) -> bool:
-    """Generates a cover.jpg for each album, and copies them locally
+    """Generates a cover.jpg for each album, and stores them locally. Covers
+    are stored once per unique image, with each album referring to its cover
+    by content hash.
 
     Args:
         album_art_storage (str): Where to store the generated album art
@@ -580,18 +602,12 @@ def fix_and_store_album_art(album_art_storage: str, db_type: str = 'local', db_p
         print("Organizing music files by album...")
         organize_music_files(music_dir)
 
-        # check if covers already exist
-        existing_covers = 0
+        # check if covers already exist (only album folders, i.e. ones with songs)
+        tree = scan_music_dir(music_dir).tree()
         needs_extraction = 0
-
-        for root, dirs, files in os.walk(music_dir):
-            if '.rockbox' in dirs:
-                dirs.remove('.rockbox')
-
-            cover_path = os.path.join(root, 'cover.jpg')
-            if os.path.exists(cover_path) and os.path.getsize(cover_path) > 0:
-                existing_covers += 1
-            else:
+        for entry in tree.values():
+            has_songs = any(name.lower().endswith(tuple(SONG_EXTENSIONS)) for name in entry['files'])
+            if has_songs and 'cover.jpg' not in entry['files']:
                 needs_extraction += 1
 
         # extract art only if needed
@@ -603,29 +619,46 @@ def fix_and_store_album_art(album_art_storage: str, db_type: str = 'local', db_p
         clear_temp_directory()
 
         # copy art to local storage
-        print(f"Copying album art to {album_art_storage}...")
+        use_pack = art_pack_enabled()
+        store = get_art_pack() if use_pack else LooseArtStore(album_art_storage)
+        store_location = store.pack_path if use_pack else str(album_art_storage)
+        print(f"Copying album art to {store_location}...")
         os.makedirs(album_art_storage, exist_ok=True)
 
+        # only covers that are new/changed since the last copy (or missing from the store)
+        scanner = scan_music_dir(music_dir)
+        consumer = f"album_art:{store_location}"
+        diff = scanner.diff(consumer, ['cover.jpg'])
+        updated_covers = set(diff['added']) | set(diff['changed'])
+
         copied_count = 0
-        for root, dirs, files in os.walk(music_dir):
-            # skip .rockbox directory
-            if '.rockbox' in dirs:
-                dirs.remove('.rockbox')
+        for cover_path in scanner.files(['cover.jpg']):
+            if os.path.basename(cover_path) != 'cover.jpg':
+                continue
 
-            # look for cover.jpg files
-            if 'cover.jpg' in files:
-                cover_path = os.path.join(root, 'cover.jpg')
+            root = os.path.dirname(cover_path)
+            album_folder = os.path.basename(root)
+            parent = os.path.dirname(root)
+            # key by (artist, album) so same-titled albums don't collide
+            artist_folder = os.path.basename(parent) if os.path.normpath(parent) != os.path.normpath(music_dir) else ''
 
-                # create destination
-                album_folder = os.path.basename(root)
-                dest_filename = f"{album_folder}_cover.jpg"
-                dest_path = os.path.join(album_art_storage, dest_filename)
+            stored = store.has(artist_folder, album_folder) if use_pack else album_folder in store.refs
+            if stored and cover_path not in updated_covers:
+                continue
 
-                # copy to local storage
-                shutil.copy2(cover_path, dest_path)
-                copied_count += 1
+            if use_pack:
+                with open(cover_path, 'rb') as f:
+                    store.put(artist_folder, album_folder, f.read(), save=False)
+            else:
+                store.put_file(album_folder, cover_path)
+            copied_count += 1
 
-        print(f"Successfully copied {copied_count} album covers to {album_art_storage}")
+        store.save()
+        reuse = store.reuse_stats()
+        scanner.mark_consumed(consumer)
+        print(f"Successfully copied {copied_count} new/changed album covers to {store_location}")
+        print(f"{reuse['unique_covers']} unique covers for {reuse['albums']} albums "
+              f"({reuse['reused']} reused, {reuse['bytes_saved'] / 1024:.1f} KB saved)")
 
         # update cache timestamp
         _set_album_art_last_processed(album_art_storage)
@@ -694,90 +727,26 @@ def grab_all_metadata(db_type: str, db_path: str, album_art_dir: str,
         client = MongoClient(os.getenv('MONGODB_URI'))
         db = client.song_db
         song_collection = db.songs
-        plays_collection = db.plays
-
-        # build song filter query
-        song_filter = {'album': {'$ne': None}, 'artist': {'$ne': None}}
-        if 'album' in filters and filters['album']:
-            song_filter['album'] = filters['album']
-        if 'artist' in filters and filters['artist']:
-            song_filter['artist'] = filters['artist']
-        if 'song' in filters and filters['song']:
-            song_filter['song'] = filters['song']
-
-        # get song metadata
-        all_songs = song_collection.find(
-            song_filter,
-            projection={'_id': 0, 'song': 1, 'album': 1, 'artist': 1,
-                       'genres': 1, 'song_length_ms': 1}
-        )
-
-        for song_doc in all_songs:
-            # apply genre filter if specified
-            if 'genre' in filters and filters['genre']:
-                genres = song_doc.get('genres', '').lower()
-                if filters['genre'].lower() not in genres:
-                    continue
-
-            song_key = (song_doc['song'], song_doc['artist'])
-            songs_metadata[song_key] = {
-                'album': song_doc['album'],
-                'artist': song_doc['artist'],
-                'genres': song_doc.get('genres', ''),
-                'song_length_ms': song_doc.get('song_length_ms', 0) or 0
-            }
-
-        # build date filter for plays
-        plays_filter = {}
-        if start_date or end_date:
-            plays_filter['timestamp'] = {}
-            if start_date:
-                plays_filter['timestamp']['$gte'] = start_date
-            if end_date:
-                plays_filter['timestamp']['$lte'] = end_date
-
-        # aggregate play stats
-        pipeline = [
-            {'$match': plays_filter} if plays_filter else {'$match': {}},
-            {'$group': {
-                '_id': {'song': '$song', 'artist': '$artist'},
-                'total_plays': {'$sum': 1},
-                'total_elapsed_ms': {'$sum': '$elapsed_ms'}
-            }}
-        ]
 
-        play_stats = list(plays_collection.aggregate(pipeline))
-
-        # create play stats lookup dict
-        play_stats_dict = {}
-        for stat in play_stats:
-            song_key = (stat['_id']['song'], stat['_id']['artist'])
-            play_stats_dict[song_key] = {
-                'total_plays': stat['total_plays'],
-                'total_elapsed_ms': stat['total_elapsed_ms']
-            }
-
-        # combine metadata with play stats (even songs w/0 songs)
-        for song_key, metadata in songs_metadata.items():
-            song, artist = song_key
-            album_key = (metadata['album'], artist)
+        # join each song's play stats on the server (even songs w/0 plays)
+        pipeline = songs_with_plays_pipeline(song_filter_query(filters), start_date, end_date)
+        for song_doc in aggregate(song_collection, pipeline):
+            song, artist = song_doc['song'], song_doc['artist']
+            album_key = (song_doc['album'], artist)
 
             if album_key not in albums_dict:
                 albums_dict[album_key] = {
-                    'album_name': metadata['album'],
+                    'album_name': song_doc['album'],
                     'artist': artist,
-                    'genres': metadata['genres'],
+                    'genres': song_doc['genres'],
                     'songs': []
                 }
 
-            # get play stats if they exist, otherwise use 0
-            stats = play_stats_dict.get(song_key, {'total_plays': 0, 'total_elapsed_ms': 0})
-
             albums_dict[album_key]['songs'].append({
                 'song': song,
-                'song_length': ms_to_mmss(metadata['song_length_ms']),
-                'total_elapsed': ms_to_mmss(stats['total_elapsed_ms']),
-                'total_plays': stats['total_plays']
+                'song_length': ms_to_mmss(song_doc['song_length_ms'] or 0),
+                'total_elapsed': ms_to_mmss(song_doc['total_elapsed_ms']),
+                'total_plays': song_doc['total_plays']
             })
 
     else:
@@ -892,7 +861,7 @@ def grab_all_metadata(db_type: str, db_path: str, album_art_dir: str,
         # find album art
         album_name = album_data['album_name']
         album_artist = album_data['artist']
-        art_path = find_album_art(album_name, album_art_dir)
+        art_path = find_album_art(album_name, album_art_dir, album_artist)
 
         results.append({
             'art_path': art_path,
@@ -962,38 +931,19 @@ def create_genre_mappings(db_type: str, db_path: str, album_art_dir: str,
         client = MongoClient(os.getenv('MONGODB_URI'))
         db = client.song_db
         song_collection = db.songs
-        plays_collection = db.plays
-
-        # build song filter query
-        song_filter = {'album': {'$ne': None}, 'artist': {'$ne': None}}
-        if 'album' in filters and filters['album']:
-            song_filter['album'] = filters['album']
-        if 'artist' in filters and filters['artist']:
-            song_filter['artist'] = filters['artist']
-        if 'song' in filters and filters['song']:
-            song_filter['song'] = filters['song']
-
-        # get song album + genres
-        all_songs = song_collection.find(
-            song_filter,
-            projection={'_id': 0, 'song': 1, 'artist': 1, 'album': 1, 'genres': 1}
-        )
-
-        for song_doc in all_songs:
-            # apply genre filter if specified
-            song_genres = song_doc.get('genres', '')
-            if 'genre' in filters and filters['genre']:
-                if filters['genre'].lower() not in song_genres.lower():
-                    continue
 
+        # join each song's play stats on the server
+        pipeline = songs_with_plays_pipeline(song_filter_query(filters), start_date, end_date)
+        for song_doc in aggregate(song_collection, pipeline):
+            song_genres = song_doc['genres']
             song_key = (song_doc['song'], song_doc['artist'])
-            album_art = find_album_art(song_doc['album'], album_art_dir)
+            album_art = find_album_art(song_doc['album'], album_art_dir, song_doc['artist'])
             songs_dict[song_key] = {
                 'song': song_doc['song'],
                 'artist': song_doc['artist'],
                 'art_path': album_art,
-                'total_elapsed_ms': 0,  # added later
-                'total_plays': 0,       # added later
+                'total_elapsed_ms': song_doc['total_elapsed_ms'],
+                'total_plays': song_doc['total_plays'],
                 'genres': song_genres
             }
 
@@ -1001,40 +951,6 @@ def create_genre_mappings(db_type: str, db_path: str, album_art_dir: str,
             if song_genres:
                 genres.update(song_genres.split(','))
 
-        # build date filter for plays
-        plays_filter = {}
-        if start_date or end_date:
-            plays_filter['timestamp'] = {}
-            if start_date:
-                plays_filter['timestamp']['$gte'] = start_date
-            if end_date:
-                plays_filter['timestamp']['$lte'] = end_date
-
-        # aggregate play stats
-        pipeline = [
-            {'$match': plays_filter} if plays_filter else {'$match': {}},
-            {'$group': {
-                '_id': {'song': '$song', 'artist': '$artist'},
-                'total_plays': {'$sum': 1},
-                'total_elapsed_ms': {'$sum': '$elapsed_ms'}
-            }}
-        ]
-
-        play_stats = list(plays_collection.aggregate(pipeline))
-
-        # iter through songs
-        for stat in play_stats:
-            song = stat['_id']['song']
-            artist = stat['_id']['artist']
-            song_key = (song, artist)
-
-            if song_key not in songs_dict:
-                continue
-
-            # finish adding info to songs
-            songs_dict[song_key]['total_elapsed_ms'] = stat['total_elapsed_ms']
-            songs_dict[song_key]['total_plays'] = stat['total_plays']
-
         # create temp genre dict
         temp_dict = {}
         for genre in genres:
@@ -1107,7 +1023,7 @@ def create_genre_mappings(db_type: str, db_path: str, album_art_dir: str,
 
             # store song info for later
             song_key = (row[0], row[1])
-            album_art = find_album_art(row[2], album_art_dir)
+            album_art = find_album_art(row[2], album_art_dir, row[1])
             songs_dict[song_key] = {
                 'song': row[0],
                 'artist': row[1],
@@ -1256,78 +1172,26 @@ def grab_all_songs(db_type: str, db_path: str, album_art_dir: str,
         client = MongoClient(os.getenv('MONGODB_URI'))
         db = client.song_db
         song_collection = db.songs
-        plays_collection = db.plays
-
-        # build song filter query
-        song_filter = {'song': {'$ne': None}, 'artist': {'$ne': None}}
-        if 'album' in filters and filters['album']:
-            song_filter['album'] = filters['album']
-        if 'artist' in filters and filters['artist']:
-            song_filter['artist'] = filters['artist']
-        if 'song' in filters and filters['song']:
-            song_filter['song'] = filters['song']
-
-        # get song metadata
-        all_songs_cursor = song_collection.find(
-            song_filter,
-            projection={'_id': 0, 'song': 1, 'artist': 1, 'album': 1, 'genres': 1, 'song_length_ms': 1}
-        )
-
-        for song_doc in all_songs_cursor:
-            # apply genre filter if specified
-            song_genres = song_doc.get('genres', '')
-            if 'genre' in filters and filters['genre']:
-                if filters['genre'].lower() not in song_genres.lower():
-                    continue
 
+        # join each song's play stats on the server
+        pipeline = songs_with_plays_pipeline(song_filter_query(filters, required_field='song'),
+                                             start_date, end_date)
+        for song_doc in aggregate(song_collection, pipeline):
             song_key = (song_doc['song'], song_doc['artist'])
-            album_art = find_album_art(song_doc['album'], album_art_dir)
+            album_art = find_album_art(song_doc['album'], album_art_dir, song_doc['artist'])
             songs_dict[song_key] = {
                 'title': song_doc['song'],
                 'artist': song_doc['artist'],
                 'album': song_doc['album'],
-                'duration': song_doc.get('song_length_ms', 0) or 0,
+                'duration': song_doc['song_length_ms'] or 0,
                 'metadata': {
-                    'genres': song_genres,
+                    'genres': song_doc['genres'],
                     'art_path': album_art,
-                    'total_elapsed_ms': 0,  # added later
-                    'total_plays': 0,       # added later
+                    'total_elapsed_ms': song_doc['total_elapsed_ms'],
+                    'total_plays': song_doc['total_plays'],
                 }
             }
 
-        # build date filter for plays
-        plays_filter = {}
-        if start_date or end_date:
-            plays_filter['timestamp'] = {}
-            if start_date:
-                plays_filter['timestamp']['$gte'] = start_date
-            if end_date:
-                plays_filter['timestamp']['$lte'] = end_date
-
-        # aggregate play stats
-        pipeline = [
-            {'$match': plays_filter} if plays_filter else {'$match': {}},
-            {'$group': {
-                '_id': {'song': '$song', 'artist': '$artist'},
-                'total_plays': {'$sum': 1},
-                'total_elapsed_ms': {'$sum': '$elapsed_ms'}
-            }}
-        ]
-
-        play_stats = list(plays_collection.aggregate(pipeline))
-
-        # update songs with play stats
-        for stat in play_stats:
-            song = stat['_id']['song']
-            artist = stat['_id']['artist']
-            song_key = (song, artist)
-
-            if song_key not in songs_dict:
-                continue
-
-            songs_dict[song_key]['metadata']['total_elapsed_ms'] = stat['total_elapsed_ms']
-            songs_dict[song_key]['metadata']['total_plays'] = stat['total_plays']
-
         # finish up
         for val in songs_dict.values():
             all_songs.append(val)
@@ -1369,7 +1233,7 @@ def grab_all_songs(db_type: str, db_path: str, album_art_dir: str,
 
             # store for later
             song_key = (row[0], row[1])
-            album_art = find_album_art(row[2], album_art_dir)
+            album_art = find_album_art(row[2], album_art_dir, row[1])
             songs_dict[song_key] = {
                 'title': row[0],
                 'artist': row[1],
@@ -1450,48 +1314,11 @@ def load_stats_from_db(db_type: str, db_path: str,
     if db_type == 'mongo':
         client = MongoClient(os.getenv('MONGODB_URI'))
         db = client.song_db
-        song_collection = db.songs
         plays_collection = db.plays
 
-        # build date filter for plays
-        plays_filter = {}
-        if start_date or end_date:
-            plays_filter['timestamp'] = {}
-            if start_date:
-                plays_filter['timestamp']['$gte'] = start_date
-            if end_date:
-                plays_filter['timestamp']['$lte'] = end_date
-
-        # aggregate from plays collection
-        pipeline = [
-            {'$match': plays_filter} if plays_filter else {'$match': {}},
-            {'$group': {
-                '_id': {'song': '$song', 'artist': '$artist'},
-                'total_plays': {'$sum': 1},
-                'total_elapsed_ms': {'$sum': '$elapsed_ms'}
-            }}
-        ]
-        play_stats = list(plays_collection.aggregate(pipeline))
-
-        # get song metadata
-        all_songs = list(song_collection.find({}, projection={'_id': 0}))
-        songs_metadata = {(s['song'], s['artist']): s for s in all_songs}
-
-        # combine stats with metadata (even songs w/0 plays)
-        all_docs = []
-        for stat in play_stats:
-            song_key = (stat['_id']['song'], stat['_id']['artist'])
-            if song_key in songs_metadata:
-                metadata = songs_metadata[song_key]
-                all_docs.append({
-                    'song': stat['_id']['song'],
-                    'artist': stat['_id']['artist'],
-                    'album': metadata.get('album', ''),
-                    'genres': metadata.get('genres', ''),
-                    'total_plays': stat['total_plays'],
-                    'song_length_ms': metadata.get('song_length_ms', 0) or 0,
-                    'total_elapsed_ms': stat['total_elapsed_ms']
-                })
+        # aggregate plays and join song metadata on the server
+        pipeline = song_stats_pipeline(start_date, end_date)
+        all_docs = list(aggregate(plays_collection, pipeline))
     else:
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
@@ -1543,10 +1370,42 @@ def load_stats_from_db(db_type: str, db_path: str,
     return all_docs
 
 
+def _snapshot_analytics(db_type: str, db_path: str,
+                        stats_data: Optional[List[dict]],
+                        analytics: Optional[PlaysAnalytics]) -> Optional[PlaysAnalytics]:
+    """Picks the analytics engine a stats helper should answer from. A passed in
+    engine wins, then pre-loaded stats_data (returns None). With neither, local
+    dbs fall back to their memory-mapped plays snapshot (None for mongo, or if
+    numpy is missing).
+    """
+    if analytics is None and stats_data is None:
+        return get_plays_analytics(db_type, db_path)
+    return analytics
+
+
+def _top_n_from_snapshot(kind: str, db_type: str, db_path: str, n: int,
+                         start_date: Optional[datetime], end_date: Optional[datetime],
+                         stats_data: Optional[List[dict]],
+                         analytics: Optional[PlaysAnalytics]) -> List[dict]:
+    """Top n 'genres', 'artists', 'albums' or 'songs', from the analytics engine
+    or plays snapshot if there is one (see `_snapshot_analytics`), else from
+    stats_data, else aggregated in the db
+    """
+    analytics = _snapshot_analytics(db_type, db_path, stats_data, analytics)
+    if analytics is not None:
+        return getattr(analytics, f'top_{kind}')(n, start_date, end_date)
+
+    # without pre-loaded data, let the db do the aggregation and only send back n rows
+    if stats_data is None:
+        return query_top_n(db_type, db_path, kind, n, start_date, end_date)
+    return getattr(StatsSnapshot(stats_data), f'top_{kind}')(n)
+
+
 def find_top_genres(db_type: str, db_path: str, n: int = 3,
                    start_date: Optional[datetime] = None,
                    end_date: Optional[datetime] = None,
-                   stats_data: Optional[List[dict]] = None) -> List[dict]:
+                   stats_data: Optional[List[dict]] = None,
+                   analytics: Optional[PlaysAnalytics] = None) -> List[dict]:
     """Finds the top n genres listened to based on total_elapsed_ms stats.
 
     Args:
@@ -1556,7 +1415,8 @@ def find_top_genres(db_type: str, db_path: str, n: int = 3,
         start_date (Optional[datetime]): Filter plays from this date onwards
         end_date (Optional[datetime]): Filter plays up to this date
         stats_data (Optional[List[dict]]): Pre-loaded stats data. If not provided,
-                                          will load from database.
+                                          the top n is computed in the database.
+        analytics (Optional[PlaysAnalytics]): Columnar analytics engine to answer from.
 
     Returns:
         List[dict]: [
@@ -1568,44 +1428,15 @@ def find_top_genres(db_type: str, db_path: str, n: int = 3,
             ...
         ]
     """
-    stats = stats_data if stats_data is not None else load_stats_from_db(db_type, db_path, start_date, end_date)
-
-    if not stats:
-        return []
-
-    # aggregate by genre
-    genre_stats = defaultdict(list)
-    for song in stats:
-        genres_str = song.get('genres', '')
-        if not genres_str:
-            continue
-
-        elapsed = song.get('total_elapsed_ms', 0)
-        album_art = find_album_art(song.get('album', ''))
-        for genre in genres_str.split(','):
-            genre = genre.strip()
-            if genre:
-                if genre not in genre_stats:
-                    # add elapsed time
-                    genre_stats[genre] = [0]
-                genre_stats[genre][0] += elapsed
-                
-                if len(genre_stats[genre]) == 2:
-                    continue
-                # add album art
-                genre_stats[genre].append(album_art)
-
-    # sort and get top n
-    sorted_genres = sorted(genre_stats.items(), key=lambda x: x[1], reverse=True)[:n]
-    
-    # build dict
-    return [{'genre': genre, 'total_elapsed_mins': metadata[0] // 60000, 'album_art': metadata[1]} for genre, metadata in sorted_genres]
+    return _top_n_from_snapshot('genres', db_type, db_path, n, start_date, end_date,
+                                stats_data, analytics)
 
 
 def find_top_artists(db_type: str, db_path: str, n: int = 3,
                     start_date: Optional[datetime] = None,
                     end_date: Optional[datetime] = None,
-                    stats_data: Optional[List[dict]] = None) -> List[dict]:
+                    stats_data: Optional[List[dict]] = None,
+                    analytics: Optional[PlaysAnalytics] = None) -> List[dict]:
     """Finds the top n artists listened to based on total_elapsed_ms stats.
 
     Args:
@@ -1615,7 +1446,8 @@ def find_top_artists(db_type: str, db_path: str, n: int = 3,
         start_date (Optional[datetime]): Filter plays from this date onwards
         end_date (Optional[datetime]): Filter plays up to this date
         stats_data (Optional[List[dict]]): Pre-loaded stats data. If not provided,
-                                          will load from database.
+                                          the top n is computed in the database.
+        analytics (Optional[PlaysAnalytics]): Columnar analytics engine to answer from.
 
     Returns:
         List[dict]: [
@@ -1627,40 +1459,15 @@ def find_top_artists(db_type: str, db_path: str, n: int = 3,
             ...
         ]
     """
-    stats = stats_data if stats_data is not None else load_stats_from_db(db_type, db_path, start_date, end_date)
-
-    if not stats:
-        return []
-
-    # aggregate by artist
-    artist_stats = defaultdict(list)
-    for song in stats:
-        artist = song.get('artist', '')
-        if not artist:
-            continue
-
-        elapsed = song.get('total_elapsed_ms', 0)
-        album_art = find_album_art(song.get('album', ''))
-        if artist not in artist_stats:
-            # add elapsed time
-            artist_stats[artist] = [0]
-        artist_stats[artist][0] += elapsed
-        
-        if len(artist_stats[artist]) == 2:
-            continue
-        # add album art
-        artist_stats[artist].append(album_art)
-
-    # sort and get top n
-    sorted_artists = sorted(artist_stats.items(), key=lambda x: x[1], reverse=True)[:n]
-
-    return [{'artist': artist, 'total_elapsed_mins': metadata[0] // 60000, 'album_art': metadata[1]} for artist, metadata in sorted_artists]
+    return _top_n_from_snapshot('artists', db_type, db_path, n, start_date, end_date,
+                                stats_data, analytics)
 
 
 def find_top_albums(db_type: str, db_path: str, n: int = 3,
                    start_date: Optional[datetime] = None,
                    end_date: Optional[datetime] = None,
-                   stats_data: Optional[List[dict]] = None) -> List[dict]:
+                   stats_data: Optional[List[dict]] = None,
+                   analytics: Optional[PlaysAnalytics] = None) -> List[dict]:
     """Finds the top n albums listened to based on total_elapsed_ms stats.
 
     Args:
@@ -1670,7 +1477,8 @@ def find_top_albums(db_type: str, db_path: str, n: int = 3,
         start_date (Optional[datetime]): Filter plays from this date onwards
         end_date (Optional[datetime]): Filter plays up to this date
         stats_data (Optional[List[dict]]): Pre-loaded stats data. If not provided,
-                                          will load from database.
+                                          the top n is computed in the database.
+        analytics (Optional[PlaysAnalytics]): Columnar analytics engine to answer from.
 
     Returns:
         List[dict]: [
@@ -1683,43 +1491,15 @@ def find_top_albums(db_type: str, db_path: str, n: int = 3,
             ...
         ]
     """
-    stats = stats_data if stats_data is not None else load_stats_from_db(db_type, db_path, start_date, end_date)
-
-    if not stats:
-        return []
-
-    # aggregate by album and artist
-    album_stats = defaultdict(list)
-    for song in stats:
-        album = song.get('album', '')
-        artist = song.get('artist', '')
-        album_art = find_album_art(song.get('album', ''))
-        if not album or not artist:
-            continue
-
-        elapsed = song.get('total_elapsed_ms', 0)
-        album_key = (album, artist)
-        if album_key not in album_stats:
-            # add elapsed time
-            album_stats[album_key] = [0]
-        album_stats[album_key][0] += elapsed
-        
-        if len(album_stats[album_key]) == 2:
-            continue
-        # add album art
-        album_stats[album_key].append(album_art)
-
-    # sort and get top n
-    sorted_albums = sorted(album_stats.items(), key=lambda x: x[1], reverse=True)[:n]
-
-    return [{'album': album, 'artist': artist, 'total_elapsed_mins': metadata[0] // 60000, 'album_art': metadata[1]}
-            for (album, artist), metadata in sorted_albums]
+    return _top_n_from_snapshot('albums', db_type, db_path, n, start_date, end_date,
+                                stats_data, analytics)
 
 
 def find_top_songs(db_type: str, db_path: str, n: int = 3,
                   start_date: Optional[datetime] = None,
                   end_date: Optional[datetime] = None,
-                  stats_data: Optional[List[dict]] = None) -> List[dict]:
+                  stats_data: Optional[List[dict]] = None,
+                  analytics: Optional[PlaysAnalytics] = None) -> List[dict]:
     """Finds the top n songs listened to based on total_plays stats.
 
     Args:
@@ -1729,7 +1509,8 @@ def find_top_songs(db_type: str, db_path: str, n: int = 3,
         start_date (Optional[datetime]): Filter plays from this date onwards
         end_date (Optional[datetime]): Filter plays up to this date
         stats_data (Optional[List[dict]]): Pre-loaded stats data. If not provided,
-                                          will load from database.
+                                          the top n is computed in the database.
+        analytics (Optional[PlaysAnalytics]): Columnar analytics engine to answer from.
 
     Returns:
         List[dict]: [
@@ -1742,25 +1523,15 @@ def find_top_songs(db_type: str, db_path: str, n: int = 3,
             ...
         ]
     """
-    stats = stats_data if stats_data is not None else load_stats_from_db(db_type, db_path, start_date, end_date)
-
-    if not stats:
-        return []
-
-    # sort by total_plays and get top n
-    sorted_songs = sorted(stats, key=lambda x: x.get('total_plays', 0), reverse=True)[:n]
-    for song_obj in sorted_songs:
-        album_art = find_album_art(song_obj['album'])
-        song_obj['album_art'] = album_art
-
-    return [{'song': song['song'], 'artist': song['artist'], 'total_plays': song['total_plays'], 'album_art': song['album_art']}
-            for song in sorted_songs]
+    return _top_n_from_snapshot('songs', db_type, db_path, n, start_date, end_date,
+                                stats_data, analytics)
 
 
 def get_total_listening_time(db_type: str, db_path: str,
                              start_date: Optional[datetime] = None,
                              end_date: Optional[datetime] = None,
-                             stats_data: Optional[List[dict]] = None) -> int:
+                             stats_data: Optional[List[dict]] = None,
+                             analytics: Optional[PlaysAnalytics] = None) -> int:
     """Calculates total listening time in minutes.
 
     Args:
@@ -1770,16 +1541,37 @@ def get_total_listening_time(db_type: str, db_path: str,
         end_date (Optional[datetime]): Filter plays up to this date
         stats_data (Optional[List[dict]]): Pre-loaded stats data. If not provided,
                                           will load from database.
+        analytics (Optional[PlaysAnalytics]): Columnar analytics engine to answer from.
 
     Returns:
         int: Total listening time in minutes
     """
+    analytics = _snapshot_analytics(db_type, db_path, stats_data, analytics)
+    if analytics is not None:
+        return analytics.total_listening_mins(start_date, end_date)
+
     stats = stats_data if stats_data is not None else load_stats_from_db(db_type, db_path, start_date, end_date)
+    return StatsSnapshot(stats).total_listening_mins()
+
 
-    if not stats:
-        return 0
+def get_listening_patterns(db_type: str, db_path: str,
+                           start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None) -> Optional[dict]:
+    """Finds when the listening happened: an hour x weekday heatmap, the
+    longest daily streak, the busiest day and minutes per month.
 
-    # sum all total_elapsed_ms
-    total_ms = sum(song.get('total_elapsed_ms', 0) for song in stats)
+    Args:
+        db_type (str): Type of database ('mongo' or 'local')
+        db_path (str): Path to local db file
+        start_date (Optional[datetime]): Filter plays from this date onwards
+        end_date (Optional[datetime]): Filter plays up to this date
 
-    return total_ms // 60000
+    Returns:
+        Optional[dict]: {
+            'heatmap_mins': List[List[int]] (7 weekdays, monday first, x 24 hours),
+            'longest_streak': {'days': int, 'start': str, 'end': str} or None,
+            'busiest_day': {'date': str, 'mins': int} or None,
+            'monthly_mins': [{'month': str, 'mins': int}, ...]
+        }, None if numpy isn't installed
+    """
+    return get_stats_engine(db_type, db_path).listening_patterns(start_date, end_date)
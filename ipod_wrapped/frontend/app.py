@@ -17,6 +17,14 @@ SCALE_TIERS = [
 ]
 BASE_WIDTH = 650
 
+# (name, title, icon) of each tab, in order
+PAGES = [
+    ('genres', "Genres", "view-list-symbolic"),
+    ('albums', "Albums", "media-optical-symbolic"),
+    ('songs', "Songs", "audio-x-generic-symbolic"),
+    ('wrapped', "Wrapped", "starred-symbolic"),
+]
+
 from .pages import AlbumsPage, SongsPage, WrappedPage, GenresPage
 from .widgets.bottom_bar import create_bottom_bar
 from .widgets.banner import create_banner
@@ -73,17 +81,27 @@ class MainWindow(Adw.ApplicationWindow):
         self.stack.set_vexpand(True)
         self.stack.set_hexpand(True)
         
-        # add pages to stack
-        self.genres_page = GenresPage(db_type, db_path, album_art_dir, self.toggle_bottom_bar)
-        self.albums_page = AlbumsPage(db_type, db_path, album_art_dir, self.toggle_bottom_bar)
-        self.songs_page = SongsPage(db_type, db_path, album_art_dir, self.toggle_bottom_bar)
-        self.wrapped_page = WrappedPage(db_type, db_path, album_art_dir, self.toggle_bottom_bar)
-        
-        # page titles w/icons
-        self.stack.add_titled_with_icon(self.genres_page, "genres", "Genres", "view-list-symbolic")
-        self.stack.add_titled_with_icon(self.albums_page, "albums", "Albums", "media-optical-symbolic")
-        self.stack.add_titled_with_icon(self.songs_page, "songs", "Songs", "audio-x-generic-symbolic")
-        self.stack.add_titled_with_icon(self.wrapped_page, "wrapped", "Wrapped", "starred-symbolic")
+        # pages are only built (and load their data) the first time their
+        # tab is shown, until then the stack holds an empty box for each
+        self.genres_page = None
+        self.albums_page = None
+        self.songs_page = None
+        self.wrapped_page = None
+        self.open_start_wrapped_dialog = None
+        self.page_classes = {
+            'genres': GenresPage,
+            'albums': AlbumsPage,
+            'songs': SongsPage,
+            'wrapped': WrappedPage,
+        }
+        self.page_holders = {}
+        for name, title, icon in PAGES:
+            holder = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+            holder.set_vexpand(True)
+            holder.set_hexpand(True)
+            self.page_holders[name] = holder
+            self.stack.add_titled_with_icon(holder, name, title, icon)
+        self.stack.connect('notify::visible-child-name', self._on_visible_page_changed)
         
         # create view switcher
         view_switcher = Adw.ViewSwitcher()
@@ -109,7 +127,6 @@ class MainWindow(Adw.ApplicationWindow):
             self.success_banner, self.refresh_all_pages
         )
         self.overlay.add_overlay(self.menu_btn)
-        self.genres_page.set_start_wrapped_callback(self.open_start_wrapped_dialog)
 
         # add overlay to main box
         main_box.append(self.overlay)
@@ -134,6 +151,49 @@ class MainWindow(Adw.ApplicationWindow):
         self.current_tier = None
         self._pending_tier_update = False
 
+        # only the first tab is needed for the first frame
+        self._show_page(self.stack.get_visible_child_name() or PAGES[0][0])
+
+    def _built_pages(self) -> list:
+        """The pages that have been built so far"""
+        pages = (self.genres_page, self.albums_page, self.songs_page, self.wrapped_page)
+        return [page for page in pages if page is not None]
+
+    def _build_page(self, name: str) -> None:
+        """Builds the given page (if it hasn't been already)"""
+        if getattr(self, f'{name}_page') is not None:
+            return
+
+        page = self.page_classes[name](self.db_type, self.db_path, self.album_art_dir, self.toggle_bottom_bar)
+        page.set_vexpand(True)
+        page.set_hexpand(True)
+        setattr(self, f'{name}_page', page)
+        self.page_holders[name].append(page)
+
+        # catch up on anything that happened before it was built
+        if self.current_tier and hasattr(page, 'rescale'):
+            page.rescale(self.current_tier)
+        if name == 'genres':
+            page.set_start_wrapped_callback(self.open_start_wrapped_dialog)
+
+    def _show_page(self, name: str) -> None:
+        """Builds the shown page, then prefetches the next tab when idle"""
+        self._build_page(name)
+
+        names = [page_name for page_name, _, _ in PAGES]
+        next_name = names[(names.index(name) + 1) % len(names)]
+        GLib.idle_add(self._prefetch_page, next_name, priority=GLib.PRIORITY_LOW)
+
+    def _prefetch_page(self, name: str) -> bool:
+        """Builds a page ahead of it being shown"""
+        self._build_page(name)
+        return False
+
+    def _on_visible_page_changed(self, stack: Adw.ViewStack, _pspec) -> None:
+        name = stack.get_visible_child_name()
+        if name in self.page_classes:
+            self._show_page(name)
+
     def _get_tier(self, width: int) -> str:
         """Get the scale tier name for the given width"""
         for name, min_w, max_w in SCALE_TIERS:
@@ -159,8 +219,8 @@ class MainWindow(Adw.ApplicationWindow):
             widget.add_css_class(tier)
         self.current_tier = tier
 
-        # rescale page images
-        for page in (self.genres_page, self.albums_page, self.songs_page, self.wrapped_page):
+        # rescale page images (pages built later pick up the tier then)
+        for page in self._built_pages():
             if hasattr(page, 'rescale'):
                 page.rescale(tier)
 
@@ -168,21 +228,10 @@ class MainWindow(Adw.ApplicationWindow):
 
     def refresh_all_pages(self) -> None:
         """Refresh all pages after data has been updated"""
-        # refresh genres page
-        if hasattr(self.genres_page, 'refresh'):
-            self.genres_page.refresh()
-
-        # refresh albums page
-        if hasattr(self.albums_page, 'refresh'):
-            self.albums_page.refresh()
-
-        # refresh songs page
-        if hasattr(self.songs_page, 'refresh'):
-            self.songs_page.refresh()
-
-        # refresh wrapped page
-        if hasattr(self.wrapped_page, 'refresh'):
-            self.wrapped_page.refresh()
+        # pages that haven't been built yet will load fresh data when they are
+        for page in self._built_pages():
+            if hasattr(page, 'refresh'):
+                page.refresh()
 
     def toggle_bottom_bar(self) -> None:
         """Toggle between collapsed and expanded bottom bar"""
@@ -1,11 +1,12 @@
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, GLib, Adw
+from gi.repository import Gtk, Gio, Adw
 
 from backend import grab_all_metadata, has_data
 from backend.constants import DEFAULT_ALBUM_IMAGE_SIZE, ALBUM_IMAGE_SIZES
-from ..widgets.album_button import create_album_button
+from ..widgets.album_button import AlbumItem, create_album_grid_factory
+from ..widgets.page_loader import PageLoader, create_loading_placeholder
 
 
 class AlbumsPage(Gtk.Box):
@@ -33,79 +34,82 @@ class AlbumsPage(Gtk.Box):
             Gtk.PolicyType.NEVER,
             Gtk.PolicyType.AUTOMATIC
         )
+        scrolled_window.set_vexpand(True)
         scrolled_window.add_css_class('page-area')
 
-        # setup flowbox for responsive layout
-        self.flowbox = Gtk.FlowBox()
-        self.flowbox.set_valign(Gtk.Align.START)
-        self.flowbox.set_max_children_per_line(30)
-        self.flowbox.set_min_children_per_line(1)
-        self.flowbox.set_selection_mode(Gtk.SelectionMode.NONE)
-        self.flowbox.set_column_spacing(0)
-        self.flowbox.set_row_spacing(0)
-        self.flowbox.set_homogeneous(True)
-        scrolled_window.set_child(self.flowbox)
+        # setup grid (only visible albums get a cell, cells are recycled)
+        self.store = Gio.ListStore(item_type=AlbumItem)
+        factory = create_album_grid_factory(
+            self.db_type, self.db_path, self.album_art_dir, self.nav_view,
+            lambda: self.IMAGE_SIZE, lambda: self.IMAGE_SIZE
+        )
+        self.grid = Gtk.GridView(model=Gtk.NoSelection(model=self.store), factory=factory)
+        self.grid.set_max_columns(30)
+        self.grid.set_min_columns(1)
+        self.grid.add_css_class('album-grid')
+        scrolled_window.set_child(self.grid)
+
+        # shown while albums load
+        self.placeholder = create_loading_placeholder("Loading albums...")
+        content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        content_box.append(self.placeholder)
+        content_box.append(scrolled_window)
 
         # create root navigation page
         root_page = Adw.NavigationPage()
         root_page.set_title("Albums")
-        root_page.set_child(scrolled_window)
+        root_page.set_child(content_box)
 
         # push root page
         self.nav_view.push(root_page)
 
-        # load albums
+        # load albums (in the background)
+        self.loader = PageLoader()
         self._load_albums()
 
-    def _load_albums(self) -> None:
-        """Load and display albums from database"""
+    def _fetch_albums(self) -> list:
+        """Queries the albums (runs on a worker thread)"""
         # check if data exists in database
-        albums = []
-        if has_data(self.db_type, self.db_path):
-            albums = grab_all_metadata(
-                db_type=self.db_type,
-                db_path=self.db_path,
-                album_art_dir=self.album_art_dir
-            )
-
-        if len(albums) == 0 and self.toggle_bottom_bar:
-            # wait to toggle
-            GLib.idle_add(self.toggle_bottom_bar)
-        else:
-            self.albums = albums
-            # populate with album buttons
-            for album in albums:
-                button = create_album_button(self.db_type, self.db_path, self.album_art_dir, album, self.nav_view, self.IMAGE_SIZE, lambda: self.IMAGE_SIZE)
-                self.flowbox.append(button)
+        if not has_data(self.db_type, self.db_path):
+            return []
+        return grab_all_metadata(
+            db_type=self.db_type,
+            db_path=self.db_path,
+            album_art_dir=self.album_art_dir
+        )
+
+    def _load_albums(self) -> None:
+        """Load albums from database without blocking the UI"""
+        self.placeholder.set_visible(True)
+        self.loader.load(self._fetch_albums, self._on_albums_loaded, self._on_load_failed)
+
+    def _on_load_failed(self, error: Exception) -> None:
+        """Hide the placeholder if loading failed (already logged)"""
+        self.placeholder.set_visible(False)
+
+    def _on_albums_loaded(self, albums: list) -> None:
+        """Display the loaded albums"""
+        self.placeholder.set_visible(False)
+        # an empty library doesn't toggle the bottom bar: pages are built
+        # lazily, so per-page toggles would leave it in a random state
+        self.albums = albums
+        # swap the whole model in one go
+        items = [AlbumItem(album) for album in albums]
+        self.store.splice(0, self.store.get_n_items(), items)
 
     def rescale(self, tier: str) -> None:
         """Rescale album art sizes for the given tier"""
         self.IMAGE_SIZE = ALBUM_IMAGE_SIZES.get(tier, DEFAULT_ALBUM_IMAGE_SIZE)
-        btn_size = self.IMAGE_SIZE + 5
-
-        child = self.flowbox.get_first_child()
-        while child:
-            # FlowBoxChild wraps the actual button
-            button = child.get_child() if hasattr(child, 'get_child') else child
-            button.set_size_request(btn_size, btn_size)
-
-            # resize the picture inside the button's box
-            box = button.get_child()
-            if box:
-                pic = box.get_first_child()
-                if pic:
-                    pic.set_size_request(self.IMAGE_SIZE, self.IMAGE_SIZE)
 
-            child = child.get_next_sibling()
+        # re-bind the visible cells at the new size
+        n_items = self.store.get_n_items()
+        if n_items:
+            self.store.items_changed(0, n_items, n_items)
 
     def refresh(self) -> None:
         """Refresh the page by reloading albums from database"""
-        # clear existing album buttons
-        while True:
-            child = self.flowbox.get_first_child()
-            if child is None:
-                break
-            self.flowbox.remove(child)
+        # clear existing albums
+        self.store.remove_all()
 
         # reload albums
         self._load_albums()
@@ -8,6 +8,7 @@ from backend.constants import (
     GENRE_TAG_SIZES, GENRE_RIGHT_PANE_WIDTHS,
 )
 from ..widgets.genre_tag import create_genre_tag
+from ..widgets.page_loader import PageLoader, create_loading_placeholder
 
 
 class GenresPage(Gtk.ScrolledWindow):
@@ -51,7 +52,12 @@ class GenresPage(Gtk.ScrolledWindow):
         self.flowbox.set_row_spacing(0)
         self.flowbox.set_homogeneous(True)
 
-        sw_left.set_child(self.flowbox)
+        # shown while genres load
+        self.placeholder = create_loading_placeholder("Loading genres...")
+        left_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        left_box.append(self.placeholder)
+        left_box.append(self.flowbox)
+        sw_left.set_child(left_box)
         
         # finish paned setup
         paned.set_start_child(sw_left)
@@ -63,18 +69,31 @@ class GenresPage(Gtk.ScrolledWindow):
         paned.set_shrink_end_child(False)
         
         self.set_child(paned)
-        
-    def _load_genre_tags(self) -> None:
-        """Load and display genres from database"""
+        self.loader = PageLoader()
+
+    def _fetch_genre_mappings(self) -> list:
+        """Queries the genres (runs on a worker thread)"""
         # check if data exists in database
-        genre_mappings = []
-        if has_data(self.db_type, self.db_path):
-            genre_mappings = create_genre_mappings(
-                db_type=self.db_type,
-                db_path=self.db_path,
-                album_art_dir=self.album_art_dir
-            )
-            
+        if not has_data(self.db_type, self.db_path):
+            return []
+        return create_genre_mappings(
+            db_type=self.db_type,
+            db_path=self.db_path,
+            album_art_dir=self.album_art_dir
+        )
+
+    def _load_genre_tags(self) -> None:
+        """Load genres from database without blocking the UI"""
+        self.placeholder.set_visible(True)
+        self.loader.load(self._fetch_genre_mappings, self._on_genres_loaded, self._on_load_failed)
+
+    def _on_load_failed(self, error: Exception) -> None:
+        """Hide the placeholder if loading failed (already logged)"""
+        self.placeholder.set_visible(False)
+
+    def _on_genres_loaded(self, genre_mappings: list) -> None:
+        """Display the loaded genres"""
+        self.placeholder.set_visible(False)
         if len(genre_mappings) == 0 and self.open_start_wrapped:
             # open 'Start Wrapped' popup
             GLib.idle_add(self.open_start_wrapped)
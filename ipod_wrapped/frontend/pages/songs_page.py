@@ -1,13 +1,13 @@
 import gi
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, GLib, Gio
+from gi.repository import Gtk, Gio
 
-from backend import has_data, grab_all_songs, ms_to_mmss
+from backend import has_data, grab_songs_page, ms_to_mmss
 from backend.constants import DEFAULT_SONG_INFO_IMAGE_SIZE, SONG_INFO_IMAGE_SIZES
-from ..widgets.songs_table import create_song_store, create_song_selection_model, create_songs_table, Song
+from ..widgets.songs_table import create_song_store, create_song_selection_model, create_songs_table, populate_song_store, Song, SongRecords
 from ..widgets.song_info import display_song_info
+from ..widgets.page_loader import PageLoader, create_loading_placeholder
 
-# TODO: fix 'sorter' not bringing user back to top of table.
 # TODO: fix wonky resizing
 
 class SongsPage(Gtk.Box):
@@ -46,49 +46,146 @@ class SongsPage(Gtk.Box):
         )
         self.scrolled_window.set_vexpand(True)
 
-        # create table
+        # create table (sorted by the db, a page at a time)
         self.songs_table: Gtk.ColumnView = create_songs_table(
             self.selection,
             self.sort_model,
-            scroll_to_top_callback=self._scroll_to_top
+            scroll_to_top_callback=self._scroll_to_top,
+            on_sort_changed=self._on_sort_changed
         )
         self.scrolled_window.set_child(self.songs_table)
+
+        # fetch more songs when scrolled near the end (or the table isn't full yet)
+        vadj = self.scrolled_window.get_vadjustment()
+        vadj.connect('value-changed', lambda adj: self._maybe_load_next_page())
+        vadj.connect('changed', lambda adj: self._maybe_load_next_page())
+
+        # shown while songs load
+        self.placeholder = create_loading_placeholder("Loading songs...")
+        self.append(self.placeholder)
         self.append(self.scrolled_window)
 
         # selection changed signal
         self.selection.connect('selection-changed', self._on_selection_changed)
 
-        # load songs
+        # load songs (in the background)
+        self.records = SongRecords()
+        self.sort = 'title'
+        self.sort_descending = False
+        self.next_page = None
+        self.loading_page = False
+        self.cancel_populate = None
+        self.loader = PageLoader()
         self._load_songs()
-    
+
+    def _fetch_songs_page(self, after=None) -> tuple:
+        """Queries a page of songs and prepares their table rows (runs on a worker thread)
+
+        Args:
+            after (Optional[tuple]): Where the page starts, None for the first page
+
+        Returns:
+            tuple: (songs, rows, next page)
+        """
+        if after is None and not has_data(self.db_type, self.db_path):
+            return [], [], None
+        page = grab_songs_page(
+            db_type=self.db_type,
+            db_path=self.db_path,
+            album_art_dir=self.album_art_dir,
+            sort=self.sort,
+            descending=self.sort_descending,
+            after=after
+        )
+        songs = page['songs']
+        song_ids = self.records.add(songs)
+        rows = [(song['title'], song['artist'], song['album'], ms_to_mmss(song['duration']), song_id,
+                 song['duration'], song['metadata']['total_plays'])
+                for song, song_id in zip(songs, song_ids)]
+        return songs, rows, page['next']
+
     def _load_songs(self) -> None:
-        """Load songs into the songs store"""
-        songs = []
-        if has_data(self.db_type, self.db_path):
-            songs = grab_all_songs(
-                db_type=self.db_type,
-                db_path=self.db_path,
-                album_art_dir=self.album_art_dir
-            )
+        """Load the first page of songs without blocking the UI"""
+        self._stop_populating()
+        self.placeholder.set_visible(True)
+        self.scrolled_window.set_visible(False)
+        self.next_page = None
+        self.loading_page = True
+        self.records.clear()
+        self.loader.load(self._fetch_songs_page, self._on_songs_loaded, self._on_load_failed)
+
+    def _load_next_page(self) -> None:
+        """Load the next page of songs (if there is one) in the background"""
+        if self.loading_page or self.next_page is None:
+            return
+        self.loading_page = True
+        after = self.next_page
+        self.loader.load(lambda: self._fetch_songs_page(after), self._on_next_page_loaded, self._on_load_failed)
 
-        if len(songs) == 0 and self.toggle_bottom_bar:
-            # wait to toggle
-            GLib.idle_add(self.toggle_bottom_bar)
+    def _maybe_load_next_page(self) -> None:
+        """Load the next page if less than a screen of songs is left below"""
+        vadj = self.scrolled_window.get_vadjustment()
+        remaining = vadj.get_upper() - (vadj.get_value() + vadj.get_page_size())
+        if remaining < vadj.get_page_size():
+            self._load_next_page()
+
+    def _stop_populating(self) -> None:
+        """Stop adding a page that's still going into the store"""
+        if self.cancel_populate:
+            self.cancel_populate()
+            self.cancel_populate = None
+
+    def _on_load_failed(self, error: Exception) -> None:
+        """Hide the placeholder if loading failed (already logged)"""
+        self.placeholder.set_visible(False)
+        self.scrolled_window.set_visible(True)
+        self.loading_page = False
+
+    def _on_songs_loaded(self, result: tuple) -> None:
+        """Populate the store with the first page of songs"""
+        songs, rows, next_page = result
+        self.placeholder.set_visible(False)
+        self.scrolled_window.set_visible(True)
+        self.next_page = next_page
+        if len(songs) == 0:
+            # nothing to show (the bottom bar is left alone, see AlbumsPage)
+            self.store.remove_all()
+            self.loading_page = False
         else:
-            self.songs = songs
-            # populate with songs
-            for song in songs:
-                song_obj = Song(
-                    title=song['title'],
-                    artist=song['artist'],
-                    album=song['album'],
-                    duration=ms_to_mmss(song['duration'])
-                )
-                self.store.append(song_obj)
-
-            # auto-select first song
-            if len(songs) > 0:
-                GLib.idle_add(self._select_first_song)
+            # populate in chunks, then auto-select first song
+            self.cancel_populate = populate_song_store(
+                self.store, self.sort_model, rows,
+                on_done=self._on_first_page_added
+            )
+
+    def _on_first_page_added(self) -> None:
+        """Back to the top, with the first song selected"""
+        self._on_page_added()
+        self._scroll_to_top()
+        self._select_first_song()
+
+    def _on_next_page_loaded(self, result: tuple) -> None:
+        """Add the next page of songs to the end of the table"""
+        songs, rows, next_page = result
+        self.next_page = next_page
+        self.cancel_populate = populate_song_store(
+            self.store, self.sort_model, rows,
+            on_done=self._on_page_added, replace=False
+        )
+
+    def _on_page_added(self) -> None:
+        """A page is in, the next one can be fetched"""
+        self.cancel_populate = None
+        self.loading_page = False
+        self._maybe_load_next_page()
+
+    def _on_sort_changed(self, column: str, descending: bool) -> None:
+        """Reload from the first page in the table's new sort order"""
+        self.sort = column or 'title'
+        self.sort_descending = descending
+        self.song_info_box.set_visible(False)
+        self.selected_song_index = None
+        self._load_songs()
 
     def _select_first_song(self) -> bool:
         """Selects the first song in the table and retriggers display"""
@@ -112,13 +209,9 @@ class SongsPage(Gtk.Box):
         # find song data
         song_data = None
         if isinstance(selected, Song):
-            for song in self.songs:
-                if (song['title'] == selected.title and
-                    song['artist'] == selected.artist and
-                    song['album'] == selected.album):
-                    song_data = song
-                    self.selected_song_index = selected_pos
-                    break
+            song_data = self.records.get(selected.song_id)
+            if song_data:
+                self.selected_song_index = selected_pos
 
         if song_data:
             # clear box
@@ -151,6 +244,7 @@ class SongsPage(Gtk.Box):
 
     def refresh(self) -> None:
         """Refresh the page by reloading songs from database"""
+        self._stop_populating()
         self.store.remove_all()
         self.song_info_box.set_visible(False)
         self.selected_song_index = None
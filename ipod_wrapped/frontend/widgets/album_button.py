@@ -4,12 +4,26 @@ import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 gi.require_foreign('cairo')
-from gi.repository import Gtk, Gdk, Gio, Pango, GdkPixbuf, Adw, GLib
+from gi.repository import Gtk, Gdk, Gio, Pango, Adw, GLib, GObject
 
 from backend import grab_all_songs, ms_to_mmss
-from backend.constants import DEFAULT_SONG_INFO_IMAGE_SIZE
-from .songs_table import create_song_store, create_song_selection_model, create_songs_table, Song
+from backend.constants import (
+    DEFAULT_SONG_INFO_IMAGE_SIZE, DEFAULT_ROUNDED_ART_DIR,
+    ROUNDED_ART_CACHE_MAX_BYTES, ROUNDED_ART_DISK_MAX_BYTES
+)
+from .songs_table import create_song_store, create_song_selection_model, create_songs_table, Song, SongRecords
 from .song_info import display_song_info
+from .art_loader import load_art_pixbuf, art_cache_key, TextureCache, PngCache
+
+class AlbumItem(GObject.Object):
+    """An album in the album grid's model"""
+    __gtype_name__ = 'AlbumItem'
+
+    def __init__(self, album_info: dict) -> None:
+        """Initialize with album metadata (art, name, artist, genres, songs)"""
+        super().__init__()
+        self.album_info = album_info
+
 
 def create_album_button(db_type: str, db_path: str, album_art_dir: str, album_info: dict, nav_view: Adw.NavigationView, image_size: int = 120, get_song_image_size=None) -> Gtk.Button:
     """Creates a button with Album Art, Name, and Artist.
@@ -26,12 +40,58 @@ def create_album_button(db_type: str, db_path: str, album_art_dir: str, album_in
     Returns:
         Gtk.Button: The button with album art and info
     """
-    art, name, artist, _, _ = album_info.values()
-    button = Gtk.Button()
+    button = _create_album_cell()
+    _bind_album_cell(button, album_info, image_size)
+    button.connect("clicked", lambda btn: _show_album_info(album_info, db_type, db_path, album_art_dir, nav_view, get_song_image_size))
+    return button
 
-    # setup
-    BUTTON_SIZE = image_size + 5
-    button.set_size_request(BUTTON_SIZE, BUTTON_SIZE)
+def create_album_grid_factory(db_type: str, db_path: str, album_art_dir: str, nav_view: Adw.NavigationView, get_image_size, get_song_image_size=None) -> Gtk.SignalListItemFactory:
+    """Creates the factory for a grid of AlbumItems. Cells are recycled as the
+    grid scrolls, so only visible albums have widgets and art is only decoded
+    (and rounded) when an album is bound to a cell.
+
+    Args:
+        db_type (str):
+        db_path (str):
+        album_art_dir (str):
+        nav_view (Adw.NavigationView): Navigation view to push detail page onto
+        get_image_size (callable): Returns current album art size
+        get_song_image_size (callable): Returns current scaled image size for song info display
+
+    Returns:
+        Gtk.SignalListItemFactory: The factory
+    """
+    def on_setup(factory, list_item):
+        button = _create_album_cell()
+        # the cell is reused for other albums, so look the album up on click
+        button.connect("clicked", lambda btn: on_clicked(list_item))
+        list_item.set_child(button)
+        list_item.set_activatable(False)
+
+    def on_bind(factory, list_item):
+        item = list_item.get_item()
+        if isinstance(item, AlbumItem):
+            _bind_album_cell(list_item.get_child(), item.album_info, get_image_size())
+
+    def on_unbind(factory, list_item):
+        # let go of the texture while the cell is offscreen
+        picture = list_item.get_child().get_child().get_first_child()
+        picture.set_paintable(None)
+
+    def on_clicked(list_item):
+        item = list_item.get_item()
+        if isinstance(item, AlbumItem):
+            _show_album_info(item.album_info, db_type, db_path, album_art_dir, nav_view, get_song_image_size)
+
+    factory = Gtk.SignalListItemFactory()
+    factory.connect('setup', on_setup)
+    factory.connect('bind', on_bind)
+    factory.connect('unbind', on_unbind)
+    return factory
+
+def _create_album_cell() -> Gtk.Button:
+    """Creates an empty album button (picture + name + artist)"""
+    button = Gtk.Button()
     button.set_hexpand(False)
     button.set_vexpand(False)
     button.add_css_class('album-button')
@@ -39,19 +99,16 @@ def create_album_button(db_type: str, db_path: str, album_art_dir: str, album_in
     box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
     box.set_spacing(5)
 
-    # setup rounded image
-    texture = __round_image(art, image_size, 2)
-    picture = Gtk.Picture.new_for_paintable(texture)
-    picture.set_size_request(image_size, image_size)
+    picture = Gtk.Picture()
 
     # setup labels (will truncate with '...')
-    name_label = Gtk.Label(label=name)
+    name_label = Gtk.Label()
     name_label.set_ellipsize(Pango.EllipsizeMode.END)
     name_label.set_max_width_chars(12)
     name_label.set_justify(Gtk.Justification.CENTER)
     name_label.add_css_class('album-name-label')
 
-    artist_label = Gtk.Label(label=artist)
+    artist_label = Gtk.Label()
     artist_label.set_ellipsize(Pango.EllipsizeMode.END)
     artist_label.set_max_width_chars(12)
     artist_label.set_justify(Gtk.Justification.CENTER)
@@ -63,9 +120,26 @@ def create_album_button(db_type: str, db_path: str, album_art_dir: str, album_in
     box.append(artist_label)
 
     button.set_child(box)
-    button.connect("clicked", lambda btn: _show_album_info(album_info, db_type, db_path, album_art_dir, nav_view, get_song_image_size))
     return button
 
+def _bind_album_cell(button: Gtk.Button, album_info: dict, image_size: int) -> None:
+    """Fills an album button with the given album's art and info"""
+    art, name, artist, _, _ = album_info.values()
+    BUTTON_SIZE = image_size + 5
+    button.set_size_request(BUTTON_SIZE, BUTTON_SIZE)
+
+    box = button.get_child()
+    picture = box.get_first_child()
+    name_label = picture.get_next_sibling()
+    artist_label = name_label.get_next_sibling()
+
+    # setup rounded image
+    picture.set_paintable(__round_image(art, image_size, 2))
+    picture.set_size_request(image_size, image_size)
+
+    name_label.set_label(name)
+    artist_label.set_label(artist)
+
 def _show_album_info(album_info: dict, db_type: str, db_path: str, album_art_dir: str, nav_view: Adw.NavigationView, get_song_image_size=None) -> None:
     """Shows the given album info when an album cover is clicked
     Absolutely insanity how chunky this function got. TODO: come back and make better
@@ -117,8 +191,9 @@ def _show_album_info(album_info: dict, db_type: str, db_path: str, album_art_dir
     detail_page.set_child(toolbar_view)
 
     # load songs
+    records = SongRecords()
     songs_data = _load_album_songs(
-        album_name, store, db_type,
+        album_name, store, records, db_type,
         db_path, album_art_dir
     )
 
@@ -130,11 +205,7 @@ def _show_album_info(album_info: dict, db_type: str, db_path: str, album_art_dir
             return
 
         # find song data
-        song_data = None
-        for song in songs_data:
-            if song['title'] == selected.title:
-                song_data = song
-                break
+        song_data = records.get(selected.song_id)
 
         if song_data:
             # clear box
@@ -166,8 +237,8 @@ def _show_album_info(album_info: dict, db_type: str, db_path: str, album_art_dir
     # push onto navigation stack
     nav_view.push(detail_page)
     
-def _load_album_songs(album_name: str, store: Gio.ListStore, db_type: str, db_path: str, album_art_dir: str):
-    """Load songs of the given album into the songs store
+def _load_album_songs(album_name: str, store: Gio.ListStore, records: SongRecords, db_type: str, db_path: str, album_art_dir: str):
+    """Load songs of the given album into the songs store (and their data into records)
 
     Returns:
         list: The songs data loaded from the database
@@ -178,24 +249,49 @@ def _load_album_songs(album_name: str, store: Gio.ListStore, db_type: str, db_pa
         album_art_dir=album_art_dir,
         filters={'album': album_name}
     )
-    for song in songs:
-        song_obj = Song(
-            title=song['title'],
-            duration=ms_to_mmss(song['duration'])
-        )
-        store.append(song_obj)
+    # add them all at once, so the table only updates (and sorts) once
+    song_ids = records.add(songs)
+    store.splice(0, 0, [
+        Song(title=song['title'], duration=ms_to_mmss(song['duration']), song_id=song_id,
+             duration_ms=song['duration'], play_count=song['metadata']['total_plays'])
+        for song, song_id in zip(songs, song_ids)
+    ])
     return songs
 
 
+# rounded textures, keyed by (art path, size, mtime, radius, shadow). albums
+# sharing a cover share an art path, so each unique cover is only rounded once
+# per size. finished covers are also saved as pngs (one dir per size, i.e. per
+# scale tier), so refreshes and restarts skip the cairo work
+_rounded_textures = TextureCache(ROUNDED_ART_CACHE_MAX_BYTES)
+_rounded_pngs = PngCache(DEFAULT_ROUNDED_ART_DIR, ROUNDED_ART_DISK_MAX_BYTES)
+
+
+def _rounded_png_path(key: tuple) -> str:
+    """Where the rounded cover for the given cache key is saved (named by
+    the cover's mtime, so a changed cover replaces its old png)"""
+    art_path, size, mtime, radius, shadow = key
+    return _rounded_pngs.path(f"{size}px", (art_path, radius, shadow), mtime)
+
+
 def __round_image(filename, size, radius=15, shadow=True):
     """Round image corners using Cairo"""
+    key = art_cache_key(filename, size) + (radius, shadow)
+    texture = _rounded_textures.get(key)
+    if texture is not None:
+        return texture
+
+    # rounded before (maybe in an earlier run)
+    png_path = _rounded_png_path(key)
+    texture = _rounded_pngs.load(png_path)
+    if texture is not None:
+        _rounded_textures.put(key, texture)
+        return texture
+
     # load image
-    pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
-        filename=filename,
-        width=size,
-        height=size,
-        preserve_aspect_ratio=True
-    )
+    pixbuf = load_art_pixbuf(filename, size)
+    if pixbuf is None:
+        return None
     width = pixbuf.get_width()
     height = pixbuf.get_height()
     
@@ -241,4 +337,6 @@ def __round_image(filename, size, radius=15, shadow=True):
     # convert to texture
     rounded_pixbuf = Gdk.pixbuf_get_from_surface(surface, 0, 0, canvas_width, canvas_height)
     texture = Gdk.Texture.new_for_pixbuf(rounded_pixbuf)
+    _rounded_textures.put(key, texture)
+    _rounded_pngs.save(rounded_pixbuf, png_path)
     return texture
\ No newline at end of file
@@ -0,0 +1,282 @@
+import os
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Hashable
+import gi
+gi.require_version('Gtk', '4.0')
+gi.require_version('GdkPixbuf', '2.0')
+from gi.repository import Gtk, Gdk, GdkPixbuf, Gio, GLib
+
+from backend import read_art_bytes, is_art_pack_ref
+from backend.constants import ART_TEXTURE_CACHE_MAX_BYTES
+
+
+class TextureCache:
+    """LRU of finished textures, bounded by their decoded size in bytes"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._textures: OrderedDict = OrderedDict()  # {key: (texture, n bytes)}
+
+    def get(self, key: Hashable) -> Optional[Gdk.Texture]:
+        """Returns the cached texture (marking it recently used), None if missing"""
+        entry = self._textures.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._textures.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, texture: Gdk.Texture) -> None:
+        """Caches a texture, evicting the least recently used ones to stay in budget"""
+        n_bytes = texture.get_width() * texture.get_height() * 4
+        old = self._textures.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        if n_bytes > self.max_bytes:
+            return
+
+        self._textures[key] = (texture, n_bytes)
+        self.total_bytes += n_bytes
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self._textures.popitem(last=False)
+            self.total_bytes -= evicted_bytes
+
+    def clear(self) -> None:
+        self._textures.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counts and current size, for checking the cache earns its keep"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'textures': len(self._textures),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+
+class PngCache:
+    """Rendered covers saved as pngs (so restarts skip the rendering), bounded
+    by their file size in bytes. Each source only keeps its newest version,
+    and the least recently used files are deleted to stay in budget (which is
+    also what clears out covers whose source has gone)."""
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._files: Optional[OrderedDict] = None  # {png path: n bytes}, least recently used first
+        self._versions = {}  # {(dir, source digest): png path}
+
+    @staticmethod
+    def _source_of(png_path: str) -> tuple:
+        """The (dir, source digest) a png was rendered from"""
+        return os.path.dirname(png_path), os.path.basename(png_path).rsplit('-', 1)[0]
+
+    def path(self, subdir: str, source: Hashable, version) -> str:
+        """Where the given version of a source is saved
+
+        Args:
+            subdir (str): Directory under the root (e.g. one per size)
+            source (Hashable): What was rendered (art path + options)
+            version: Changes whenever the source does (e.g. its mtime)
+        """
+        digest = hashlib.sha1(repr(source).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, subdir, f"{digest}-{version}.png")
+
+    def _index(self) -> OrderedDict:
+        """Lists the saved pngs on first use, oldest first"""
+        if self._files is None:
+            found = []
+            for dir_path, _, names in os.walk(self.root):
+                for name in names:
+                    png_path = os.path.join(dir_path, name)
+                    try:
+                        if name.endswith('.tmp'):
+                            # left by a crash mid-save
+                            os.remove(png_path)
+                            continue
+                        stat = os.stat(png_path)
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime_ns, png_path, stat.st_size))
+
+            found.sort()
+            self._files = OrderedDict()
+            for _, png_path, n_bytes in found:
+                self._add(png_path, n_bytes)
+            self._evict()
+        return self._files
+
+    def _add(self, png_path: str, n_bytes: int) -> None:
+        """Records a saved png, dropping the older version of its source"""
+        source = self._source_of(png_path)
+        old_path = self._versions.get(source)
+        if old_path is not None and old_path != png_path:
+            self._remove(old_path)
+        self._versions[source] = png_path
+        self.total_bytes += n_bytes - self._files.pop(png_path, 0)
+        self._files[png_path] = n_bytes
+
+    def _remove(self, png_path: str) -> None:
+        """Deletes a png (and forgets it)"""
+        self.total_bytes -= self._files.pop(png_path, 0)
+        source = self._source_of(png_path)
+        if self._versions.get(source) == png_path:
+            del self._versions[source]
+        try:
+            os.remove(png_path)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Deletes the least recently used pngs until back in budget"""
+        while self.total_bytes > self.max_bytes and self._files:
+            self._remove(next(iter(self._files)))
+
+    def load(self, png_path: str) -> Optional[Gdk.Texture]:
+        """Loads a saved png (marking it recently used), None if there isn't one"""
+        files = self._index()
+        if png_path not in files:
+            return None
+        try:
+            texture = Gdk.Texture.new_from_filename(png_path)
+        except GLib.Error:
+            self._remove(png_path)
+            return None
+
+        files.move_to_end(png_path)
+        try:
+            # so the order survives restarts
+            os.utime(png_path)
+        except OSError:
+            pass
+        return texture
+
+    def save(self, pixbuf: GdkPixbuf.Pixbuf, png_path: str) -> None:
+        """Saves a rendered cover (written to a temp file first, so a crash
+        never leaves a half-written png behind)"""
+        self._index()
+        try:
+            os.makedirs(os.path.dirname(png_path), exist_ok=True)
+            tmp_path = png_path + '.tmp'
+            pixbuf.savev(tmp_path, 'png', [], [])
+            os.replace(tmp_path, png_path)
+            n_bytes = os.path.getsize(png_path)
+        except (OSError, GLib.Error) as e:
+            print(f"Failed to save rendered album art {png_path}: {e}")
+            return
+
+        self._add(png_path, n_bytes)
+        self._evict()
+
+
+# decoded covers shared by every widget in the process, keyed by (art path,
+# size, mtime). covers are content-addressed, so albums sharing a cover share
+# a path and each cover is only decoded once per size
+_art_textures = TextureCache(ART_TEXTURE_CACHE_MAX_BYTES)
+
+
+def art_cache_key(art_path: str, size: Optional[int]) -> tuple:
+    """Builds the decode cache key for the given art path + size"""
+    if is_art_pack_ref(art_path):
+        return (art_path, size, 0)
+    try:
+        mtime = os.stat(art_path).st_mtime_ns
+    except OSError:
+        mtime = 0
+    return (art_path, size, mtime)
+
+
+def _art_bytes(art_path: str) -> Optional[GLib.Bytes]:
+    """Wraps the packed image behind the given art ref in GLib.Bytes"""
+    data = read_art_bytes(art_path)
+    if data is None:
+        return None
+    return GLib.Bytes.new(bytes(data))
+
+
+def load_art_texture(art_path: str, size: Optional[int] = None) -> Optional[Gdk.Texture]:
+    """Loads album art (a loose file or a packed art ref) as a texture, through
+    the shared texture cache
+
+    Args:
+        art_path (str): Path to the cover, or an art ref into the packed store
+        size (Optional[int]): Scale to fit within size x size. Defaults to None (full size).
+
+    Returns:
+        Optional[Gdk.Texture]: The decoded texture, None if it couldn't be loaded
+    """
+    key = art_cache_key(art_path, size)
+    texture = _art_textures.get(key)
+    if texture is not None:
+        return texture
+
+    if size is not None:
+        pixbuf = load_art_pixbuf(art_path, size)
+        texture = Gdk.Texture.new_for_pixbuf(pixbuf) if pixbuf is not None else None
+    else:
+        try:
+            if is_art_pack_ref(art_path):
+                data = _art_bytes(art_path)
+                texture = Gdk.Texture.new_from_bytes(data) if data is not None else None
+            else:
+                texture = Gdk.Texture.new_from_filename(art_path)
+        except GLib.Error as e:
+            print(f"Failed to load album art {art_path}: {e}")
+            return None
+
+    if texture is not None:
+        _art_textures.put(key, texture)
+    return texture
+
+
+def load_art_pixbuf(art_path: str, size: int) -> Optional[GdkPixbuf.Pixbuf]:
+    """Decodes album art (a loose file or a packed art ref) scaled to fit
+    within size x size. Not cached - callers cache what they make from it
+
+    Args:
+        art_path (str): Path to the cover, or an art ref into the packed store
+        size (int): Max width/height in pixels
+
+    Returns:
+        Optional[GdkPixbuf.Pixbuf]: The scaled pixbuf, None if it couldn't be loaded
+    """
+    try:
+        if is_art_pack_ref(art_path):
+            data = _art_bytes(art_path)
+            if data is None:
+                return None
+            stream = Gio.MemoryInputStream.new_from_bytes(data)
+            return GdkPixbuf.Pixbuf.new_from_stream_at_scale(stream, size, size, True, None)
+        return GdkPixbuf.Pixbuf.new_from_file_at_scale(
+            filename=art_path,
+            width=size,
+            height=size,
+            preserve_aspect_ratio=True
+        )
+    except GLib.Error as e:
+        print(f"Failed to load album art {art_path}: {e}")
+        return None
+
+
+def art_cache_stats() -> dict:
+    """Hit/miss counts and size of the shared texture cache"""
+    return _art_textures.stats()
+
+
+def set_image_art(image: Gtk.Image, art_path: str, size: Optional[int] = None) -> None:
+    """Shows the given album art in a Gtk.Image
+
+    Args:
+        image (Gtk.Image): The image to show it in
+        art_path (str): Path to the cover, or an art ref into the packed store
+        size (Optional[int]): Size it's shown at, so it's decoded no bigger. Defaults to None (full size).
+    """
+    image.set_from_paintable(load_art_texture(art_path, size))
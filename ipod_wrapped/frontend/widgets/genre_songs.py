@@ -1,10 +1,23 @@
+import os
 from typing import List, Optional, Callable
 import gi
 import random
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk
+from gi.repository import Gtk, Gio, GObject
 
-from backend.constants import DEFAULT_GENRE_HEADER_IMAGE_SIZE, DEFAULT_GENRE_SONG_IMAGE_SIZE
+from backend.constants import DEFAULT_GENRE_HEADER_IMAGE_SIZE, DEFAULT_GENRE_SONG_IMAGE_SIZE, DEFAULT_ALBUM_ART_DIR
+from .art_loader import set_image_art
+
+MISSING_COVER_NAME = "missing_album_cover.jpg"
+
+class GenreSong(GObject.Object):
+    """A song in a genre's song list"""
+    __gtype_name__ = 'GenreSong'
+
+    def __init__(self, song_info: dict) -> None:
+        """Initialize with song info (song, artist, art_path)"""
+        super().__init__()
+        self.song_info = song_info
 
 def display_genre_songs(
     genre_info: dict,
@@ -36,9 +49,7 @@ def display_genre_songs(
     total_mins = total_elapsed_ms // 60000
 
     # choose random cover art
-    genre_art: str = ""
-    while genre_art == "" or genre_art.endswith("missing_album_cover.jpg"):
-        genre_art = random.choice(songs)["art_path"]
+    genre_art = choose_genre_art(songs)
 
     # header box: image on left, text on right
     header_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
@@ -48,7 +59,7 @@ def display_genre_songs(
 
     # left side: cover image
     image = Gtk.Image()
-    image.set_from_file(genre_art)
+    set_image_art(image, genre_art, header_image_size)
     image.set_pixel_size(header_image_size)
     image.add_css_class('genre-image')
     header_box.append(image)
@@ -120,23 +131,66 @@ def display_genre_songs(
     songs_scroll.set_vexpand(True)
     content_box.append(songs_scroll)
 
-    songs_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
-    songs_scroll.set_child(songs_box)
-
-    # load in songs
-    for song_info in songs:
-        listing = create_song_listing(song_info, play_song_callback, song_image_size)
-        songs_box.append(listing)
+    # only visible songs get a row (rows are recycled), so art is only
+    # loaded for what's on screen
+    store = Gio.ListStore(item_type=GenreSong)
+    store.splice(0, 0, [GenreSong(song_info) for song_info in songs])
+    songs_list = Gtk.ListView(
+        model=Gtk.NoSelection(model=store),
+        factory=create_song_listing_factory(song_image_size)
+    )
+    songs_list.add_css_class('genre-songs-list')
+    songs_scroll.set_child(songs_list)
 
     return content_box
 
+def choose_genre_art(songs: List[dict]) -> str:
+    """Picks a random cover from the songs that have one
+
+    Returns:
+        str: The cover's art path, the missing cover if none of the songs have art
+    """
+    with_art = [song["art_path"] for song in songs
+                if song["art_path"] and not song["art_path"].endswith(MISSING_COVER_NAME)]
+    if with_art:
+        return random.choice(with_art)
+    return os.path.join(str(DEFAULT_ALBUM_ART_DIR), MISSING_COVER_NAME)
+
+def create_song_listing_factory(image_size: int = DEFAULT_GENRE_SONG_IMAGE_SIZE) -> Gtk.SignalListItemFactory:
+    """Creates the factory for a list of GenreSongs (rows are recycled as the
+    list scrolls, art comes from the shared texture cache)"""
+    def on_setup(factory, list_item):
+        list_item.set_child(_create_song_row(image_size))
+
+    def on_bind(factory, list_item):
+        item = list_item.get_item()
+        if isinstance(item, GenreSong):
+            _bind_song_row(list_item.get_child(), item.song_info, image_size)
+
+    def on_unbind(factory, list_item):
+        # let go of the art while the row is offscreen
+        list_item.get_child().get_first_child().clear()
+
+    factory = Gtk.SignalListItemFactory()
+    factory.connect('setup', on_setup)
+    factory.connect('bind', on_bind)
+    factory.connect('unbind', on_unbind)
+    return factory
+
 def create_song_listing(
     song_info: dict,
     play_song_callback: Optional[Callable] = None,
     image_size: int = DEFAULT_GENRE_SONG_IMAGE_SIZE,
 ) -> Gtk.Box:
-    song, artist, art_path = song_info.values()
+    box = _create_song_row(image_size)
+    _bind_song_row(box, song_info, image_size)
+    
+    # TODO: add right click with menu showing 'add to queue' 'play next'
+    
+    return box
 
+def _create_song_row(image_size: int) -> Gtk.Box:
+    """Creates an empty song listing (album art + song/artist text)"""
     # listing box
     box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=4)
     box.set_halign(Gtk.Align.START)
@@ -144,25 +198,26 @@ def create_song_listing(
 
     # album art
     image = Gtk.Image()
-    image.set_from_file(art_path)
     image.set_pixel_size(image_size)
     image.add_css_class('genre-song-art')
     box.append(image)
     
     # song and artist text
     text_label = Gtk.Label()
-    full_text = f"{song} • {artist}"
-    text_label.set_label(full_text)
     text_label.set_halign(Gtk.Align.START)
     text_label.set_ellipsize(3)
     text_label.set_xalign(0)
     text_label.set_hexpand(True)
     text_label.add_css_class('genre-song-text')
     box.append(text_label)
-    
-    # TODO: add right click with menu showing 'add to queue' 'play next'
-    
     return box
+
+def _bind_song_row(box: Gtk.Box, song_info: dict, image_size: int) -> None:
+    """Fills a song listing with the given song"""
+    song, artist, art_path = song_info.values()
+    image = box.get_first_child()
+    set_image_art(image, art_path, image_size)
+    box.get_last_child().set_label(f"{song} • {artist}")
     
 def clear_content_box(box: Gtk.Box) -> None:
     """Clears existing content from the given box"""
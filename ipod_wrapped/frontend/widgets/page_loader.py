@@ -0,0 +1,94 @@
+import threading
+import traceback
+from typing import Any, Callable, Optional
+import gi
+gi.require_version('Gtk', '4.0')
+from gi.repository import Gtk, GLib
+
+
+class PageLoader:
+    """Runs a page's data queries on a worker thread and hands the results
+    back on the main thread. Every load (or cancel) starts a new generation,
+    so results from a stale load are dropped instead of shown."""
+
+    def __init__(self) -> None:
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def load(self, fetch: Callable[[], Any], on_loaded: Callable[[Any], None],
+             on_error: Optional[Callable[[Exception], None]] = None) -> int:
+        """Starts loading in the background
+
+        Args:
+            fetch (Callable[[], Any]): Does the heavy lifting (runs on a worker thread,
+                                       must not touch widgets)
+            on_loaded (Callable[[Any], None]): Gets fetch's result (runs on the main thread)
+            on_error (Optional[Callable[[Exception], None]]): Gets any error fetch raised
+                                                              (runs on the main thread)
+
+        Returns:
+            int: This load's generation
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+
+        def run_fetch():
+            try:
+                result, error = fetch(), None
+            except Exception as e:
+                print(f"Failed to load page data: {e}")
+                print(traceback.format_exc())
+                result, error = None, e
+            GLib.idle_add(self._deliver, generation, result, error, on_loaded, on_error)
+
+        thread = threading.Thread(target=run_fetch)
+        thread.daemon = True
+        thread.start()
+        return generation
+
+    def _deliver(self, generation: int, result: Any, error: Optional[Exception],
+                 on_loaded: Callable, on_error: Optional[Callable]) -> bool:
+        """Hands a finished load to the page, unless a newer one has started"""
+        if self.is_current(generation):
+            if error is None:
+                on_loaded(result)
+            elif on_error:
+                on_error(error)
+        return False
+
+    def cancel(self) -> None:
+        """Drops the results of any load still running"""
+        with self._lock:
+            self._generation += 1
+
+    def is_current(self, generation: int) -> bool:
+        """Whether the given load is still the latest"""
+        with self._lock:
+            return generation == self._generation
+
+
+def create_loading_placeholder(text: str) -> Gtk.Box:
+    """Creates a spinner + label to show while a page's data loads
+
+    Args:
+        text (str): What's loading, e.g. "Loading albums..."
+
+    Returns:
+        Gtk.Box: The placeholder
+    """
+    box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+    box.set_halign(Gtk.Align.CENTER)
+    box.set_valign(Gtk.Align.CENTER)
+    box.set_vexpand(True)
+    box.add_css_class('page-loading-placeholder')
+
+    spinner = Gtk.Spinner()
+    spinner.start()
+    box.append(spinner)
+
+    label = Gtk.Label(label=text)
+    label.add_css_class('page-loading-label')
+    box.append(label)
+
+    return box
@@ -3,6 +3,7 @@ gi.require_version('Gtk', '4.0')
 from gi.repository import Gtk, GLib
 
 from backend.constants import DEFAULT_SONG_INFO_IMAGE_SIZE
+from .art_loader import set_image_art
 
 def display_song_info(song_info: dict, image_size: int = DEFAULT_SONG_INFO_IMAGE_SIZE) -> Gtk.Box:
     """Displays info and the cover art for the song
@@ -26,7 +27,7 @@ def display_song_info(song_info: dict, image_size: int = DEFAULT_SONG_INFO_IMAGE
     
     # left side: cover image
     image = Gtk.Image()
-    image.set_from_file(art_path)
+    set_image_art(image, art_path, image_size)
     image.set_pixel_size(image_size)
     image.add_css_class('song-page-image')
     header_box.append(image)
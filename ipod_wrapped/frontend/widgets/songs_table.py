@@ -1,10 +1,13 @@
-from typing import Optional
+import locale
+import threading
+from typing import Optional, Callable
 import gi
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, Gio, GObject
+from gi.repository import Gtk, Gio, GObject, GLib
+
+from backend.constants import SONG_STORE_CHUNK_SIZE
 
 # TODO: 
-# - paginate table
 # - show album songs in order
 
 class Song(GObject.Object):
@@ -16,10 +19,19 @@ class Song(GObject.Object):
     artist = GObject.Property(type=str, default='')
     album = GObject.Property(type=str, default='')
     duration = GObject.Property(type=str, default='')
+    song_id = GObject.Property(type=int, default=0)  # key into SongRecords, 0 if none
+    duration_ms = GObject.Property(type=int, default=0)
+    play_count = GObject.Property(type=int, default=0)
+
+    # locale collation keys, worked out once so sorting is a plain compare
+    title_key = GObject.Property(type=str, default='')
+    artist_key = GObject.Property(type=str, default='')
+    album_key = GObject.Property(type=str, default='')
     
     def __init__(
         self, title: Optional[str] = None, artist: Optional[str] = None,
-        album: Optional[str] = None, duration: Optional[str] = None
+        album: Optional[str] = None, duration: Optional[str] = None,
+        song_id: int = 0, duration_ms: int = 0, play_count: int = 0
         ) -> None:
         """Initialize with song data"""
         super().__init__()
@@ -28,6 +40,56 @@ class Song(GObject.Object):
         self.artist = artist if artist is not None else ''
         self.album = album if album is not None else ''
         self.duration = duration if duration is not None else ''
+        self.song_id = song_id
+        self.duration_ms = duration_ms or 0
+        self.play_count = play_count or 0
+        self.title_key = collation_key(self.title)
+        self.artist_key = collation_key(self.artist)
+        self.album_key = collation_key(self.album)
+
+def collation_key(text: str) -> str:
+    """Case-insensitive locale collation key for the given text, so
+    comparing keys as plain strings gives the locale's order"""
+    try:
+        key = locale.strxfrm(text.casefold())
+    except (ValueError, OSError):
+        return text.casefold()
+
+    # keep the key valid utf-8 (for the GObject property) by shifting weights
+    # past the surrogate range - utf-8 byte order matches code point order
+    if key and max(key) >= '\ud800':
+        key = ''.join(chr(min(ord(c) + 0x800, 0x10FFFF)) if c >= '\ud800' else c for c in key)
+    return key
+
+class SongRecords:
+    """The full song dicts behind a table's rows, by song id, so a selected
+    row finds its song in O(1). Records are kept as is (not copied), and ids
+    are never reused, so a stale id can't point at the wrong song."""
+
+    def __init__(self) -> None:
+        self._records = {}
+        self._next_id = 1
+        self._lock = threading.Lock()  # pages are added from worker threads
+
+    def add(self, songs: list) -> list:
+        """Adds songs, returning their ids (in the same order)"""
+        with self._lock:
+            first_id = self._next_id
+            self._next_id += len(songs)
+            ids = list(range(first_id, self._next_id))
+            self._records.update(zip(ids, songs))
+        return ids
+
+    def get(self, song_id: int) -> Optional[dict]:
+        """The song with the given id, None if it's unknown (or was cleared)"""
+        return self._records.get(song_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
 
 def create_song_store() -> Gio.ListStore:
     """Creates a list store for songs."""
@@ -45,6 +107,55 @@ def create_song_selection_model(store: Gio.ListStore) -> tuple[Gtk.SingleSelecti
     selection_model = Gtk.SingleSelection(model=sort_model, can_unselect=True)
     return selection_model, sort_model
 
+def populate_song_store(store: Gio.ListStore, sort_model: Gtk.SortListModel, rows: list,
+                        on_done: Optional[Callable[[], None]] = None,
+                        chunk_size: int = SONG_STORE_CHUNK_SIZE,
+                        replace: bool = True) -> Callable[[], None]:
+    """Replaces (or adds to) the store's songs in idle-time chunks, so big
+    libraries don't block input. The sorter is detached until the last chunk
+    is in, so the table is sorted (and scrolled back to the top) once.
+
+    Args:
+        store (Gio.ListStore): The songs store
+        sort_model (Gtk.SortListModel): The sort model wrapping the store
+        rows (list): (title, artist, album, duration, song id, duration ms, play count) per song
+        on_done (Optional[Callable[[], None]]): Called once every song is in
+        chunk_size (int): Songs added per idle callback. Defaults to SONG_STORE_CHUNK_SIZE.
+        replace (bool): Remove the current songs first. Defaults to True.
+
+    Returns:
+        Callable[[], None]: Stops populating (e.g. when the table is reloaded)
+    """
+    sorter = sort_model.get_sorter()
+    sort_model.set_sorter(None)
+    if replace:
+        store.remove_all()
+    state = {'next': 0, 'cancelled': False}
+
+    def add_chunk():
+        if state['cancelled']:
+            return False
+        start = state['next']
+        chunk = [Song(*row) for row in rows[start:start + chunk_size]]
+        store.splice(store.get_n_items(), 0, chunk)
+        state['next'] = start + chunk_size
+        if state['next'] < len(rows):
+            return True
+
+        # all in, sort once
+        sort_model.set_sorter(sorter)
+        if on_done:
+            on_done()
+        return False
+
+    def cancel():
+        if not state['cancelled'] and state['next'] < len(rows):
+            sort_model.set_sorter(sorter)
+        state['cancelled'] = True
+
+    GLib.idle_add(add_chunk)
+    return cancel
+
 def _setup_title_column(factory: Gtk.SignalListItemFactory, list_item: Gtk.ListItem) -> None:
     """Setup callback for title column."""
     box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=4)
@@ -117,18 +228,32 @@ def _create_column_sorter(column: Gtk.ColumnViewColumn, prop_name: str) -> None:
     # create expression
     prop_exp = Gtk.PropertyExpression.new(Song, None, prop_name)
 
-    # create sorter
+    # create sorter (strings are collation keys, so compared as is)
     property_type = Song.find_property(prop_name).value_type.fundamental  # type: ignore
     if property_type == GObject.TYPE_STRING:
         sorter = Gtk.StringSorter.new(prop_exp)
-    elif property_type == GObject.TYPE_BOOLEAN:
+        sorter.set_ignore_case(False)
+        sorter.set_collation(Gtk.Collation.NONE)
+    elif property_type in (GObject.TYPE_BOOLEAN, GObject.TYPE_INT):
         sorter = Gtk.NumericSorter.new(prop_exp)
 
     # set the sorter on the column
     column.set_sorter(sorter)
 
-def create_songs_table(selection_model: Gtk.SelectionModel, sort_model: Gtk.SortListModel, scroll_to_top_callback=None, show_columns: Optional[dict] = None) -> Gtk.ColumnView:
-    """Creates the ColumnView (i.e. songs table)."""
+def _on_column_sort_changed(sorter: Gtk.ColumnViewSorter, on_sort_changed: Callable[[Optional[str], bool], None]) -> None:
+    """Passes the table's new sort column + order on"""
+    column = sorter.get_primary_sort_column()
+    descending = sorter.get_primary_sort_order() == Gtk.SortType.DESCENDING
+    on_sort_changed(column.get_id() if column else None, descending)
+
+def create_songs_table(selection_model: Gtk.SelectionModel, sort_model: Gtk.SortListModel, scroll_to_top_callback=None, show_columns: Optional[dict] = None, on_sort_changed: Optional[Callable[[Optional[str], bool], None]] = None) -> Gtk.ColumnView:
+    """Creates the ColumnView (i.e. songs table).
+
+    If on_sort_changed is given the songs are sorted by whoever fills the store
+    (e.g. the db, a page at a time) - clicking a column header calls it with the
+    column ('title', 'artist', 'album', 'duration' or None) and whether it's
+    descending, instead of sorting the loaded songs.
+    """
     # setup table
     column_view = Gtk.ColumnView(model=selection_model)
     column_view.set_show_row_separators(True)
@@ -147,7 +272,8 @@ def create_songs_table(selection_model: Gtk.SelectionModel, sort_model: Gtk.Sort
         title_column.set_resizable(True)
         title_column.set_fixed_width(180)
         title_column.set_expand(True)
-        _create_column_sorter(title_column, 'title')
+        _create_column_sorter(title_column, 'title-key')
+        title_column.set_id('title')
         column_view.append_column(title_column)
 
     # artist column
@@ -159,7 +285,8 @@ def create_songs_table(selection_model: Gtk.SelectionModel, sort_model: Gtk.Sort
         artist_column.set_resizable(True)
         artist_column.set_fixed_width(150)
         artist_column.set_expand(True)
-        _create_column_sorter(artist_column, 'artist')
+        _create_column_sorter(artist_column, 'artist-key')
+        artist_column.set_id('artist')
         column_view.append_column(artist_column)
 
     # album column
@@ -171,7 +298,8 @@ def create_songs_table(selection_model: Gtk.SelectionModel, sort_model: Gtk.Sort
         album_column.set_resizable(True)
         album_column.set_fixed_width(180)
         album_column.set_expand(True)
-        _create_column_sorter(album_column, 'album')
+        _create_column_sorter(album_column, 'album-key')
+        album_column.set_id('album')
         column_view.append_column(album_column)
 
     # duration column
@@ -182,12 +310,17 @@ def create_songs_table(selection_model: Gtk.SelectionModel, sort_model: Gtk.Sort
         duration_column = Gtk.ColumnViewColumn(title="Duration", factory=duration_factory)
         duration_column.set_resizable(True)
         duration_column.set_fixed_width(70)
-        _create_column_sorter(duration_column, 'duration')
+        _create_column_sorter(duration_column, 'duration-ms')
+        duration_column.set_id('duration')
         column_view.append_column(duration_column)
 
-    sort_model.set_sorter(column_view.get_sorter())
+    if on_sort_changed:
+        column_view.get_sorter().connect('changed', lambda sorter, change: _on_column_sort_changed(sorter, on_sort_changed))
+    else:
+        sort_model.set_sorter(column_view.get_sorter())
 
     if scroll_to_top_callback:
-        sort_model.connect('items-changed', lambda *args: scroll_to_top_callback())
+        # no sorter while the store is being populated, only scroll once it's sorted
+        sort_model.connect('items-changed', lambda model, *args: scroll_to_top_callback() if model.get_sorter() else None)
 
     return column_view
\ No newline at end of file
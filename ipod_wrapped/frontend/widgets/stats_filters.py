@@ -1,4 +1,3 @@
-import os
 import json
 from datetime import datetime
 from typing import List, Union
@@ -9,7 +8,7 @@ gi.require_version("GtkSource", "5")
 gi.require_version('Pango', '1.0')
 from gi.repository import Gtk, GtkSource, Adw, Pango
 
-from backend import find_top_genres, find_top_artists, find_top_albums, find_top_songs, load_stats_from_db, get_total_listening_time
+from backend import get_stats_engine, art_exists
 from backend.constants import (
     DEFAULT_SCALE_TIER,
     DEFAULT_VISUAL_LIST_ART_SIZE, DEFAULT_VISUAL_LIST_ROW_HEIGHT,
@@ -19,7 +18,10 @@ from backend.constants import (
     VISUAL_LIST_ART_SIZES, VISUAL_LIST_ROW_HEIGHTS,
     VISUAL_LIST_NUM_WIDTHS, VISUAL_SUMMARY_ART_SIZES,
     VISUAL_LIST_MAX_CHARS, VISUAL_SUMMARY_MAX_CHARS, VISUAL_PAGE_MARGINS,
+    DEFAULT_VISUAL_HEATMAP_CELL_SIZE, DEFAULT_VISUAL_MONTH_BAR_HEIGHT,
+    VISUAL_HEATMAP_CELL_SIZES, VISUAL_MONTH_BAR_HEIGHTS, VISUAL_HEATMAP_MONTHS,
 )
+from .art_loader import load_art_texture
 
 # TODO:
 # - add clear button to date range
@@ -317,8 +319,8 @@ class StatsFilters:
             art_container.set_halign(Gtk.Align.CENTER)
             art_container.set_valign(Gtk.Align.CENTER)
 
-            if art and os.path.exists(art):
-                album_art_img = Gtk.Picture.new_for_filename(art)
+            if art and art_exists(art):
+                album_art_img = Gtk.Picture.new_for_paintable(load_art_texture(art, art_size))
                 album_art_img.set_content_fit(Gtk.ContentFit.COVER)
                 album_art_img.add_css_class('top-x-album-art')
                 art_container.append(album_art_img)
@@ -369,8 +371,8 @@ class StatsFilters:
         if 'top_albums' in data and len(data['top_albums']) > 0:
             cover_art = data['top_albums'][0]['album_art']
 
-            if cover_art and os.path.exists(cover_art):
-                album_art_img = Gtk.Picture.new_for_filename(cover_art)
+            if cover_art and art_exists(cover_art):
+                album_art_img = Gtk.Picture.new_for_paintable(load_art_texture(cover_art, summary_art))
                 album_art_img.set_size_request(summary_art, summary_art)
                 album_art_img.set_content_fit(Gtk.ContentFit.COVER)
                 album_art_img.set_halign(Gtk.Align.CENTER)
@@ -456,13 +458,97 @@ class StatsFilters:
 
         return page      
             
+    def _create_visual_mode_patterns_page(self, patterns: dict) -> Gtk.Box:
+        """Creates a Spotify Wrapped-esque page of when the listening happened"""
+        # tier-based sizes
+        cell_size = VISUAL_HEATMAP_CELL_SIZES.get(self.tier, DEFAULT_VISUAL_HEATMAP_CELL_SIZE)
+        bar_height = VISUAL_MONTH_BAR_HEIGHTS.get(self.tier, DEFAULT_VISUAL_MONTH_BAR_HEIGHT)
+
+        # setup
+        page = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        page.set_halign(Gtk.Align.CENTER)
+        page.set_valign(Gtk.Align.CENTER)
+        page.add_css_class('stats-visual-page-box')
+        page.add_css_class('stats-visual-page-box-patterns')
+
+        page_title = Gtk.Label(label='When you listened')
+        page_title.add_css_class('stats-visual-page-title')
+        page.append(page_title)
+
+        # hour x weekday heatmap, shaded in 5 levels relative to the busiest hour
+        heatmap = patterns.get('heatmap_mins', [])
+        busiest_hour = max((mins for row in heatmap for mins in row), default=0)
+        grid = Gtk.Grid()
+        grid.set_row_spacing(2)
+        grid.set_column_spacing(2)
+        grid.set_halign(Gtk.Align.CENTER)
+        for day_idx, (day, row) in enumerate(zip(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'], heatmap)):
+            day_label = Gtk.Label(label=day)
+            day_label.set_xalign(0.0)
+            day_label.add_css_class('heatmap-day-label')
+            grid.attach(day_label, 0, day_idx, 1, 1)
+
+            for hour, mins in enumerate(row):
+                level = 0 if not busiest_hour or not mins else 1 + (3 * mins) // busiest_hour
+                cell = Gtk.Box()
+                cell.set_size_request(cell_size, cell_size)
+                cell.set_tooltip_text(f"{day} {hour:02d}:00 - {mins:,} mins")
+                cell.add_css_class('heatmap-cell')
+                cell.add_css_class(f'heatmap-level-{level}')
+                grid.attach(cell, hour + 1, day_idx, 1, 1)
+        page.append(grid)
+
+        # streak + busiest day
+        highlights_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=30)
+        highlights_box.set_halign(Gtk.Align.CENTER)
+        highlights = []
+        streak = patterns.get('longest_streak')
+        if streak:
+            highlights.append(("Longest Streak", f"{streak['days']:,} days"))
+        busiest_day = patterns.get('busiest_day')
+        if busiest_day:
+            highlights.append(("Busiest Day", busiest_day['date']))
+        for title, value in highlights:
+            highlight_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+
+            title_label = Gtk.Label(label=title)
+            title_label.set_xalign(0.0)
+            title_label.add_css_class('summary-mins-label')
+            highlight_box.append(title_label)
+
+            value_label = Gtk.Label(label=value)
+            value_label.set_xalign(0.0)
+            value_label.add_css_class('summary-mins-value')
+            highlight_box.append(value_label)
+
+            highlights_box.append(highlight_box)
+        page.append(highlights_box)
+
+        # minutes per month (most recent months only)
+        months = patterns.get('monthly_mins', [])[-VISUAL_HEATMAP_MONTHS:]
+        busiest_month = max((month['mins'] for month in months), default=0)
+        if busiest_month:
+            bars_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=2)
+            bars_box.set_halign(Gtk.Align.CENTER)
+            bars_box.set_size_request(-1, bar_height)
+            for month in months:
+                bar = Gtk.Box()
+                bar.set_size_request(cell_size, max(1, bar_height * month['mins'] // busiest_month))
+                bar.set_valign(Gtk.Align.END)
+                bar.set_tooltip_text(f"{month['month']} - {month['mins']:,} mins")
+                bar.add_css_class('month-bar')
+                bars_box.append(bar)
+            page.append(bars_box)
+
+        return page
+
     def _create_visual_mode_pages(self, results: dict) -> List[Gtk.Box]:
         """Creates Spotify Wrapped-esque views of the given stats."""
         # setup + reformat results
         pages = []
         data = {}
         for category, res in results['data'].items():
-            if category == 'total_listened_mins':
+            if category in ('total_listened_mins', 'listening_patterns'):
                 data[category] = res
                 continue
             
@@ -491,6 +577,11 @@ class StatsFilters:
         if 'top_genres' in data:
             pages.append(
                 self._create_visual_mode_list_page('genre', data['top_genres']))
+
+        # 'When you listened' page
+        if data.get('listening_patterns'):
+            pages.append(
+                self._create_visual_mode_patterns_page(data['listening_patterns']))
         
         return pages
     
@@ -527,12 +618,7 @@ class StatsFilters:
             else:
                 results['metadata'][k] = v
                 
-        categories = {
-            'artists': find_top_artists,
-            'albums': find_top_albums,
-            'songs': find_top_songs,
-            'genres': find_top_genres
-        }
+        categories = ['artists', 'albums', 'songs', 'genres']
         db_type, db_path = db_info.values()
 
         # convert datetime
@@ -545,31 +631,22 @@ class StatsFilters:
             glib_date = self.filters['end_date']
             end_date = datetime(glib_date.get_year(), glib_date.get_month(), glib_date.get_day_of_month(), 23, 59, 59)
 
-        # load data for making stats
-        db_stats = load_stats_from_db(
-            db_type=db_type,
-            db_path=db_path,
-            start_date=start_date,
-            end_date=end_date
-        )
-        
+        # one snapshot of the data for every stat (cached per date range)
+        engine = get_stats_engine(db_type, db_path)
+        snapshot = engine.snapshot(start_date, end_date)
+
         # breakdown by category
-        for category, cat_func in categories.items():
-            top = cat_func(
-                db_type=db_type, db_path=db_path,
-                n=self.filters[f'max_{category}'],
-                stats_data=db_stats
-            )
-            results['data'][f'top_{category}'] = top
+        for category in categories:
+            top_func = getattr(snapshot, f'top_{category}')
+            results['data'][f'top_{category}'] = top_func(self.filters[f'max_{category}'])
 
         # total listening time
-        results['data']['total_listened_mins'] = get_total_listening_time(
-            db_type=db_type,
-            db_path=db_path,
-            stats_data=db_stats,
-            start_date=start_date,
-            end_date=end_date
-        )
+        results['data']['total_listened_mins'] = snapshot.total_listening_mins()
+
+        # hour/weekday heatmap, streaks + monthly minutes (needs numpy)
+        patterns = engine.listening_patterns(start_date, end_date)
+        if patterns is not None:
+            results['data']['listening_patterns'] = patterns
         
         # clear
         mode = self.filters['mode']
@@ -0,0 +1,199 @@
+import struct
+
+import pytest
+
+from backend.tagcache import (
+    TagcacheReader, load_tagcache, TAG_NAMES, STRING_TAGS,
+    TAGCACHE_MAGIC, FLAG_DELETED, UNTAGGED
+)
+
+MAGIC = TAGCACHE_MAGIC | 0x0d  # a version with the TAG_NAMES layout
+
+
+def write_tagcache(rockbox_dir, tracks, byte_order='<'):
+    """Writes a small tag database (database_idx.tcd + database_<tag>.tcd)
+
+    Args:
+        rockbox_dir: Where to write the .tcd files
+        tracks (list): (tags, flag) per entry. Missing string tags are written
+                       as <Untagged>, missing numeric tags as 0.
+        byte_order (str): '<' or '>'
+    """
+    # string files: each unique value stored once, the index holds its offset
+    offsets = []
+    string_tags = [tag for tag, name in enumerate(TAG_NAMES) if name in STRING_TAGS]
+    for tag in string_tags:
+        data = b''
+        seen = {}
+        for entry_id, (tags, _) in enumerate(tracks):
+            value = tags.get(TAG_NAMES[tag]) or UNTAGGED
+            if value not in seen:
+                raw = value.encode('utf-8') + b'\0'
+                raw += b'X' * (-len(raw) % 4)  # rockbox pads entries
+                seen[value] = 12 + len(data)
+                data += struct.pack(f'{byte_order}ii', len(raw), entry_id) + raw
+            offsets.append((tag, entry_id, seen[value]))
+        header = struct.pack(f'{byte_order}3i', MAGIC, len(data), len(seen))
+        (rockbox_dir / f'database_{tag}.tcd').write_bytes(header + data)
+
+    offset_of = {(tag, entry_id): offset for tag, entry_id, offset in offsets}
+    entries = b''
+    for entry_id, (tags, flag) in enumerate(tracks):
+        values = []
+        for tag, name in enumerate(TAG_NAMES):
+            if name in STRING_TAGS:
+                values.append(offset_of[(tag, entry_id)])
+            else:
+                values.append(tags.get(name, 0))
+        entries += struct.pack(f'{byte_order}{len(TAG_NAMES) + 1}i', *values, flag)
+
+    header = struct.pack(f'{byte_order}6i', MAGIC, len(entries), len(tracks), 1, 1, 0)
+    (rockbox_dir / 'database_idx.tcd').write_bytes(header + entries)
+
+
+def expected_track(**tags):
+    """A track dict as the reader returns it"""
+    track = {name: (None if name in STRING_TAGS else 0) for name in TAG_NAMES}
+    track.update(tags)
+    return track
+
+
+SONG = {
+    'artist': 'Radiohead',
+    'album': 'In Rainbows',
+    'genre': 'Alternative',
+    'title': 'Nude',
+    'filename': '/Music/Radiohead/In Rainbows/03 Nude.mp3',
+    'year': 2007,
+    'tracknumber': 3,
+    'length': 255000,
+    'playcount': 12,
+    'lastplayed': 1712345678,
+}
+
+
+@pytest.mark.parametrize('byte_order', ['<', '>'])
+def test_reads_string_and_numeric_tags(tmp_path, byte_order):
+    write_tagcache(tmp_path, [(SONG, 0)], byte_order)
+
+    tracks = TagcacheReader(tmp_path).read_all()
+
+    assert tracks == [expected_track(**SONG)]
+
+
+@pytest.mark.parametrize('byte_order', ['<', '>'])
+def test_skips_deleted_entries(tmp_path, byte_order):
+    deleted = dict(SONG, title='Gone', filename='/Music/Radiohead/In Rainbows/99 Gone.mp3')
+    kept = dict(SONG, title='Reckoner', filename='/Music/Radiohead/In Rainbows/07 Reckoner.mp3',
+                tracknumber=7, length=290000, playcount=0, lastplayed=0)
+    write_tagcache(tmp_path, [(deleted, FLAG_DELETED), (kept, 0)], byte_order)
+
+    tracks = TagcacheReader(tmp_path).read_all()
+
+    assert tracks == [expected_track(**kept)]
+
+
+def test_untagged_values_are_none(tmp_path):
+    untagged = {'title': 'Demo', 'filename': '/Music/Unsorted/demo.mp3', 'length': 61000}
+    write_tagcache(tmp_path, [(untagged, 0)])
+
+    track, = TagcacheReader(tmp_path).read_all()
+
+    assert track == expected_track(**untagged)
+    assert track['artist'] is None and track['album'] is None and track['genre'] is None
+    assert track['length'] == 61000
+
+
+def write_string_file(path, value, byte_order='<'):
+    """A tag file holding one string, at offset 12 (straight after the header)"""
+    raw = value.encode('utf-8') + b'\0'
+    raw += b'X' * (-len(raw) % 4)
+    entry = struct.pack(f'{byte_order}ii', len(raw), 0) + raw
+    path.write_bytes(struct.pack(f'{byte_order}3i', TAGCACHE_MAGIC | 0x0d, len(entry), 1) + entry)
+
+
+STRINGS = ['Radiohead', 'In Rainbows', 'Alternative', 'Nude', '/Music/Radiohead/In Rainbows/03 Nude.mp3',
+           'Thom Yorke', 'Live', 'Radiohead', 'Rock']
+
+
+@pytest.mark.parametrize('byte_order', ['<', '>'])
+def test_hand_packed_entry(tmp_path, byte_order):
+    # laid out by hand from apps/tagcache.h rather than from TAG_NAMES
+    for tag, value in enumerate(STRINGS):
+        write_string_file(tmp_path / f'database_{tag}.tcd', value, byte_order)
+    entry = [12, 12, 12, 12, 12, 12, 12, 12, 12,  # artist .. grouping (offsets)
+             2007, 1, 3, 320,                      # year, discnumber, tracknumber, bitrate
+             255000, 12, 0, 3060000, 1712345678,   # length, playcount, rating, playtime, lastplayed
+             5, 1700000000, 0, 0,                  # commitid, mtime, lastelapsed, lastoffset
+             0]                                    # flag
+    (tmp_path / 'database_idx.tcd').write_bytes(
+        struct.pack(f'{byte_order}6i', TAGCACHE_MAGIC | 0x0d, 23 * 4, 1, 1, 5, 0) +
+        struct.pack(f'{byte_order}23i', *entry))
+
+    track, = TagcacheReader(tmp_path).read_all()
+
+    assert track['artist'] == 'Radiohead' and track['title'] == 'Nude' and track['grouping'] == 'Rock'
+    assert (track['year'], track['tracknumber'], track['bitrate']) == (2007, 3, 320)
+    assert (track['length'], track['playcount'], track['lastplayed']) == (255000, 12, 1712345678)
+
+
+def test_hand_packed_entry_with_canonical_artist(tmp_path):
+    for tag, value in enumerate(STRINGS):
+        write_string_file(tmp_path / f'database_{tag}.tcd', value)
+    write_string_file(tmp_path / 'database_12.tcd', 'Radiohead')
+    entry = [12, 12, 12, 12, 12, 12, 12, 12, 12,  # artist .. grouping (offsets)
+             2007, 1, 3,                           # year, discnumber, tracknumber
+             12,                                   # canonicalartist (offset)
+             320, 255000, 12, 0, 3060000,          # bitrate, length, playcount, rating, playtime
+             1712345678, 5, 1700000000, 0, 0,      # lastplayed, commitid, mtime, lastelapsed, lastoffset
+             0]                                    # flag
+    (tmp_path / 'database_idx.tcd').write_bytes(
+        struct.pack('<6i', TAGCACHE_MAGIC | 0x10, 24 * 4, 1, 1, 5, 0) + struct.pack('<24i', *entry))
+
+    track, = TagcacheReader(tmp_path).read_all()
+
+    assert track['canonicalartist'] == 'Radiohead'
+    assert (track['bitrate'], track['length'], track['playcount']) == (320, 255000, 12)
+    assert track['lastplayed'] == 1712345678
+
+
+def test_layout_mismatch_is_skipped(tmp_path):
+    # a version with the canonical artist, but entries one tag short
+    write_tagcache(tmp_path, [(SONG, 0)])
+    index = tmp_path / 'database_idx.tcd'
+    index.write_bytes(struct.pack('<i', TAGCACHE_MAGIC | 0x10) + index.read_bytes()[4:])
+
+    assert TagcacheReader(tmp_path).read_all() == []
+
+
+def test_unknown_version_is_skipped(tmp_path):
+    write_tagcache(tmp_path, [(SONG, 0)])
+    index = tmp_path / 'database_idx.tcd'
+    index.write_bytes(struct.pack('<i', TAGCACHE_MAGIC | 0x7f) + index.read_bytes()[4:])
+
+    assert TagcacheReader(tmp_path).read_all() == []
+
+
+def test_unknown_format_is_skipped(tmp_path):
+    write_tagcache(tmp_path, [(SONG, 0)])
+    index = tmp_path / 'database_idx.tcd'
+    index.write_bytes(b'\0\0\0\0' + index.read_bytes()[4:])
+
+    assert TagcacheReader(tmp_path).read_all() == []
+
+
+def test_load_tagcache_keys_tracks_by_music_path(tmp_path):
+    other = dict(SONG, title='Weird Fishes', filename='/<HDD0>/MUSIC/Radiohead/In Rainbows/04 Weird Fishes.mp3',
+                 tracknumber=4, playcount=3)
+    write_tagcache(tmp_path, [(SONG, 0), (other, 0)], '>')
+
+    library = load_tagcache(tmp_path)
+
+    assert library == {
+        '/Music/Radiohead/In Rainbows/03 Nude.mp3': expected_track(**SONG),
+        '/Music/Radiohead/In Rainbows/04 Weird Fishes.mp3': expected_track(**other),
+    }
+
+
+def test_load_tagcache_without_database(tmp_path):
+    assert load_tagcache(tmp_path) == {}